@@ -1,10 +1,20 @@
 from flask import Flask, render_template_string, request, redirect, url_for, flash, session, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import os
 import json
 import random
 import re
+import importlib.util
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_shared_module(relative_path):
+    """Load a dependency-free module of the app package by file path"""
+    name = 'taskflow_shared.' + os.path.splitext(relative_path)[0].replace('/', '.')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT_DIR, *relative_path.split('/')))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -82,6 +92,19 @@ def get_subtask_progress(task_id):
     completed = len([st for st in subtasks if st['completed']])
     return completed, len(subtasks)
 
+# Response compression is shared with the app package. The module is loaded
+# from its file so app/__init__.py and its extensions aren't needed here.
+compression = load_shared_module('app/utils/compression.py')
+
+# Password hashing runs in the app package's bounded pool, loaded the same way
+password_hashing = load_shared_module('app/services/password_hasher.py')
+password_hasher = password_hashing.PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2'),
+    workers=int(os.environ['PASSWORD_HASH_WORKERS']) if os.environ.get('PASSWORD_HASH_WORKERS') else None,
+    max_pending=int(os.environ['PASSWORD_HASH_MAX_PENDING']) if os.environ.get('PASSWORD_HASH_MAX_PENDING') else None,
+    start_method=os.environ.get('PASSWORD_HASH_START_METHOD')
+)
+
 # Routes
 @app.route('/')
 def home():
@@ -205,7 +228,7 @@ def register():
             'username': username,
             'email': email,
             'full_name': full_name,
-            'password_hash': generate_password_hash(password),
+            'password_hash': password_hasher.hash(password),
             'created_at': datetime.now(),
             'is_admin': user_id_counter == 1
         }
@@ -245,7 +268,10 @@ def login():
                 user = u
                 break
 
-        if user and check_password_hash(user['password_hash'], password):
+        if user and password_hasher.verify(user['password_hash'], password):
+            if password_hasher.needs_rehash(user['password_hash']):
+                user['password_hash'] = password_hasher.hash(password)
+                password_hasher.count_rehash()
             session['user_id'] = user['id']
             add_activity(user['id'], 'User logged in')
             flash(f'Welcome back, {user["full_name"]}!')
@@ -2631,6 +2657,8 @@ if not users_db:
     task_id_counter = 1
     subtask_id_counter = 1
 
+app.wsgi_app = compression.CompressionMiddleware(app.wsgi_app, min_size=int(os.environ.get('COMPRESS_MIN_SIZE', 500)))
+
 # Vercel entry point
 application = app
 
@@ -52,4 +52,64 @@ def create_app(config_class=Config):
     # Import models to ensure they are registered with SQLAlchemy
     from app.models import User, Task, Tag, Board, BoardAccess, TaskAudit
 
+    # Password hashing runs in a bounded worker pool, off the request threads
+    from app.services.password_hasher import init_password_hasher
+    init_password_hasher(app)
+
+    # Shared stamps let every worker process notice committed cache invalidations
+    from app.services.cache_versions import init_cache_versions
+    init_cache_versions(app)
+
+    # current_user is rebuilt from a cached identity instead of a users query
+    from app.services.user_cache import init_user_cache
+    init_user_cache(app)
+
+    # board_access_changed is sent after commits that grant or revoke board access
+    from app.services.board_access import init_board_access
+    init_board_access(app)
+
+    # Dashboard counters are kept current by session flush events
+    from app.services.counters import init_counters
+    init_counters(app)
+
+    # boards.task_count, completed_count and open_count are kept current on write
+    from app.services.board_counters import init_board_counters
+    init_board_counters(app)
+
+    # Board.has_access reads a per-user ACL map cached across requests
+    from app.services.acl import init_acl_cache
+    init_acl_cache(app)
+
+    # Deleted users and boards are purged in chunks by a background worker
+    from app.services.purge import init_purge_worker
+    init_purge_worker(app)
+
+    # Uploaded user CSVs are imported in chunks by a background worker
+    from app.services.user_import import init_user_import_worker
+    init_user_import_worker(app)
+
+    # Audit rows are written in-transaction or by a background writer (AUDIT_SINK)
+    from app.services.audit_sink import init_audit_sink
+    init_audit_sink(app)
+
+    # Task inserts, updates and deletes are audited from session flush events
+    from app.services.audit_capture import init_audit_capture
+    init_audit_capture(app)
+
+    # `flask archive-tasks` moves long-archived tasks out of the hot tasks table
+    from app.services.task_archive import init_task_archive
+    init_task_archive(app)
+
+    # `flask archive-audits` moves rows past AUDIT_RETENTION_DAYS into archives
+    from app.services.audit_archive import register_commands
+    register_commands(app)
+
+    # `flask upgrade-db` brings databases created from older models up to date
+    from app.services.migrations import init_migrations
+    init_migrations(app)
+
+    # Compress HTML/JSON responses above COMPRESS_MIN_SIZE bytes
+    from app.utils.compression import init_compression
+    init_compression(app)
+
     return app
\ No newline at end of file
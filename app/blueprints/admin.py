@@ -1,12 +1,67 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+import csv
+import heapq
+from itertools import islice
+from operator import itemgetter
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, Response
 from flask_login import login_required, current_user
+from flask_wtf import FlaskForm
+from wtforms import BooleanField, IntegerField, SelectMultipleField, StringField, TextAreaField
+from wtforms.validators import DataRequired, Optional
 from functools import wraps
 from app import db
 from app.models import User, Board, BoardAccess, Task
 from werkzeug.security import generate_password_hash
+from app.services.audit_sink import get_audit_sink
+from app.services.password_hasher import get_password_hasher
+from app.models import TaskAudit, PurgeJob, UserImportJob
+from app.utils.audit import filter_audits, is_filterable_field, audit_timeline_query, audit_timeline_item
+from app.services.audit_capture import TRACKED_FIELDS
+from app.utils.pagination import keyset_page, page_size
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager, joinedload, load_only
+from app.utils.serializers import board_counts
+from app.services.board_access import sync_board_access, note_access_changed
+from app.services.purge import request_purge, get_purge_worker
+from app.services.counters import read_counters
+from app.services.gemini_ai import gemini_ai
+from app.services.user_import import IMPORT_COLUMNS, read_import_rows, report_csv, request_import, job_report, \
+    get_user_import_worker
 
 admin_bp = Blueprint('admin', __name__, template_folder='../templates/admin')
 
+USER_SEARCH_LIMIT = 20
+BOARDS_PER_PAGE = 25
+RECENT_LIMIT = 6
+ACTIVITY_LIMIT = 10
+
+class BoardForm(FlaskForm):
+    """Fields the board create and edit pages render; the views read the posted values themselves"""
+    name = StringField('Name', validators=[DataRequired()])
+    owner_id = IntegerField('Owner', validators=[DataRequired()])
+    description = TextAreaField('Description', validators=[Optional()])
+    members = SelectMultipleField('Members', coerce=int, validate_choice=False)
+    visibility = StringField('Visibility', default='private')
+    template = StringField('Template', default='kanban')
+    color_theme = StringField('Color Theme')
+    is_archived = BooleanField('Archived')
+    allow_comments = BooleanField('Allow Comments', default=True)
+    send_invitations = BooleanField('Send Invitations')
+    admin_notes = TextAreaField('Admin Notes', validators=[Optional()])
+
+def _prefix_filter(column, prefix):
+    """LIKE 'prefix%' written as a range so a plain B-tree index on column can serve it"""
+    return db.and_(column >= prefix, column < prefix + '\uffff')
+
+def _not_member_of(board):
+    """
+    Users who are neither the owner of board nor granted access to it
+
+    Written as a correlated NOT EXISTS so each candidate is one probe of the
+    (board_id, user_id) unique index rather than a scan of the member list.
+    """
+    member = db.exists().where(BoardAccess.board_id == board.id, BoardAccess.user_id == User.id)
+    return db.and_(User.id != board.owner_id, ~member)
+
 def admin_required(f):
     @wraps(f)
     @login_required
@@ -20,30 +75,44 @@ def admin_required(f):
 @admin_bp.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    # Get comprehensive stats
+    # O(1) reads of the incrementally maintained counters
+    counters = read_counters()
     stats = {
-        'total_users': User.query.count(),
-        'active_users': User.query.filter_by(is_admin=False).count(),
-        'total_boards': Board.query.filter_by(is_active=True).count(),
-        'total_tasks': Task.query.count()
+        'total_users': counters['users'],
+        'active_users': counters['non_admin_users'],
+        'total_boards': counters['active_boards'],
+        'total_tasks': counters['tasks']
     }
 
-    recent_users = User.query.order_by(User.created_at.desc()).limit(6).all()
-    recent_boards = Board.query.order_by(Board.created_at.desc()).limit(6).all()
-
-    # Mock recent activities for demonstration
-    recent_activities = [
-        {
-            'type': 'user_created',
-            'description': f'New user {recent_users[0].username} joined' if recent_users else 'User activity',
-            'timestamp': recent_users[0].created_at if recent_users else None
-        },
+    recent_users = User.query.filter(User.pending_delete.is_(False))\
+        .order_by(User.created_at.desc(), User.id.desc()).limit(RECENT_LIMIT).all()
+    recent_boards = Board.query.filter(Board.pending_delete.is_(False))\
+        .order_by(Board.created_at.desc(), Board.id.desc()).limit(RECENT_LIMIT).all()
+    recent_audits = audit_timeline_query()\
+        .order_by(TaskAudit.timestamp.desc(), TaskAudit.id.desc()).limit(ACTIVITY_LIMIT).all()
+
+    # Each source is already newest-first from its timeline index, so a k-way
+    # merge of the three heads yields the overall newest events
+    user_events = (
+        {'type': 'user_created', 'description': f'New user {user.username} joined', 'timestamp': user.created_at}
+        for user in recent_users if user.created_at
+    )
+    board_events = (
+        {'type': 'board_created', 'description': f'Board "{board.name}" created', 'timestamp': board.created_at}
+        for board in recent_boards if board.created_at
+    )
+    task_events = (
         {
-            'type': 'board_created',
-            'description': f'Board "{recent_boards[0].name}" created' if recent_boards else 'Board activity',
-            'timestamp': recent_boards[0].created_at if recent_boards else None
+            'type': f'task_{audit.action}',
+            'description': f'{username or "Someone"}: {audit.get_description()}',
+            'timestamp': audit.timestamp
         }
-    ] if recent_users and recent_boards else []
+        for audit, username in recent_audits if audit.timestamp
+    )
+    recent_activities = list(islice(
+        heapq.merge(user_events, board_events, task_events, key=itemgetter('timestamp'), reverse=True),
+        ACTIVITY_LIMIT
+    ))
 
     return render_template('glass_admin_dashboard.html',
                          stats=stats,
@@ -51,12 +120,98 @@ def admin_dashboard():
                          recent_boards=recent_boards,
                          recent_activities=recent_activities)
 
+@admin_bp.route('/admin/metrics')
+@admin_required
+def metrics():
+    """Runtime metrics for background services"""
+    return jsonify({
+        'audit_sink': get_audit_sink().stats(),
+        'user_cache': current_app.extensions['user_cache'].stats(),
+        'acl_cache': current_app.extensions['acl_cache'].stats(),
+        'gemini': gemini_ai.stats(),
+        'password_hasher': get_password_hasher().stats()
+    })
+
+@admin_bp.route('/admin/audit')
+@admin_required
+def audit_log():
+    """Keyset-paginated audit browser across all tasks, newest first"""
+    if not is_filterable_field(request.args.get('field')):
+        return jsonify({'error': f'field must be one of {", ".join(TRACKED_FIELDS)}'}), 400
+    query = filter_audits(
+        audit_timeline_query(),
+        action=request.args.get('action'),
+        user_id=request.args.get('user_id', type=int),
+        field=request.args.get('field')
+    )
+    task_id = request.args.get('task_id', type=int)
+    if task_id:
+        query = query.filter(TaskAudit.task_id == task_id)
+
+    rows, next_cursor = keyset_page(
+        query, [TaskAudit.timestamp, TaskAudit.id],
+        request.args.get('cursor'), page_size(request.args.get('limit')),
+        key=lambda row: [row[0].timestamp, row[0].id]
+    )
+    return jsonify({
+        'items': [audit_timeline_item(audit, username) for audit, username in rows],
+        'next_cursor': next_cursor
+    })
+
 # User Management Routes
 @admin_bp.route('/admin/users')
 @admin_required
 def manage_users():
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template('manage_users.html', users=users)
+    """
+    Keyset-paginated user directory, newest first
+
+    ?search= narrows to usernames or emails starting with the term, ordered
+    by username, using range scans on their unique indexes.
+    """
+    search = request.args.get('search', '').strip()
+    query = User.query.options(load_only(
+        User.id, User.username, User.email, User.is_admin, User.created_at, User.pending_delete
+    ))\
+        .filter(User.pending_delete.is_(False))
+    if search:
+        query = query.filter(db.or_(_prefix_filter(User.username, search), _prefix_filter(User.email, search)))
+        columns, descending = [User.username, User.id], False
+    else:
+        columns, descending = [User.created_at, User.id], True
+
+    users, next_cursor = keyset_page(
+        query, columns, request.args.get('cursor'),
+        page_size(request.args.get('per_page')), descending=descending
+    )
+    return render_template('manage_users.html', users=users, next_cursor=next_cursor, search=search)
+
+@admin_bp.route('/admin/users/search')
+@admin_required
+def search_users():
+    """
+    Typeahead for user pickers
+
+    Returns up to ?limit= users whose username or email starts with ?q=.
+    ?exclude_board= leaves out the owner and current members of that board.
+    """
+    prefix = request.args.get('q', '').strip()
+    if not prefix:
+        return jsonify({'users': []})
+
+    query = db.session.query(User.id, User.username, User.email, User.is_admin)\
+        .filter(User.pending_delete.is_(False))\
+        .filter(db.or_(_prefix_filter(User.username, prefix), _prefix_filter(User.email, prefix)))
+    board_id = request.args.get('exclude_board', type=int)
+    if board_id:
+        board = Board.query.get_or_404(board_id)
+        query = query.filter(_not_member_of(board))
+
+    limit = page_size(request.args.get('limit'), default=10, maximum=USER_SEARCH_LIMIT)
+    rows = query.order_by(User.username).limit(limit).all()
+    return jsonify({'users': [
+        {'id': row.id, 'username': row.username, 'email': row.email, 'is_admin': row.is_admin}
+        for row in rows
+    ]})
 
 @admin_bp.route('/admin/users/create', methods=['GET', 'POST'])
 @admin_required
@@ -96,6 +251,68 @@ def create_user():
 
     return render_template('create_user.html')
 
+@admin_bp.route('/admin/users/import', methods=['GET', 'POST'])
+@admin_required
+def import_users():
+    """
+    Queue an uploaded CSV for the background importer
+
+    ?job= shows that import's progress and, once it finishes, links its
+    per-row report.
+    """
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            flash('Choose a CSV file to import.', 'danger')
+            return redirect(url_for('admin.import_users'))
+
+        try:
+            rows = read_import_rows(upload.stream)
+        except (UnicodeDecodeError, csv.Error):
+            flash('The file could not be read as UTF-8 CSV.', 'danger')
+            return redirect(url_for('admin.import_users'))
+
+        max_rows = current_app.config.get('USER_IMPORT_MAX_ROWS', 10000)
+        if len(rows) > max_rows:
+            flash(f'At most {max_rows} users can be imported at once.', 'danger')
+            return redirect(url_for('admin.import_users'))
+
+        job = request_import(rows, filename=upload.filename, requested_by_id=current_user.id)
+        db.session.commit()
+        get_user_import_worker().submit(job.id)
+
+        flash(f'Importing {len(rows)} rows from {upload.filename}.', 'success')
+        return redirect(url_for('admin.import_users', job=job.id))
+
+    job_id = request.args.get('job', type=int)
+    job = UserImportJob.query.get_or_404(job_id) if job_id else None
+    return render_template('import_users.html', columns=IMPORT_COLUMNS, job=job)
+
+@admin_bp.route('/admin/imports/<int:job_id>')
+@admin_required
+def import_job(job_id):
+    return jsonify(UserImportJob.query.get_or_404(job_id).to_dict())
+
+@admin_bp.route('/admin/imports/<int:job_id>/report')
+@admin_required
+def import_report(job_id):
+    """The finished import's per-row report as a CSV download"""
+    job = UserImportJob.query.get_or_404(job_id)
+    report = job_report(job)
+    if report is None:
+        return jsonify({'error': 'The import has not finished', 'status': job.status}), 409
+
+    created = sum(1 for result in report if result['status'] == 'created')
+    return Response(
+        report_csv(report),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition': f'attachment; filename=user-import-{job.id}-report.csv',
+            'X-Import-Created': str(created),
+            'X-Import-Rejected': str(len(report) - created)
+        }
+    )
+
 @admin_bp.route('/admin/users/<int:user_id>/edit', methods=['GET', 'POST'])
 @admin_required
 def edit_user(user_id):
@@ -124,19 +341,45 @@ def delete_user(user_id):
         flash('You cannot delete your own account.', 'danger')
         return redirect(url_for('admin.manage_users'))
 
-    username = user.username
-    db.session.delete(user)
+    if user.pending_delete:
+        flash(f'User {user.username} is already being deleted.', 'info')
+        return redirect(url_for('admin.manage_users'))
+
+    # The account is hidden and locked out now; its data is removed in the background
+    job = request_purge(user, current_user.id)
     db.session.commit()
+    get_purge_worker().submit(job.id)
 
-    flash(f'User {username} deleted successfully!', 'success')
+    flash(f'User {user.username} is being deleted.', 'success')
     return redirect(url_for('admin.manage_users'))
 
 # Board Management Routes
 @admin_bp.route('/admin/boards')
 @admin_required
 def manage_boards():
-    boards = Board.query.order_by(Board.created_at.desc()).all()
-    return render_template('manage_boards.html', boards=boards)
+    """Paginated board list; owners are joined in and task counts come from grouped queries"""
+    page = request.args.get('page', 1, type=int)
+    search = request.args.get('search', '').strip()
+
+    query = Board.query.options(
+        joinedload(Board.owner).load_only(User.id, User.username, User.email)
+    ).filter(Board.pending_delete.is_(False))
+    if search:
+        query = query.filter(Board.name.contains(search))
+    boards = query.order_by(Board.created_at.desc(), Board.id.desc())\
+        .paginate(page=page, per_page=BOARDS_PER_PAGE, error_out=False)
+
+    counts = board_counts(boards.items)
+    status_totals = dict(
+        db.session.query(Board.is_active, func.count(Board.id))
+        .filter(Board.pending_delete.is_(False)).group_by(Board.is_active)
+    )
+    return render_template('manage_boards.html',
+                         boards=boards,
+                         counts=counts,
+                         active_total=status_totals.get(True, 0),
+                         archived_total=status_totals.get(False, 0),
+                         task_total=read_counters()['tasks'])
 
 @admin_bp.route('/admin/boards/create', methods=['GET', 'POST'])
 @admin_required
@@ -149,31 +392,20 @@ def create_board():
         board = Board(
             name=name,
             description=description,
-            owner_id=owner_id
+            owner_id=int(owner_id)
         )
-
         db.session.add(board)
-        db.session.commit()
-
-        # Add selected users to board access
-        user_ids = request.form.getlist('user_ids')
-        for user_id in user_ids:
-            if int(user_id) != int(owner_id):  # Don't add owner as they already have access
-                access = BoardAccess(
-                    board_id=board.id,
-                    user_id=user_id,
-                    can_edit=True,
-                    can_delete=False,
-                    granted_by_id=current_user.id
-                )
-                db.session.add(access)
+        db.session.flush()  # assigns board.id for the grants
+        note_access_changed(board.id, [board.owner_id])
 
+        # Add selected users to board access; the owner already has it
+        sync_board_access(board.id, board.owner_id, request.form.getlist('members'), current_user.id)
         db.session.commit()
         flash(f'Board "{name}" created successfully!', 'success')
         return redirect(url_for('admin.manage_boards'))
 
-    users = User.query.order_by(User.username).all()
-    return render_template('create_board.html', users=users)
+    # Pickers start empty and are filled from admin.search_users
+    return render_template('create_board.html', form=BoardForm(), users=[])
 
 @admin_bp.route('/admin/boards/<int:board_id>/edit', methods=['GET', 'POST'])
 @admin_required
@@ -183,61 +415,106 @@ def edit_board(board_id):
     if request.method == 'POST':
         board.name = request.form.get('name')
         board.description = request.form.get('description')
-        board.owner_id = request.form.get('owner_id')
-
-        # Update board access
-        BoardAccess.query.filter_by(board_id=board.id).delete()
-
-        user_ids = request.form.getlist('user_ids')
-        for user_id in user_ids:
-            if int(user_id) != board.owner_id:
-                access = BoardAccess(
-                    board_id=board.id,
-                    user_id=user_id,
-                    can_edit=True,
-                    can_delete=False,
-                    granted_by_id=current_user.id
-                )
-                db.session.add(access)
-
+        old_owner_id = board.owner_id
+        board.owner_id = int(request.form.get('owner_id'))
+        if board.owner_id != old_owner_id:
+            # Both owners' effective access changes even though no grant row does
+            note_access_changed(board.id, [old_owner_id, board.owner_id])
+
+        # Only grants that were added or revoked are written
+        sync_board_access(board.id, board.owner_id, request.form.getlist('members'), current_user.id)
         db.session.commit()
         flash(f'Board "{board.name}" updated successfully!', 'success')
         return redirect(url_for('admin.manage_boards'))
 
-    users = User.query.order_by(User.username).all()
     current_access = BoardAccess.query.filter_by(board_id=board.id).all()
     user_ids_with_access = [access.user_id for access in current_access]
+    # Only the users already on the board are preloaded; others come from admin.search_users
+    users = User.query.filter(User.id.in_(user_ids_with_access + [board.owner_id]))\
+        .order_by(User.username).all()
 
     return render_template('edit_board.html',
+                         form=BoardForm(is_archived=not board.is_active),
                          board=board,
+                         counts=board_counts([board])[board.id],
                          users=users,
                          user_ids_with_access=user_ids_with_access)
 
+@admin_bp.route('/admin/boards/<int:board_id>/status', methods=['POST'])
+@admin_required
+def toggle_board_status(board_id):
+    """Archive or restore a board; posted by the board list and edit page"""
+    board = Board.query.get_or_404(board_id)
+    if board.pending_delete:
+        flash(f'Board "{board.name}" is being deleted.', 'info')
+        return redirect(url_for('admin.manage_boards'))
+
+    board.is_active = request.form.get('is_archived') != 'true'
+    db.session.commit()
+    flash(f'Board "{board.name}" {"restored" if board.is_active else "archived"}.', 'success')
+    return redirect(url_for('admin.manage_boards'))
+
 @admin_bp.route('/admin/boards/<int:board_id>/delete', methods=['POST'])
 @admin_required
 def delete_board(board_id):
     board = Board.query.get_or_404(board_id)
-    board_name = board.name
+    if board.pending_delete:
+        flash(f'Board "{board.name}" is already being deleted.', 'info')
+        return redirect(url_for('admin.manage_boards'))
 
-    db.session.delete(board)
+    # The board is hidden now; its tasks are removed in the background
+    job = request_purge(board, current_user.id)
     db.session.commit()
+    get_purge_worker().submit(job.id)
 
-    flash(f'Board "{board_name}" deleted successfully!', 'success')
+    flash(f'Board "{board.name}" is being deleted.', 'success')
     return redirect(url_for('admin.manage_boards'))
 
+@admin_bp.route('/admin/purges')
+@admin_required
+def purge_jobs():
+    """Progress of recent user and board deletions"""
+    jobs = PurgeJob.query.order_by(PurgeJob.id.desc()).limit(50).all()
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+@admin_bp.route('/admin/purges/<int:job_id>')
+@admin_required
+def purge_job(job_id):
+    return jsonify(PurgeJob.query.get_or_404(job_id).to_dict())
+
 @admin_bp.route('/admin/boards/<int:board_id>/access')
 @admin_required
 def manage_board_access(board_id):
-    board = Board.query.get_or_404(board_id)
-    access_list = BoardAccess.query.filter_by(board_id=board_id).all()
-    available_users = User.query.filter(
-        ~User.id.in_([access.user_id for access in access_list] + [board.owner_id])
-    ).all()
+    """
+    Board access manager
+
+    Grants are keyset-paginated by username, ?member= narrows them to
+    usernames starting with the term, and each grant's user and granter are
+    loaded in the same query. Users to add are looked up with
+    admin.search_users as the admin types.
+    """
+    board = Board.query.options(joinedload(Board.owner)).get_or_404(board_id)
+    member_search = request.args.get('member', '').strip()
+
+    query = BoardAccess.query.join(BoardAccess.user)\
+        .filter(BoardAccess.board_id == board_id)\
+        .options(contains_eager(BoardAccess.user), joinedload(BoardAccess.granted_by))
+    if member_search:
+        query = query.filter(_prefix_filter(User.username, member_search))
+    access_list, next_cursor = keyset_page(
+        query, [User.username, BoardAccess.id], request.args.get('cursor'),
+        page_size(request.args.get('per_page')), descending=False,
+        key=lambda access: [access.user.username, access.id]
+    )
+    member_count = db.session.query(func.count(BoardAccess.id))\
+        .filter(BoardAccess.board_id == board_id).scalar()
 
     return render_template('manage_board_access.html',
                          board=board,
                          access_list=access_list,
-                         available_users=available_users)
+                         next_cursor=next_cursor,
+                         member_search=member_search,
+                         member_count=member_count)
 
 @admin_bp.route('/admin/boards/<int:board_id>/access/add', methods=['POST'])
 @admin_required
@@ -264,6 +541,7 @@ def add_board_access(board_id):
             granted_by_id=current_user.id
         )
         db.session.add(access)
+        note_access_changed(board_id, [user_id])
         db.session.commit()
         flash('Access granted successfully!', 'success')
 
@@ -276,6 +554,7 @@ def remove_board_access(access_id):
     board_id = access.board_id
 
     db.session.delete(access)
+    note_access_changed(board_id, [access.user_id])
     db.session.commit()
     flash('Access removed successfully!', 'success')
 
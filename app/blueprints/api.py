@@ -1,92 +1,596 @@
-from flask import Blueprint, jsonify, request
+import csv
+import io
+from itertools import islice
+from flask import Blueprint, jsonify, request, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import case
+from sqlalchemy.exc import SQLAlchemyError
 from app import db
-from app.models import Task, Tag
+from app.models import Task, TaskArchive, Board, BoardAccess, TaskAudit, User
+from app.models.task import task_tags
+from app.utils.serializers import serialize_tasks, serialize_task, serialize_boards, serialize_archived_tasks
+from app.utils.tags import normalize_tag_names, resolve_tag_ids, get_or_create_tags
+from app.utils.audit import (
+    filter_audits, is_filterable_field, audit_matches, audit_timeline_query, audit_timeline_item, expand_history_items
+)
+from app.utils.pagination import keyset_page, page_size, encode_cursor, decode_cursor
+from app.services.audit_archive import iter_archived_audits
+from app.services.task_history import reconstruct_task, reconstruct_board
+from app.services.audit_capture import TRACKED_FIELDS, audit_inserted_tasks, audit_core_update
+from app.services.counters import adjust_counters
+from app.services.acl import user_acl, board_permissions, pending_board_ids
+from app.services.board_counters import add_task_delta, adjust_board_counts
+from app.services.task_archive import restore_archived_task
 from datetime import datetime
 
 api_bp = Blueprint('api', __name__)
 
+TASK_PRIORITIES = ('low', 'medium', 'high', 'urgent')
+TASK_STATUSES = ('pending', 'in_progress', 'completed', 'archived')
+
+def _writable_board_ids(board_ids):
+    """Return the subset of board_ids the current user may create tasks in"""
+    board_ids = set(board_ids)
+    if not board_ids:
+        return set()
+    if current_user.is_admin:
+        return {board_id for (board_id,) in db.session.query(Board.id).filter(
+            Board.id.in_(board_ids), Board.pending_delete.is_(False)
+        )}
+    acl = user_acl(current_user.id)
+    return {board_id for board_id in board_ids if board_id in acl and acl[board_id].can_edit}
+
 @api_bp.route('/tasks', methods=['GET'])
 @login_required
 def get_tasks():
-    tasks = Task.query.filter_by(user_id=current_user.id).all()
-    return jsonify([task.to_dict() for task in tasks])
+    """
+    The current user's tasks
+
+    ?include_archived=1 adds those moved to tasks_archive and answers with
+    {'items', 'next_cursor'} instead: the first page has every hot task and
+    the most recently moved archived ones, and later pages, fetched with
+    ?cursor= and ?limit=, continue through the archive.
+    """
+    include_archived = request.args.get('include_archived') == '1'
+    cursor = request.args.get('cursor') if include_archived else None
+    items = []
+    if not cursor:
+        task_ids = [task_id for (task_id,) in db.session.query(Task.id).filter_by(user_id=current_user.id)]
+        items = serialize_tasks(task_ids)
+    if not include_archived:
+        return jsonify(items)
+
+    query = db.session.query(TaskArchive.id, TaskArchive.moved_at).filter(TaskArchive.user_id == current_user.id)
+    rows, next_cursor = keyset_page(
+        query, [TaskArchive.moved_at, TaskArchive.id], cursor, page_size(request.args.get('limit'))
+    )
+    items.extend(serialize_archived_tasks([row.id for row in rows]))
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
+@api_bp.route('/tasks/<int:task_id>/restore', methods=['POST'])
+@login_required
+def restore_task(task_id):
+    """Bring a task back from tasks_archive so it can be edited again"""
+    archived = db.session.get(TaskArchive, task_id)
+    if archived is None:
+        return jsonify({'error': 'Task not found in the archive'}), 404
+    if archived.user_id != current_user.id and not board_permissions(current_user, archived.board_id).can_edit:
+        return jsonify({'error': 'Task not found in the archive'}), 404
+    if archived.board_id in pending_board_ids():
+        return jsonify({'error': 'The board is being deleted'}), 409
+
+    db.session.expunge(archived)
+    try:
+        restore_archived_task(task_id)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    db.session.commit()
+    return jsonify(serialize_task(task_id))
 
 @api_bp.route('/tasks/<int:task_id>', methods=['GET'])
 @login_required
 def get_task(task_id):
-    task = Task.query.filter_by(id=task_id, user_id=current_user.id).first_or_404()
-    return jsonify(task.to_dict())
+    Task.query.with_entities(Task.id).filter_by(id=task_id, user_id=current_user.id).first_or_404()
+    data = serialize_task(task_id)
+    response = jsonify(data)
+    response.set_etag(str(data['version']))
+    return response
 
 @api_bp.route('/tasks', methods=['POST'])
 @login_required
 def create_task():
     data = request.json
+    board_id = data.get('board_id')
+    if not isinstance(board_id, int) or board_id not in _writable_board_ids([board_id]):
+        return jsonify({'error': 'A board_id you can edit is required'}), 403
+
     task = Task(
         title=data.get('title'),
         description=data.get('description'),
         due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None,
         priority=data.get('priority', 'medium'),
         status=data.get('status', 'pending'),
-        user_id=current_user.id
+        user_id=current_user.id,
+        board_id=board_id
     )
 
     if data.get('tags'):
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            task.tags.append(tag)
+        task.tags = get_or_create_tags(data['tags'])
 
     db.session.add(task)
     db.session.commit()
 
-    return jsonify(task.to_dict()), 201
+    return jsonify(serialize_task(task)), 201
+
+def _read_bulk_rows():
+    """Read bulk task rows from a JSON array, an uploaded CSV file or a text/csv body"""
+    upload = request.files.get('file')
+    if upload is not None:
+        return list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('tasks')
+    if not isinstance(data, list):
+        return None
+    return data
+
+def _parse_bulk_row(raw):
+    """Validate one bulk row, returning (values, tag_names) or raising ValueError"""
+    if not isinstance(raw, dict):
+        raise ValueError('row must be an object')
+
+    title = str(raw.get('title') or '').strip()
+    if not title:
+        raise ValueError('title is required')
+    if len(title) > 200:
+        raise ValueError('title must be at most 200 characters')
+
+    try:
+        board_id = int(raw.get('board_id'))
+    except (TypeError, ValueError):
+        raise ValueError('board_id is required')
+
+    priority = raw.get('priority') or 'medium'
+    if priority not in TASK_PRIORITIES:
+        raise ValueError(f'invalid priority {priority!r}')
+
+    status = raw.get('status') or 'pending'
+    if status not in TASK_STATUSES:
+        raise ValueError(f'invalid status {status!r}')
+
+    due_date = None
+    if raw.get('due_date'):
+        try:
+            due_date = datetime.fromisoformat(raw['due_date'])
+        except (TypeError, ValueError):
+            raise ValueError(f'invalid due_date {raw["due_date"]!r}')
+
+    tag_names = normalize_tag_names(raw.get('tags'))
+    if any(len(name) > 50 for name in tag_names):
+        raise ValueError('tag names must be at most 50 characters')
+
+    now = datetime.utcnow()
+    values = {
+        'title': title,
+        'description': raw.get('description') or None,
+        'due_date': due_date,
+        'priority': priority,
+        'status': status,
+        'user_id': current_user.id,
+        'board_id': board_id,
+        'created_at': now,
+        'updated_at': now,
+        'completed_at': now if status == 'completed' else None,
+        'archived_at': now if status == 'archived' else None,
+        'ai_generated_description': False
+    }
+    return values, tag_names
+
+@api_bp.route('/tasks/bulk', methods=['POST'])
+@login_required
+def bulk_create_tasks():
+    """
+    Create many tasks from a JSON array or CSV upload
+
+    Rows are validated up front, board access is checked once per board and
+    tags are resolved in bulk. Tasks and task_tags rows are then inserted with
+    executemany in chunks, each chunk committed on its own, so a bad row or a
+    failing chunk is reported without aborting the rest of the load.
+    """
+    raw_rows = _read_bulk_rows()
+    if raw_rows is None:
+        return jsonify({'error': 'Expected a JSON array of tasks or a CSV file'}), 400
+
+    max_rows = current_app.config.get('BULK_TASK_MAX_ROWS', 50000)
+    if len(raw_rows) > max_rows:
+        return jsonify({'error': f'At most {max_rows} rows can be imported at once'}), 413
+
+    errors = []
+    parsed = []
+    for row_number, raw in enumerate(raw_rows, start=1):
+        try:
+            values, tag_names = _parse_bulk_row(raw)
+        except ValueError as e:
+            errors.append({'row': row_number, 'error': str(e)})
+            continue
+        parsed.append((row_number, values, tag_names))
+
+    writable = _writable_board_ids({values['board_id'] for _, values, _ in parsed})
+    accepted = []
+    for row_number, values, tag_names in parsed:
+        if values['board_id'] in writable:
+            accepted.append((row_number, values, tag_names))
+        else:
+            errors.append({'row': row_number, 'error': f'no edit access to board {values["board_id"]}'})
+
+    tag_ids = {}
+    if accepted:
+        try:
+            tag_ids = resolve_tag_ids(name for _, _, names in accepted for name in names)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonify({'error': f'Could not resolve tags: {e.__class__.__name__}'}), 500
+
+    chunk_size = current_app.config.get('BULK_TASK_CHUNK_SIZE', 1000)
+    insert_tasks = Task.__table__.insert().returning(Task.__table__.c.id, sort_by_parameter_order=True)
+    created_ids = []
+    for start in range(0, len(accepted), chunk_size):
+        chunk = accepted[start:start + chunk_size]
+        try:
+            new_ids = db.session.execute(insert_tasks, [values for _, values, _ in chunk]).scalars().all()
+            links = [
+                {'task_id': task_id, 'tag_id': tag_ids[name]}
+                for task_id, (_, _, names) in zip(new_ids, chunk)
+                for name in names
+            ]
+            if links:
+                db.session.execute(task_tags.insert(), links)
+            # Core inserts bypass the flush listeners, so the chunk is audited and counted explicitly
+            audit_inserted_tasks(db.session, [
+                (task_id, values, names) for task_id, (_, values, names) in zip(new_ids, chunk)
+            ])
+            adjust_counters(db.session, {'tasks': len(new_ids)})
+            board_deltas = {}
+            for _, values, _ in chunk:
+                add_task_delta(board_deltas, values['board_id'], values['status'], 1)
+            adjust_board_counts(db.session, board_deltas)
+            db.session.commit()
+            created_ids.extend(new_ids)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            errors.extend(
+                {'row': row_number, 'error': f'insert failed: {e.__class__.__name__}'}
+                for row_number, _, _ in chunk
+            )
+
+    errors.sort(key=lambda error: error['row'])
+    return jsonify({
+        'created': len(created_ids),
+        'failed': len(errors),
+        'task_ids': created_ids,
+        'errors': errors
+    }), 201 if created_ids else 400
 
 @api_bp.route('/tasks/<int:task_id>', methods=['PUT'])
 @login_required
 def update_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=current_user.id).first_or_404()
+    if task.board_id in pending_board_ids():
+        return jsonify({'error': 'The board is being deleted'}), 409
     data = request.json
+    # Resolved up front so the whole edit reaches the audit trail in one flush
+    tags = get_or_create_tags(data['tags']) if 'tags' in data else None
 
-    task.title = data.get('title', task.title)
-    task.description = data.get('description', task.description)
-    task.priority = data.get('priority', task.priority)
+    # Assigning tags lazy-loads the old collection; that load must not flush the edits above it
+    with db.session.no_autoflush:
+        task.title = data.get('title', task.title)
+        task.description = data.get('description', task.description)
+        task.priority = data.get('priority', task.priority)
 
-    if 'due_date' in data:
-        task.due_date = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
+        if 'due_date' in data:
+            task.due_date = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
+
+        if 'status' in data:
+            old_status = task.status
+            task.status = data['status']
+            if old_status != 'completed' and task.status == 'completed':
+                task.completed_at = datetime.utcnow()
+            elif old_status == 'completed' and task.status != 'completed':
+                task.completed_at = None
+
+        if tags is not None:
+            task.tags = tags
+
+    db.session.commit()
+    return jsonify(serialize_task(task_id))
+
+def _requested_version(data):
+    """Read the expected task version from If-Match, falling back to a 'version' body field"""
+    for etag in request.if_match.as_set(include_weak=True):
+        if etag.isdigit():
+            return int(etag)
+    version = data.get('version')
+    if isinstance(version, int):
+        return version
+    return None
 
+@api_bp.route('/tasks/<int:task_id>', methods=['PATCH'])
+@login_required
+def patch_task(task_id):
+    """
+    Apply only the supplied fields as one conditional UPDATE
+
+    The expected version comes from If-Match (or a 'version' field). The row is
+    only updated when it still has that version, and the response carries the
+    changed fields, or nothing at all when the client sends Prefer: return=minimal.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+
+    expected_version = _requested_version(data)
+    if expected_version is None:
+        return jsonify({'error': 'If-Match with the task version is required'}), 428
+
+    values = {}
+    changed = {}
+    if 'title' in data:
+        title = str(data['title'] or '').strip()
+        if not title or len(title) > 200:
+            return jsonify({'error': 'title must be 1-200 characters'}), 400
+        values['title'] = changed['title'] = title
+    if 'description' in data:
+        if data['description'] is not None and not isinstance(data['description'], str):
+            return jsonify({'error': 'description must be a string or null'}), 400
+        values['description'] = changed['description'] = data['description']
+    if 'priority' in data:
+        if data['priority'] not in TASK_PRIORITIES:
+            return jsonify({'error': f'invalid priority {data["priority"]!r}'}), 400
+        values['priority'] = changed['priority'] = data['priority']
+    if 'due_date' in data:
+        try:
+            values['due_date'] = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
+        except (TypeError, ValueError):
+            return jsonify({'error': f'invalid due_date {data["due_date"]!r}'}), 400
+        changed['due_date'] = values['due_date'].isoformat() if values['due_date'] else None
     if 'status' in data:
-        old_status = task.status
-        task.status = data['status']
-        if old_status != 'completed' and task.status == 'completed':
-            task.completed_at = datetime.utcnow()
-        elif old_status == 'completed' and task.status != 'completed':
-            task.completed_at = None
-
-    if 'tags' in data:
-        # Clear existing tags by removing all associations
-        for tag in list(task.tags):
-            task.tags.remove(tag)
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            task.tags.append(tag)
+        if data['status'] not in TASK_STATUSES:
+            return jsonify({'error': f'invalid status {data["status"]!r}'}), 400
+        values['status'] = changed['status'] = data['status']
+        if data['status'] == 'completed':
+            # Keep the original completion time when the task was already completed
+            values['completed_at'] = case(
+                (Task.__table__.c.status == 'completed', Task.__table__.c.completed_at),
+                else_=datetime.utcnow()
+            )
+        else:
+            values['completed_at'] = None
+        if data['status'] == 'archived':
+            values['archived_at'] = case(
+                (Task.__table__.c.status == 'archived', Task.__table__.c.archived_at),
+                else_=datetime.utcnow()
+            )
+        else:
+            values['archived_at'] = None
+
+    if not values:
+        return jsonify({'error': 'No updatable fields supplied'}), 400
+
+    table = Task.__table__
+    # Core updates bypass the flush listeners; read the old values of just the
+    # patched columns so the change can be audited. The version guard below
+    # ensures they are still current when the UPDATE applies.
+    audited = [name for name in values if name not in ('completed_at', 'archived_at')]
+    guard = (table.c.id == task_id, table.c.user_id == current_user.id, table.c.version == expected_version)
+    old_row = db.session.execute(
+        db.select(table.c.board_id, *[table.c[name] for name in audited]).where(*guard)
+    ).first()
+    if old_row is not None and old_row.board_id in pending_board_ids():
+        return jsonify({'error': 'The board is being deleted'}), 409
+
+    row = None
+    if old_row is not None:
+        values['updated_at'] = datetime.utcnow()
+        values['version'] = table.c.version + 1
+        statement = table.update()\
+            .where(*guard)\
+            .values(**values)\
+            .returning(table.c.version, table.c.updated_at, table.c.completed_at, table.c.board_id)
+        row = db.session.execute(statement).first()
+
+    # Either read can miss: the task is gone, isn't the user's, or moved past the expected version
+    if row is None:
+        db.session.rollback()
+        current = db.session.query(Task.version).filter_by(id=task_id, user_id=current_user.id).scalar()
+        if current is None:
+            return jsonify({'error': 'Task not found'}), 404
+        response = jsonify({'error': 'Task was modified by someone else', 'version': current})
+        response.status_code = 412
+        response.set_etag(str(current))
+        return response
 
+    audit_core_update(
+        db.session, task_id, current_user.id,
+        {name: old_row._mapping[name] for name in audited},
+        {name: values[name] for name in audited}, row.version
+    )
+    if 'status' in values:
+        board_deltas = {}
+        add_task_delta(board_deltas, row.board_id, old_row.status, -1)
+        add_task_delta(board_deltas, row.board_id, values['status'], 1)
+        adjust_board_counts(db.session, board_deltas)
     db.session.commit()
-    return jsonify(task.to_dict())
+
+    if 'return=minimal' in request.headers.get('Prefer', ''):
+        response = current_app.response_class(status=204)
+    else:
+        changed['id'] = task_id
+        changed['version'] = row.version
+        changed['updated_at'] = row.updated_at.isoformat()
+        if 'status' in data:
+            changed['completed_at'] = row.completed_at.isoformat() if row.completed_at else None
+        response = jsonify(changed)
+    response.set_etag(str(row.version))
+    return response
 
 @api_bp.route('/tasks/<int:task_id>', methods=['DELETE'])
 @login_required
 def delete_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=current_user.id).first_or_404()
+    if task.board_id in pending_board_ids():
+        return jsonify({'error': 'The board is being deleted'}), 409
     db.session.delete(task)
     db.session.commit()
     return '', 204
 
+@api_bp.route('/tasks/<int:task_id>/history', methods=['GET'])
+@login_required
+def task_history(task_id):
+    """
+    Keyset-paginated audit timeline for one task, newest first
+
+    Query args: cursor, limit, action, user_id and field. Once the live
+    table runs out the timeline continues into the archived months, unless
+    include_archived=0 is passed.
+    """
+    task = Task.query.get_or_404(task_id)
+    if task.user_id != current_user.id and not task.board.has_access(current_user):
+        return jsonify({'error': 'Task not found'}), 404
+
+    limit = page_size(request.args.get('limit'))
+    filters = {
+        'action': request.args.get('action'),
+        'user_id': request.args.get('user_id', type=int),
+        'field': request.args.get('field')
+    }
+    if not is_filterable_field(filters['field']):
+        return jsonify({'error': f'field must be one of {", ".join(TRACKED_FIELDS)}'}), 400
+    cursor = request.args.get('cursor')
+
+    # Archive cursors are marked so the next request skips the live table
+    in_archive = bool(cursor) and cursor.startswith('a.')
+    rows, next_cursor = [], None
+    if not in_archive:
+        query = filter_audits(audit_timeline_query().filter(TaskAudit.task_id == task_id), **filters)
+        rows, next_cursor = keyset_page(
+            query, [TaskAudit.timestamp, TaskAudit.id], cursor, limit,
+            key=lambda row: [row[0].timestamp, row[0].id]
+        )
+    items = [audit_timeline_item(audit, username) for audit, username in rows]
+    audits = [audit for audit, _ in rows]
+    page = []
+
+    if next_cursor is None and request.args.get('include_archived') != '0' and len(items) < limit:
+        if in_archive:
+            position = decode_cursor(cursor[2:])
+        elif rows:
+            position = [rows[-1][0].timestamp, rows[-1][0].id]
+        else:
+            position = decode_cursor(cursor)
+        # Rows still live after an interrupted archive run sort at or after position, so they aren't repeated
+        archived = (
+            audit for audit in iter_archived_audits(task_id)
+            if (position is None or [audit.timestamp, audit.id] < position)
+            and audit_matches(audit, **filters)
+        )
+        remaining = limit - len(items)
+        # One extra row tells whether another page follows; older months stay unread
+        page = list(islice(archived, remaining + 1))
+        page, more = page[:remaining], len(page) > remaining
+        usernames = dict(db.session.query(User.id, User.username)
+                         .filter(User.id.in_({audit.user_id for audit in page})).all()) if page else {}
+        items.extend(audit_timeline_item(audit, usernames.get(audit.user_id)) for audit in page)
+        audits.extend(page)
+        if more:
+            next_cursor = 'a.' + encode_cursor([page[-1].timestamp, page[-1].id])
+
+    if audits:
+        expand_history_items(task, audits, items, archived=in_archive or bool(page))
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
+def _board_items(board_ids):
+    """Serialized boards with the current user's capabilities on each"""
+    items = serialize_boards(board_ids)
+    for item in items:
+        item['capabilities'] = board_permissions(current_user, item['id'])._asdict()
+    return items
+
+def _conditional_json(payload):
+    """JSON response with a content ETag, answered with 304 when If-None-Match matches"""
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+@api_bp.route('/boards', methods=['GET'])
+@login_required
+def list_boards():
+    """
+    Boards the current user can see, newest first
+
+    Keyset-paginated with ?cursor= and ?limit=. A page costs a fixed number
+    of queries whatever its size: one for the page of ids, the batched
+    serializer's lookups and the cached ACL for capabilities. Responses
+    carry an ETag so unchanged pages come back as 304.
+    """
+    query = db.session.query(Board.id, Board.created_at)\
+        .filter(Board.is_active.is_(True), Board.pending_delete.is_(False))
+    if not current_user.is_admin:
+        shared = db.exists().where(BoardAccess.board_id == Board.id, BoardAccess.user_id == current_user.id)
+        query = query.filter(db.or_(Board.owner_id == current_user.id, shared))
+
+    rows, next_cursor = keyset_page(
+        query, [Board.created_at, Board.id], request.args.get('cursor'), page_size(request.args.get('limit'))
+    )
+    return _conditional_json({'items': _board_items([row.id for row in rows]), 'next_cursor': next_cursor})
+
+@api_bp.route('/boards/<int:board_id>', methods=['GET'])
+@login_required
+def get_board(board_id):
+    board = db.session.get(Board, board_id)
+    if board is None or board.pending_delete or not board.has_access(current_user):
+        return jsonify({'error': 'Board not found'}), 404
+    return _conditional_json(_board_items([board_id])[0])
+
+def _as_of_arg():
+    try:
+        return datetime.fromisoformat(request.args.get('at', ''))
+    except ValueError:
+        return None
+
+@api_bp.route('/tasks/<int:task_id>/as-of', methods=['GET'])
+@login_required
+def task_as_of(task_id):
+    """Task state at ?at=<ISO timestamp>, rebuilt from the nearest snapshot plus audits"""
+    at = _as_of_arg()
+    if at is None:
+        return jsonify({'error': 'at must be an ISO 8601 timestamp'}), 400
+
+    task = Task.query.get(task_id)
+    if task is not None and task.user_id != current_user.id and not task.board.has_access(current_user):
+        return jsonify({'error': 'Task not found'}), 404
+
+    state = reconstruct_task(task_id, at)
+    if state is None or (task is None and not current_user.is_admin):
+        return jsonify({'error': 'Task did not exist at that time'}), 404
+    return jsonify({'as_of': at.isoformat(), 'task': state})
+
+@api_bp.route('/boards/<int:board_id>/as-of', methods=['GET'])
+@login_required
+def board_as_of(board_id):
+    """Every task on a board at ?at=<ISO timestamp>"""
+    at = _as_of_arg()
+    if at is None:
+        return jsonify({'error': 'at must be an ISO 8601 timestamp'}), 400
+
+    board = Board.query.get_or_404(board_id)
+    if not board.has_access(current_user):
+        return jsonify({'error': 'Board not found'}), 404
+    return jsonify({'as_of': at.isoformat(), 'board_id': board_id, 'tasks': reconstruct_board(board_id, at)})
+
 @api_bp.route('/tasks/stats', methods=['GET'])
 @login_required
 def get_stats():
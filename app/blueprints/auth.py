@@ -50,8 +50,9 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(username=form.username.data).first()
+        user = User.query.filter_by(username=form.username.data, pending_delete=False).first()
         if user and user.check_password(form.password.data):
+            db.session.commit()  # persists a rehashed password
             login_user(user, remember=form.remember_me.data)
             flash(f'Welcome back, {user.username}!', 'success')
             next_page = request.args.get('next')
@@ -90,8 +90,7 @@ def dashboard():
         team_members.update(board.get_users_with_access())
 
     # Remove current user from team members
-    team_members.discard(current_user)
-    team_members = list(team_members)[:8]  # Limit to 8 members
+    team_members = [member for member in team_members if member.id != current_user.id][:8]  # Limit to 8 members
 
     # Get recent activity (tasks created/updated in last 7 days)
     week_ago = datetime.utcnow() - timedelta(days=7)
@@ -159,8 +158,8 @@ def boards():
     # Get board statistics
     board_stats = {}
     for board in boards:
-        task_count = board.tasks.count()
-        completed_count = board.tasks.filter_by(status='completed').count()
+        task_count = board.task_count
+        completed_count = board.completed_count
         board_stats[board.id] = {
             'total_tasks': task_count,
             'completed_tasks': completed_count,
@@ -245,7 +244,6 @@ def teams():
         team_members.update(board.get_users_with_access())
 
     # Remove current user from team members
-    team_members.discard(current_user)
-    team_members = list(team_members)
+    team_members = [member for member in team_members if member.id != current_user.id]
 
     return render_template('teams.html', user_boards=user_boards, team_members=team_members)
\ No newline at end of file
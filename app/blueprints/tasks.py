@@ -5,8 +5,8 @@ from wtforms import StringField, TextAreaField, DateTimeField, SelectField, Subm
 from wtforms.validators import DataRequired, Length, Optional
 from datetime import datetime
 from app import db
-from app.models import Task, Tag, Board, BoardAccess
-from app.utils.audit import log_task_creation, compare_task_changes, log_task_archive, log_task_deletion
+from app.models import Task, Board, BoardAccess
+from app.utils.tags import get_or_create_tags
 
 tasks_bp = Blueprint('tasks', __name__)
 
@@ -42,12 +42,13 @@ def list_tasks():
 
     # Get boards accessible to the current user
     if current_user.is_admin:
-        accessible_boards = Board.query.filter_by(is_active=True).all()
+        accessible_boards = Board.query.filter_by(is_active=True, pending_delete=False).all()
     else:
         # Get boards owned by user or shared with user
-        owned_boards = Board.query.filter_by(owner_id=current_user.id, is_active=True)
+        owned_boards = Board.query.filter_by(owner_id=current_user.id, is_active=True, pending_delete=False)
         shared_board_ids = db.session.query(BoardAccess.board_id).filter_by(user_id=current_user.id).subquery()
-        shared_boards = Board.query.filter(Board.id.in_(shared_board_ids), Board.is_active == True)
+        shared_boards = Board.query.filter(Board.id.in_(shared_board_ids), Board.is_active == True,
+                                           Board.pending_delete == False)
         accessible_boards = owned_boards.union(shared_boards).all()
 
     # Start with base query - tasks in accessible boards
@@ -110,14 +111,15 @@ def create():
 
     # Get boards accessible to the current user for the dropdown
     if current_user.is_admin:
-        accessible_boards = Board.query.filter_by(is_active=True).all()
+        accessible_boards = Board.query.filter_by(is_active=True, pending_delete=False).all()
     else:
         # Get boards owned by user or shared with user (with edit permission)
-        owned_boards = Board.query.filter_by(owner_id=current_user.id, is_active=True)
+        owned_boards = Board.query.filter_by(owner_id=current_user.id, is_active=True, pending_delete=False)
         shared_board_ids = db.session.query(BoardAccess.board_id).filter_by(
             user_id=current_user.id, can_edit=True
         ).subquery()
-        shared_boards = Board.query.filter(Board.id.in_(shared_board_ids), Board.is_active == True)
+        shared_boards = Board.query.filter(Board.id.in_(shared_board_ids), Board.is_active == True,
+                                           Board.pending_delete == False)
         accessible_boards = owned_boards.union(shared_boards).all()
 
     # Populate board choices - ensure we have boards before proceeding
@@ -145,14 +147,11 @@ def create():
             return render_template('tasks/glass_form.html', form=form, title='Create Task')
 
         # Verify user has edit permission for this board
-        if not current_user.is_admin and selected_board.owner_id != current_user.id:
-            board_access = BoardAccess.query.filter_by(
-                board_id=selected_board.id, user_id=current_user.id
-            ).first()
-            if not board_access or not board_access.can_edit:
-                flash('You do not have permission to create tasks in this board.', 'error')
-                return render_template('tasks/glass_form.html', form=form, title='Create Task')
+        if not selected_board.permissions_for(current_user).can_edit:
+            flash('You do not have permission to create tasks in this board.', 'error')
+            return render_template('tasks/glass_form.html', form=form, title='Create Task')
 
+        tags = get_or_create_tags(form.tags.data) if form.tags.data else []
         task = Task(
             title=form.title.data,
             description=form.description.data,
@@ -160,22 +159,10 @@ def create():
             priority=form.priority.data,
             status=form.status.data,
             user_id=current_user.id,
-            board_id=form.board_id.data
+            board_id=form.board_id.data,
+            tags=tags
         )
-
-        # Add task to session first
         db.session.add(task)
-
-        if form.tags.data:
-            tag_names = [t.strip() for t in form.tags.data.split(',') if t.strip()]
-            for tag_name in tag_names:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                task.tags.append(tag)
-        db.session.flush()  # Flush to get the task ID
-        log_task_creation(task)
         db.session.commit()
         flash('Task created successfully!', 'success')
         return redirect(url_for('tasks.list_tasks', board_id=form.board_id.data))
@@ -192,26 +179,23 @@ def edit(task_id):
         return redirect(url_for('tasks.list_tasks'))
 
     # Check edit permissions
-    if not current_user.is_admin and task.board.owner_id != current_user.id:
-        board_access = BoardAccess.query.filter_by(
-            board_id=task.board_id, user_id=current_user.id
-        ).first()
-        if not board_access or not board_access.can_edit:
-            flash('You do not have permission to edit this task.', 'error')
-            return redirect(url_for('tasks.list_tasks'))
+    if not task.board.permissions_for(current_user).can_edit:
+        flash('You do not have permission to edit this task.', 'error')
+        return redirect(url_for('tasks.list_tasks'))
 
     form = TaskForm(obj=task)
 
     # Get boards accessible to the current user for the dropdown
     if current_user.is_admin:
-        accessible_boards = Board.query.filter_by(is_active=True).all()
+        accessible_boards = Board.query.filter_by(is_active=True, pending_delete=False).all()
     else:
         # Get boards owned by user or shared with user (with edit permission)
-        owned_boards = Board.query.filter_by(owner_id=current_user.id, is_active=True)
+        owned_boards = Board.query.filter_by(owner_id=current_user.id, is_active=True, pending_delete=False)
         shared_board_ids = db.session.query(BoardAccess.board_id).filter_by(
             user_id=current_user.id, can_edit=True
         ).subquery()
-        shared_boards = Board.query.filter(Board.id.in_(shared_board_ids), Board.is_active == True)
+        shared_boards = Board.query.filter(Board.id.in_(shared_board_ids), Board.is_active == True,
+                                           Board.pending_delete == False)
         accessible_boards = owned_boards.union(shared_boards).all()
 
     # Populate board choices
@@ -226,23 +210,12 @@ def edit(task_id):
                 return render_template('tasks/glass_form.html', form=form, title='Edit Task')
 
             # Verify user has edit permission for the new board
-            if not current_user.is_admin and new_board.owner_id != current_user.id:
-                board_access = BoardAccess.query.filter_by(
-                    board_id=new_board.id, user_id=current_user.id
-                ).first()
-                if not board_access or not board_access.can_edit:
-                    flash('You do not have permission to move tasks to this board.', 'error')
-                    return render_template('tasks/glass_form.html', form=form, title='Edit Task')
-
-        # Capture old values for audit
-        old_task_data = {
-            'title': task.title,
-            'description': task.description,
-            'due_date': task.due_date,
-            'priority': task.priority,
-            'status': task.status,
-            'board_id': task.board_id
-        }
+            if not new_board.permissions_for(current_user).can_edit:
+                flash('You do not have permission to move tasks to this board.', 'error')
+                return render_template('tasks/glass_form.html', form=form, title='Edit Task')
+
+        # Resolved before any field changes so the edit is flushed, and audited, as one row
+        tags = get_or_create_tags(form.tags.data) if form.tags.data else []
 
         task.title = form.title.data
         task.description = form.description.data
@@ -258,31 +231,7 @@ def edit(task_id):
         elif old_status == 'completed' and task.status != 'completed':
             task.completed_at = None
 
-        # Capture new values for audit
-        new_task_data = {
-            'title': task.title,
-            'description': task.description,
-            'due_date': task.due_date,
-            'priority': task.priority,
-            'status': task.status,
-            'board_id': task.board_id
-        }
-
-        # Clear existing tags by removing all associations
-        task.tags = []
-
-        if form.tags.data:
-            tag_names = [t.strip() for t in form.tags.data.split(',') if t.strip()]
-            for tag_name in tag_names:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                task.tags.append(tag)
-
-        # Log audit trail for changes
-        compare_task_changes(old_task_data, new_task_data, task)
-
+        task.tags = tags
         db.session.commit()
         flash('Task updated successfully!', 'success')
         return redirect(url_for('tasks.list_tasks', board_id=task.board_id))
@@ -302,16 +251,11 @@ def delete(task_id):
         return redirect(url_for('tasks.list_tasks'))
 
     # Check delete permissions
-    if not current_user.is_admin and task.board.owner_id != current_user.id:
-        board_access = BoardAccess.query.filter_by(
-            board_id=task.board_id, user_id=current_user.id
-        ).first()
-        if not board_access or not board_access.can_delete:
-            flash('You do not have permission to delete this task.', 'error')
-            return redirect(url_for('tasks.list_tasks'))
+    if not task.board.permissions_for(current_user).can_delete:
+        flash('You do not have permission to delete this task.', 'error')
+        return redirect(url_for('tasks.list_tasks'))
 
     board_id = task.board_id
-    log_task_deletion(task)
     db.session.delete(task)
     db.session.commit()
     flash('Task deleted successfully!', 'success')
@@ -327,13 +271,9 @@ def toggle_complete(task_id):
         return redirect(url_for('tasks.list_tasks'))
 
     # Check edit permissions
-    if not current_user.is_admin and task.board.owner_id != current_user.id:
-        board_access = BoardAccess.query.filter_by(
-            board_id=task.board_id, user_id=current_user.id
-        ).first()
-        if not board_access or not board_access.can_edit:
-            flash('You do not have permission to modify this task.', 'error')
-            return redirect(url_for('tasks.list_tasks'))
+    if not task.board.permissions_for(current_user).can_edit:
+        flash('You do not have permission to modify this task.', 'error')
+        return redirect(url_for('tasks.list_tasks'))
 
     if task.status == 'completed':
         task.status = 'pending'
@@ -359,16 +299,11 @@ def archive(task_id):
         return redirect(url_for('tasks.list_tasks'))
 
     # Check edit permissions
-    if not current_user.is_admin and task.board.owner_id != current_user.id:
-        board_access = BoardAccess.query.filter_by(
-            board_id=task.board_id, user_id=current_user.id
-        ).first()
-        if not board_access or not board_access.can_edit:
-            flash('You do not have permission to archive this task.', 'error')
-            return redirect(url_for('tasks.list_tasks'))
+    if not task.board.permissions_for(current_user).can_edit:
+        flash('You do not have permission to archive this task.', 'error')
+        return redirect(url_for('tasks.list_tasks'))
 
     task.status = 'archived'
-    log_task_archive(task)
     db.session.commit()
 
     flash('Task archived!', 'success')
@@ -1,7 +1,10 @@
 from app import db
 from .user import User
-from .task import Task, Tag
+from .task import Task, Tag, TaskArchive
 from .board import Board, BoardAccess
-from .audit import TaskAudit
+from .audit import TaskAudit, AuditUserAgent, AuditIpAddress, TaskSnapshot
+from .purge import PurgeJob
+from .user_import import UserImportJob
+from .counter import Counter
 
-__all__ = ['db', 'User', 'Task', 'Tag', 'Board', 'BoardAccess', 'TaskAudit']
\ No newline at end of file
+__all__ = ['db', 'User', 'Task', 'Tag', 'TaskArchive', 'Board', 'BoardAccess', 'TaskAudit', 'AuditUserAgent', 'AuditIpAddress', 'TaskSnapshot', 'PurgeJob', 'UserImportJob', 'Counter']
\ No newline at end of file
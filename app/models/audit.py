@@ -5,19 +5,44 @@ class TaskAudit(db.Model):
     __tablename__ = 'task_audits'
 
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    task_id = db.Column(db.Integer, nullable=False)  # no FK: the trail outlives deleted tasks
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action = db.Column(db.String(50), nullable=False)  # created, updated, completed, archived, deleted
     field_name = db.Column(db.String(50))  # field that was changed (for updates)
     old_value = db.Column(db.Text)  # old value
     new_value = db.Column(db.Text)  # new value
+    changes = db.Column(db.Text)  # compact JSON diff of every field changed in one edit
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    ip_address = db.Column(db.String(45))  # support IPv6
-    user_agent = db.Column(db.Text)
+    ip_address = db.Column(db.String(45))  # legacy rows only, new rows use ip_address_id
+    user_agent = db.Column(db.Text)  # legacy rows only, new rows use user_agent_id
+    ip_address_id = db.Column(db.Integer, db.ForeignKey('audit_ip_addresses.id'))
+    user_agent_id = db.Column(db.Integer, db.ForeignKey('audit_user_agents.id'))
 
     # Relationships
-    task = db.relationship('Task', backref='audit_logs')
+    task = db.relationship(
+        'Task',
+        primaryjoin='foreign(TaskAudit.task_id) == Task.id',
+        backref=db.backref('audit_logs', lazy='dynamic', passive_deletes='all')
+    )
     user = db.relationship('User', backref='audit_actions')
+    ip_address_ref = db.relationship('AuditIpAddress', lazy='joined')
+    user_agent_ref = db.relationship('AuditUserAgent', lazy='joined')
+
+    # Timeline indexes matching the (timestamp, id) keyset order of the history views;
+    # ids are never reused, so archived rows can't collide with newer live ones
+    __table_args__ = (
+        db.Index('ix_task_audits_task_timeline', 'task_id', 'timestamp', 'id'),
+        db.Index('ix_task_audits_timeline', 'timestamp', 'id'),
+        db.Index('ix_task_audits_user_timeline', 'user_id', 'timestamp', 'id'),
+        db.Index('ix_task_audits_action_timeline', 'action', 'timestamp', 'id'),
+        {'sqlite_autoincrement': True}
+    )
+
+    def get_ip_address(self):
+        return self.ip_address_ref.value if self.ip_address_ref else self.ip_address
+
+    def get_user_agent(self):
+        return self.user_agent_ref.value if self.user_agent_ref else self.user_agent
 
     def to_dict(self):
         return {
@@ -28,15 +53,30 @@ class TaskAudit(db.Model):
             'field_name': self.field_name,
             'old_value': self.old_value,
             'new_value': self.new_value,
+            'changes': self.get_changes(),
             'timestamp': self.timestamp.isoformat(),
-            'ip_address': self.ip_address,
-            'user_agent': self.user_agent
+            'ip_address': self.get_ip_address(),
+            'user_agent': self.get_user_agent()
         }
 
+    def get_changes(self):
+        """Decoded {field: [old, new] or delta} for compact update rows"""
+        from app.utils.audit_diff import decode_changes
+        return decode_changes(self.changes)
+
     def get_description(self):
         """Get a human-readable description of the audit entry"""
         if self.action == 'created':
             return f"Task created"
+        elif self.action == 'updated' and self.changes:
+            from app.utils.audit_diff import describe_change, describe_delta
+            descriptions = []
+            for field, change in self.get_changes().items():
+                if isinstance(change, list):
+                    descriptions.append(describe_change(field, *change))
+                else:
+                    descriptions.append(describe_delta(field, change))
+            return '; '.join(descriptions)
         elif self.action == 'updated' and self.field_name:
             return f"Changed {self.field_name.replace('_', ' ')} from '{self.old_value}' to '{self.new_value}'"
         elif self.action == 'completed':
@@ -49,4 +89,48 @@ class TaskAudit(db.Model):
             return f"Action: {self.action}"
 
     def __repr__(self):
-        return f'<TaskAudit {self.action} on Task {self.task_id}>'
\ No newline at end of file
+        return f'<TaskAudit {self.action} on Task {self.task_id}>'
+
+
+class AuditUserAgent(db.Model):
+    """Distinct user agent strings referenced by audit rows"""
+    __tablename__ = 'audit_user_agents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    value_hash = db.Column(db.String(40), unique=True, nullable=False)  # sha1 of value, indexable on any backend
+    value = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<AuditUserAgent {self.id}>'
+
+
+class AuditIpAddress(db.Model):
+    """Distinct client addresses referenced by audit rows"""
+    __tablename__ = 'audit_ip_addresses'
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.String(45), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<AuditIpAddress {self.value}>'
+
+
+
+class TaskSnapshot(db.Model):
+    """Full task state captured periodically so history replay starts close to any point in time"""
+    __tablename__ = 'task_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)  # no FK: snapshots outlive deleted tasks
+    board_id = db.Column(db.Integer)
+    version = db.Column(db.Integer)
+    taken_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    state = db.Column(db.Text, nullable=False)  # JSON of the tracked fields, board_id and tags
+
+    __table_args__ = (
+        db.Index('ix_task_snapshots_task_taken', 'task_id', 'taken_at'),
+        db.Index('ix_task_snapshots_board_taken', 'board_id', 'taken_at'),
+    )
+
+    def __repr__(self):
+        return f'<TaskSnapshot task={self.task_id} at {self.taken_at}>'
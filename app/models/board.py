@@ -9,21 +9,37 @@ class Board(db.Model):
     description = db.Column(db.Text)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    pending_delete = db.Column(db.Boolean, default=False, nullable=False, server_default='0')  # set while a purge job removes the board
+    # Maintained on write by app.services.board_counters; open means pending or in progress
+    task_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    completed_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    open_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     tasks = db.relationship('Task', backref='board', lazy='dynamic', cascade='all, delete-orphan')
     board_access = db.relationship('BoardAccess', backref='board', lazy='dynamic', cascade='all, delete-orphan')
 
+    # Matches the newest-first scans of the admin board list and activity feed
+    __table_args__ = (
+        db.Index('ix_boards_created_timeline', 'created_at', 'id'),
+    )
+
     def has_access(self, user):
-        if user.is_admin:
-            return True
+        return self.permissions_for(user).can_view
+
+    def permissions_for(self, user):
+        """
+        user's BoardPermissions (can_view, can_edit, can_delete) on this board
+
+        Read from the user's ACL map, built with one query and cached across
+        requests, so repeated checks don't query board_access. A board
+        pending deletion is read-only for everyone.
+        """
+        from app.services.acl import board_permissions, FULL_ACCESS, READ_ONLY
         if self.owner_id == user.id:
-            return True
-        return BoardAccess.query.filter_by(
-            board_id=self.id,
-            user_id=user.id
-        ).first() is not None
+            return READ_ONLY if self.pending_delete else FULL_ACCESS
+        return board_permissions(user, self.id)
 
     def get_users_with_access(self):
         users = []
@@ -34,16 +50,19 @@ class Board(db.Model):
         return users
 
     def to_dict(self):
+        # Built from this instance; lists go through app.utils.serializers.serialize_boards
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'owner_id': self.owner_id,
-            'owner_username': self.owner.username,
+            'owner_username': self.owner.username if self.owner else None,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'task_count': self.tasks.count()
+            'task_count': self.task_count,
+            'completed_count': self.completed_count,
+            'open_count': self.open_count
         }
 
     def __repr__(self):
@@ -0,0 +1,11 @@
+from app import db
+
+class Counter(db.Model):
+    """A named running total kept in step with inserts and deletes (see app.services.counters)"""
+    __tablename__ = 'counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Counter {self.name}={self.value}>'
@@ -0,0 +1,46 @@
+from app import db
+from datetime import datetime
+
+class PurgeJob(db.Model):
+    """Background removal of a user or board marked pending-delete, with its progress"""
+    __tablename__ = 'purge_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # user, board
+    entity_id = db.Column(db.Integer, nullable=False)
+    entity_name = db.Column(db.String(120))  # kept for display once the row is gone
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    requested_by_id = db.Column(db.Integer)  # no FK: the requester may be purged later
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    deleted_tasks = db.Column(db.Integer, nullable=False, default=0)
+    deleted_audits = db.Column(db.Integer, nullable=False, default=0)
+    deleted_boards = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_purge_jobs_status', 'status', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'entity_name': self.entity_name,
+            'status': self.status,
+            'total_tasks': self.total_tasks,
+            'deleted_tasks': self.deleted_tasks,
+            'deleted_audits': self.deleted_audits,
+            'deleted_boards': self.deleted_boards,
+            'progress': round(self.deleted_tasks / self.total_tasks * 100, 1) if self.total_tasks else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<PurgeJob {self.entity_type} {self.entity_id} {self.status}>'
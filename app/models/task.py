@@ -21,9 +21,21 @@ class Task(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     ai_generated_description = db.Column(db.Boolean, default=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # optimistic lock, exposed as ETag
+    archived_at = db.Column(db.DateTime)  # set when status becomes archived; drives the move to tasks_archive
 
     tags = db.relationship('Tag', secondary=task_tags, backref='tasks')
 
+    __mapper_args__ = {'version_id_col': version}
+
+    # Lets per-board task and completion counts be answered from the index alone;
+    # ids are never reused, so a task moved to tasks_archive can be restored under its id
+    __table_args__ = (
+        db.Index('ix_tasks_board_status', 'board_id', 'status'),
+        db.Index('ix_tasks_status_archived', 'status', 'archived_at'),
+        {'sqlite_autoincrement': True}
+    )
+
     def is_overdue(self):
         if self.due_date and self.status not in ['completed', 'archived']:
             # Handle both timezone-aware and naive datetimes
@@ -40,6 +52,7 @@ class Task(db.Model):
         self.completed_at = datetime.utcnow()
 
     def to_dict(self):
+        # Built from this instance; lists go through app.utils.serializers.serialize_tasks
         return {
             'id': self.id,
             'title': self.title,
@@ -50,16 +63,57 @@ class Task(db.Model):
             'is_overdue': self.is_overdue(),
             'board_id': self.board_id,
             'board_name': self.board.name if self.board else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'ai_generated_description': self.ai_generated_description,
+            'version': self.version,
             'tags': [tag.name for tag in self.tags]
         }
 
     def __repr__(self):
         return f'<Task {self.title}>'
 
+# Tag links of tasks in tasks_archive; no FK to tasks, which no longer holds them
+task_tags_archive = db.Table('task_tags_archive',
+    db.Column('task_id', db.Integer, primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True)
+)
+
+class TaskArchive(db.Model):
+    """
+    Cold copy of a task archived for longer than TASK_ARCHIVE_AFTER_DAYS
+
+    Same columns and ids as tasks, so rows move between the tables with
+    INSERT ... SELECT. Only the explicit include-archived paths read it.
+    """
+    __tablename__ = 'tasks_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    due_date = db.Column(db.DateTime)
+    priority = db.Column(db.String(20))
+    status = db.Column(db.String(20))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id'), nullable=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    ai_generated_description = db.Column(db.Boolean, default=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    archived_at = db.Column(db.DateTime)
+    moved_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Pages of a user's archived tasks, most recently moved first
+        db.Index('ix_tasks_archive_user_moved', 'user_id', 'moved_at', 'id'),
+        db.Index('ix_tasks_archive_board', 'board_id'),
+    )
+
+    def __repr__(self):
+        return f'<TaskArchive {self.title}>'
+
 class Tag(db.Model):
     __tablename__ = 'tags'
 
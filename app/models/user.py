@@ -1,6 +1,6 @@
+from flask import current_app
 from app import db, login_manager
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 class User(UserMixin, db.Model):
@@ -12,20 +12,45 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    pending_delete = db.Column(db.Boolean, default=False, nullable=False, server_default='0')  # set while a purge job removes the account
 
     tasks = db.relationship('Task', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     owned_boards = db.relationship('Board', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
     board_access = db.relationship('BoardAccess', foreign_keys='BoardAccess.user_id', backref='user', lazy='dynamic', cascade='all, delete-orphan')
 
+    # Matches the (created_at, id) keyset order of the admin user directory
+    __table_args__ = (
+        db.Index('ix_users_created_timeline', 'created_at', 'id'),
+    )
+
+    @property
+    def is_active(self):
+        """Accounts being purged can't sign in"""
+        return not self.pending_delete
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from app.services.password_hasher import get_password_hasher
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        Verify a password, upgrading the stored hash when the configured cost changed
+
+        A rehash leaves the user dirty; callers commit after a successful login.
+        """
+        from app.services.password_hasher import get_password_hasher
+        hasher = get_password_hasher()
+        if not hasher.verify(self.password_hash, password):
+            return False
+        if hasher.needs_rehash(self.password_hash):
+            self.password_hash = hasher.hash(password)
+            hasher.count_rehash()
+        return True
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
\ No newline at end of file
+    # Served from the identity cache; the users row is only read on a miss
+    return current_app.extensions['user_cache'].get(int(user_id))
\ No newline at end of file
@@ -0,0 +1,42 @@
+from app import db
+from datetime import datetime
+
+class UserImportJob(db.Model):
+    """A CSV user import run by a background worker, with its progress and per-row report"""
+    __tablename__ = 'user_import_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    requested_by_id = db.Column(db.Integer)  # no FK: the requester may be purged later
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    created_users = db.Column(db.Integer, nullable=False, default=0)
+    rows = db.Column(db.Text)  # uploaded rows as JSON; cleared when the job ends since they hold passwords
+    report = db.Column(db.Text)  # per-row outcomes as JSON, once done
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_user_import_jobs_status', 'status', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'created_users': self.created_users,
+            'progress': round(self.processed_rows / self.total_rows * 100, 1) if self.total_rows else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<UserImportJob {self.id} {self.status}>'
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from app import db
+from app.models.board import Board, BoardAccess
+from app.services.board_access import board_access_changed
+from app.services.cache_versions import ACL_CACHE_VERSION, BUMPED_KEY, bump_cache_version, read_cache_version
+
+INVALIDATED_KEY = 'invalidated_acl_user_ids'
+
+BoardPermissions = namedtuple('BoardPermissions', 'can_view can_edit can_delete')
+
+NO_ACCESS = BoardPermissions(False, False, False)
+FULL_ACCESS = BoardPermissions(True, True, True)
+# Boards being purged stay visible until they're gone but take no more writes
+READ_ONLY = BoardPermissions(True, False, False)
+
+def load_acl(user_id):
+    """board_id -> BoardPermissions for every board user_id owns or was granted, in one query"""
+    owned = db.select(
+        Board.id, db.literal(True, db.Boolean), db.literal(True, db.Boolean), db.literal(True, db.Boolean),
+        Board.pending_delete
+    ).where(Board.owner_id == user_id)
+    shared = db.select(
+        BoardAccess.board_id, BoardAccess.can_edit, BoardAccess.can_delete, db.literal(False, db.Boolean),
+        Board.pending_delete
+    ).join(Board, Board.id == BoardAccess.board_id).where(BoardAccess.user_id == user_id)
+
+    acl = {}
+    for board_id, can_edit, can_delete, is_owner, pending_delete in db.session.execute(owned.union_all(shared)):
+        if pending_delete:
+            acl[board_id] = READ_ONLY
+        elif is_owner:
+            acl[board_id] = FULL_ACCESS
+        elif acl.get(board_id) is not FULL_ACCESS:
+            acl[board_id] = BoardPermissions(True, bool(can_edit), bool(can_delete))
+    return acl
+
+class AclCache:
+    """
+    Bounded LRU of per-user board ACLs with a TTL
+
+    Every invalidation bumps a version number, and a map loaded from the
+    database is only stored if the version is unchanged when the load
+    finishes. A request that read the old grants while another request
+    committed a change therefore can't put a stale map back in the cache.
+    Transactions that change access also bump the shared ACL stamp (see
+    app.services.cache_versions), and maps loaded under an older stamp are
+    reloaded, so a revocation reaches every worker process on its next
+    read rather than after ACL_CACHE_TTL.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        if ACL_CACHE_VERSION in db.session.info.get(BUMPED_KEY, ()):
+            # This transaction changed access; its view isn't committed, so it isn't shared
+            return load_acl(user_id)
+        now = time.monotonic()
+        # Read before any load, so grants loaded after a bump are never stored under the newer stamp
+        stamp = read_cache_version(ACL_CACHE_VERSION)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now and entry[1] == stamp:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            version = self._version
+
+        acl = load_acl(user_id)
+        with self._lock:
+            if version == self._version:
+                self._entries[user_id] = (now + self.ttl, stamp, acl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return acl
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            self._version += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+            version = self._version
+        return {
+            'cached': size,
+            'capacity': self.max_size,
+            'ttl': self.ttl,
+            'version': version,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+def user_acl(user_id):
+    """The user's ACL, memoized on g for the rest of the request"""
+    acls = g.setdefault('board_acls', {})
+    if user_id not in acls:
+        acls[user_id] = current_app.extensions['acl_cache'].get(user_id)
+    return acls[user_id]
+
+def pending_board_ids():
+    """Ids of boards awaiting a purge, memoized on g for the rest of the request"""
+    if 'pending_board_ids' not in g:
+        g.pending_board_ids = set(db.session.execute(
+            db.select(Board.id).where(Board.pending_delete.is_(True))
+        ).scalars())
+    return g.pending_board_ids
+
+def board_permissions(user, board_id):
+    """BoardPermissions of user on board_id; admins can do everything until a purge is requested"""
+    if user.is_admin:
+        return READ_ONLY if board_id in pending_board_ids() else FULL_ACCESS
+    return user_acl(user.id).get(board_id, NO_ACCESS)
+
+def _forget(cache, user_ids):
+    cache.invalidate(user_ids)
+    if has_app_context():
+        g.pop('pending_board_ids', None)
+        acls = g.get('board_acls')
+        if acls:
+            for user_id in user_ids:
+                acls.pop(user_id, None)
+
+def _stage(connection, target, *user_ids):
+    session = object_session(target)
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if session is not None and user_ids:
+        session.info.setdefault(INVALIDATED_KEY, set()).update(user_ids)
+        bump_cache_version(session, ACL_CACHE_VERSION, connection)
+
+def _access_changed(mapper, connection, target):
+    _stage(connection, target, target.user_id)
+
+def _board_added_or_removed(mapper, connection, target):
+    _stage(connection, target, target.owner_id)
+
+def _board_updating(mapper, connection, target):
+    # Runs before the UPDATE, so an owner overwritten before it was loaded can still be read
+    state = inspect(target)
+    history = state.attrs.owner_id.history
+    if history.has_changes():
+        previous = history.deleted or [connection.execute(
+            db.select(Board.owner_id).where(Board.id == target.id)
+        ).scalar()]
+        _stage(connection, target, target.owner_id, *previous)
+    if state.attrs.pending_delete.history.has_changes():
+        # Every member's map caches this board's permissions
+        members = connection.execute(
+            db.select(BoardAccess.user_id).where(BoardAccess.board_id == target.id)
+        ).scalars()
+        _stage(connection, target, target.owner_id, *members)
+
+def _invalidate_committed(session):
+    # Registered once per process; the cache is the active app's
+    user_ids = session.info.pop(INVALIDATED_KEY, None)
+    if user_ids and has_app_context() and 'acl_cache' in current_app.extensions:
+        _forget(current_app.extensions['acl_cache'], user_ids)
+
+def _forget_invalidated(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(INVALIDATED_KEY, None)
+
+def init_acl_cache(app):
+    """
+    Create the board ACL cache behind Board.has_access (ACL_CACHE_TTL, ACL_CACHE_SIZE)
+
+    ORM writes to board_access and board ownership are picked up by mapper
+    events and applied on commit; Core writes arrive through the
+    board_access_changed signal. Both advance the shared ACL stamp in the
+    writing transaction, which is how other processes learn of them.
+    """
+    cache = AclCache(
+        ttl=app.config.get('ACL_CACHE_TTL', 60),
+        max_size=app.config.get('ACL_CACHE_SIZE', 10000)
+    )
+    if not event.contains(BoardAccess, 'after_insert', _access_changed):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(BoardAccess, name, _access_changed)
+        event.listen(Board, 'after_insert', _board_added_or_removed)
+        event.listen(Board, 'after_delete', _board_added_or_removed)
+        event.listen(Board, 'before_update', _board_updating)
+    if not event.contains(db.session, 'after_commit', _invalidate_committed):
+        event.listen(db.session, 'after_commit', _invalidate_committed)
+    if not event.contains(db.session, 'after_soft_rollback', _forget_invalidated):
+        event.listen(db.session, 'after_soft_rollback', _forget_invalidated)
+
+    def on_access_changed(sender, board_id, user_ids):
+        _forget(cache, user_ids)
+
+    board_access_changed.connect(on_access_changed, sender=app, weak=False)
+    app.extensions['acl_cache'] = cache
+    return cache
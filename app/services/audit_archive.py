@@ -0,0 +1,294 @@
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import DateTime, func
+from app import db
+from app.models.audit import TaskAudit, AuditUserAgent, AuditIpAddress
+
+try:
+    import fcntl
+except ImportError:  # no advisory file locks off POSIX; runs in one process are still serialized
+    fcntl = None
+
+ARCHIVE_PREFIX = 'task_audits-'
+
+_index_cache = {}
+_index_lock = threading.Lock()
+_append_lock = threading.Lock()
+
+def _archive_dir():
+    """AUDIT_ARCHIVE_DIR, or None when unset, in which case there is nothing archived to read"""
+    return current_app.config.get('AUDIT_ARCHIVE_DIR') or None
+
+@contextmanager
+def _locked(path):
+    """Hold an exclusive lock on path + '.lock' against other threads and processes"""
+    with _append_lock, open(path + '.lock', 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _month_paths(archive_dir, month):
+    base = os.path.join(archive_dir, f'{ARCHIVE_PREFIX}{month}')
+    return base + '.jsonl.gz', base + '.index.json'
+
+def _row_to_record(row):
+    record = {}
+    for key, value in row._mapping.items():
+        record[key] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+def _record_to_audit(record):
+    """Build a detached TaskAudit so archived rows render like live ones"""
+    values = {}
+    for column in TaskAudit.__table__.columns:
+        if column.name not in record:
+            continue
+        value = record[column.name]
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        values[column.name] = value
+    return TaskAudit(**values)
+
+def _read_index(index_path):
+    """
+    Return {task_id: [(offset, length), ...]} for a monthly archive, cached by file mtime
+
+    Each entry locates one gzip member holding only that task's rows. Index
+    files written before offsets were recorded list bare task ids; those map
+    to None, meaning the whole file has to be scanned.
+    """
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return {}
+    with _index_lock:
+        cached = _index_cache.get(index_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    with open(index_path) as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        index = {task_id: None for task_id in data}
+    else:
+        index = {
+            int(task_id): None if members is None else [tuple(member) for member in members]
+            for task_id, members in data.items()
+        }
+    with _index_lock:
+        _index_cache[index_path] = (mtime, index)
+    return index
+
+def _append_month(archive_dir, month, records):
+    """
+    Append records to a month's archive, one gzip member per task
+
+    gzip readers concatenate members transparently, and the index records
+    each member's offset and length so a task's rows are read with a seek.
+    The month stays locked from reading its index to replacing it, so
+    overlapping runs can't interleave members or drop each other's entries.
+    """
+    data_path, index_path = _month_paths(archive_dir, month)
+    by_task = {}
+    for record in records:
+        by_task.setdefault(record['task_id'], []).append(record)
+
+    with _locked(data_path):
+        _write_month(data_path, index_path, by_task)
+
+def _write_month(data_path, index_path, by_task):
+    index = {
+        task_id: None if members is None else list(members)
+        for task_id, members in _read_index(index_path).items()
+    }
+    with open(data_path, 'ab') as f:
+        for task_id, task_records in sorted(by_task.items()):
+            payload = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in task_records)
+            member = gzip.compress(payload.encode('utf-8'))
+            offset = f.tell()
+            f.write(member)
+            members = index.setdefault(task_id, [])
+            # Tasks from an offset-less index keep being found by a full scan
+            if members is not None:
+                members.append((offset, len(member)))
+        f.flush()
+        os.fsync(f.fileno())
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({str(task_id): members for task_id, members in sorted(index.items())}, f)
+    os.replace(tmp_path, index_path)
+
+def archive_audits(older_than_days=None, chunk_size=None):
+    """
+    Move audit rows older than the retention window into monthly JSONL.gz files
+
+    Rows are copied and then deleted in chunks of ``chunk_size`` ids, each
+    chunk committed on its own so locks stay short. A chunk is appended to
+    its archive before it is deleted, so an interrupted run can at worst
+    leave duplicates, which readers drop by id.
+
+    Returns:
+        number of rows archived
+    """
+    if older_than_days is None:
+        older_than_days = current_app.config.get('AUDIT_RETENTION_DAYS', 90)
+    if chunk_size is None:
+        chunk_size = current_app.config.get('AUDIT_ARCHIVE_CHUNK_SIZE', 1000)
+
+    archive_dir = _archive_dir()
+    if archive_dir is None:
+        # Rows are deleted once archived, so the files must land on durable storage
+        raise RuntimeError('AUDIT_ARCHIVE_DIR must be set to a persistent directory to archive audits')
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    table = TaskAudit.__table__
+    user_agents = AuditUserAgent.__table__
+    ip_addresses = AuditIpAddress.__table__
+    # Archives hold the strings themselves so they stay readable without the dimension tables
+    columns = [column for column in table.c if column.name not in ('user_agent', 'ip_address')]
+    columns += [
+        func.coalesce(user_agents.c.value, table.c.user_agent).label('user_agent'),
+        func.coalesce(ip_addresses.c.value, table.c.ip_address).label('ip_address')
+    ]
+    source = table\
+        .outerjoin(user_agents, user_agents.c.id == table.c.user_agent_id)\
+        .outerjoin(ip_addresses, ip_addresses.c.id == table.c.ip_address_id)
+    archived = 0
+
+    while True:
+        rows = db.session.execute(
+            db.select(*columns)
+            .select_from(source)
+            .where(table.c.timestamp < cutoff)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row.timestamp.strftime('%Y-%m'), []).append(_row_to_record(row))
+        for month, records in by_month.items():
+            _append_month(archive_dir, month, records)
+
+        db.session.execute(table.delete().where(table.c.id.in_([row.id for row in rows])))
+        db.session.commit()
+        archived += len(rows)
+
+    return archived
+
+def _archived_months(archive_dir):
+    if archive_dir is None or not os.path.isdir(archive_dir):
+        return []
+    names = [
+        name[len(ARCHIVE_PREFIX):-len('.index.json')] for name in os.listdir(archive_dir)
+        if name.startswith(ARCHIVE_PREFIX) and name.endswith('.index.json')
+    ]
+    return sorted(names)
+
+def _read_month(archive_dir, month, task_id):
+    """A task's records in one monthly archive, by id"""
+    data_path, index_path = _month_paths(archive_dir, month)
+    index = _read_index(index_path)
+    if task_id not in index:
+        return {}
+    records = {}
+    members = index[task_id]
+    with open(data_path, 'rb') as f:
+        if members is None:
+            chunks = [gzip.decompress(f.read())]
+        else:
+            chunks = []
+            for offset, length in members:
+                f.seek(offset)
+                chunks.append(gzip.decompress(f.read(length)))
+    for chunk in chunks:
+        for line in chunk.decode('utf-8').splitlines():
+            record = json.loads(line)
+            if record['task_id'] == task_id:
+                records[record['id']] = record
+    return records
+
+def iter_archived_audits(task_id, newest_first=True):
+    """
+    Yield a task's archived audit rows as detached TaskAudit objects
+
+    Months are read one at a time, only when the task appears in their
+    index, so a reader that stops early never opens the older files.
+    """
+    archive_dir = _archive_dir()
+    months = _archived_months(archive_dir)
+    for month in (reversed(months) if newest_first else months):
+        audits = [_record_to_audit(record) for record in _read_month(archive_dir, month, task_id).values()]
+        audits.sort(key=lambda audit: (audit.timestamp, audit.id), reverse=newest_first)
+        yield from audits
+
+def load_archived_audits(task_id):
+    """Read a task's archived audit rows, oldest first, as detached TaskAudit objects"""
+    return list(iter_archived_audits(task_id, newest_first=False))
+
+def archived_through():
+    """
+    Start of the month after the newest archived one, or None without archives
+
+    No archived row is newer, so readers whose window starts later can skip
+    the archive entirely.
+    """
+    months = _archived_months(_archive_dir())
+    if not months:
+        return None
+    year, month = (int(part) for part in months[-1].split('-'))
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+def archived_audits_between(task_id, after=None, until=None):
+    """
+    A task's archived rows with after < timestamp <= until, oldest first
+
+    Either bound may be None. Months outside the window are not opened.
+    """
+    archive_dir = _archive_dir()
+    audits = []
+    for month in _archived_months(archive_dir):
+        if (after is not None and month < after.strftime('%Y-%m')) or \
+                (until is not None and month > until.strftime('%Y-%m')):
+            continue
+        for record in _read_month(archive_dir, month, task_id).values():
+            audit = _record_to_audit(record)
+            if (after is None or audit.timestamp > after) and (until is None or audit.timestamp <= until):
+                audits.append(audit)
+    audits.sort(key=lambda audit: (audit.timestamp, audit.id))
+    return audits
+
+def max_archived_audit_id():
+    """Highest audit id in any archive, read by a full scan; used when seeding id sequences"""
+    archive_dir = _archive_dir()
+    highest = 0
+    for month in _archived_months(archive_dir):
+        data_path, _ = _month_paths(archive_dir, month)
+        with gzip.open(data_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                highest = max(highest, json.loads(line)['id'])
+    return highest
+
+def register_commands(app):
+    @app.cli.command('archive-audits')
+    @click.option('--days', type=int, default=None, help='Archive rows older than this many days.')
+    @click.option('--chunk-size', type=int, default=None, help='Rows copied and deleted per transaction.')
+    def archive_audits_command(days, chunk_size):
+        """Move old task_audits rows into compressed monthly archives."""
+        try:
+            count = archive_audits(older_than_days=days, chunk_size=chunk_size)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Archived {count} audit rows.')
@@ -0,0 +1,176 @@
+import json
+from datetime import datetime
+from flask import current_app, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from app import db
+from app.models.audit import TaskSnapshot
+from app.models.task import Task
+from app.services.task_history import capture_state, state_from_values, snapshot_due
+from app.utils.audit_diff import encode_changes
+
+# Task attributes whose changes are audited; tags is the collection of tag names
+TRACKED_FIELDS = ['title', 'description', 'due_date', 'priority', 'status', 'board_id', 'tags']
+
+CAPTURE_KEY = 'captured_task_audits'
+
+def audit_value(field, value):
+    """Normalize a value to the string form audit rows store"""
+    if value is None:
+        return None
+    if field == 'due_date':
+        return value.isoformat()
+    if field == 'tags':
+        return ', '.join(sorted(value))
+    return str(value)
+
+def _actor_id(fallback_user_id):
+    if has_request_context() and current_user and current_user.is_authenticated:
+        return current_user.id
+    # Scripts and background jobs are attributed to the task's creator
+    return fallback_user_id
+
+def build_entry(task_id, action, user_id, changes=None, timestamp=None):
+    """A task_audits row as a plain dict, ready for the audit sink"""
+    in_request = has_request_context()
+    return {
+        'task_id': task_id,
+        'user_id': _actor_id(user_id),
+        'action': action,
+        'field_name': None,
+        'old_value': None,
+        'new_value': None,
+        'changes': encode_changes(changes) if changes else None,
+        'timestamp': timestamp or datetime.utcnow(),
+        'ip_address': request.environ.get('REMOTE_ADDR') if in_request else None,
+        'user_agent': request.environ.get('HTTP_USER_AGENT') if in_request else None
+    }
+
+def action_for(changes):
+    """Status-only edits keep their dedicated actions so history reads naturally"""
+    if set(changes) == {'status'} and changes['status'][1] in ('completed', 'archived'):
+        return changes['status'][1]
+    return 'updated'
+
+def snapshot_row(task_id, board_id, version, taken_at, state):
+    """
+    A task_snapshots row as a plain dict
+
+    taken_at should equal the timestamp of the audit row written for the
+    same change, since replay starts with rows strictly after it.
+    """
+    return {
+        'task_id': task_id,
+        'board_id': board_id,
+        'version': version,
+        'taken_at': taken_at,
+        'state': json.dumps(state, separators=(',', ':'))
+    }
+
+def _task_changes(task):
+    """Read {field: (old, new)} for a dirty Task straight from the unit of work"""
+    state = inspect(task)
+    changes = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if not history.has_changes():
+            continue
+        if field == 'tags':
+            unchanged = [tag.name for tag in history.unchanged]
+            old = unchanged + [tag.name for tag in history.deleted]
+            new = unchanged + [tag.name for tag in history.added]
+        else:
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+        old, new = audit_value(field, old), audit_value(field, new)
+        if old != new:
+            changes[field] = (old, new)
+    return changes
+
+def _before_flush(session, flush_context, instances):
+    captured = session.info.setdefault(CAPTURE_KEY, [])
+    now = datetime.utcnow()
+
+    for obj in session.new:
+        if isinstance(obj, Task):
+            captured.append(('created', obj, None, now))
+
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj, include_collections=True):
+            changes = _task_changes(obj)
+            if changes:
+                captured.append(('updated', obj, changes, now))
+
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            captured.append(('deleted', obj, None, now))
+    if not captured:
+        session.info.pop(CAPTURE_KEY, None)
+
+def _after_flush(session, flush_context):
+    captured = session.info.pop(CAPTURE_KEY, None)
+    if not captured:
+        return
+
+    entries, snapshots = [], []
+    for kind, task, changes, timestamp in captured:
+        if kind == 'created':
+            entries.append(build_entry(task.id, 'created', task.user_id, timestamp=timestamp))
+            snapshots.append(snapshot_row(task.id, task.board_id, task.version, timestamp, capture_state(task)))
+        elif kind == 'updated':
+            entries.append(build_entry(task.id, action_for(changes), task.user_id, changes, timestamp))
+            if snapshot_due(task.version):
+                snapshots.append(snapshot_row(task.id, task.board_id, task.version, timestamp, capture_state(task)))
+        else:
+            entries.append(build_entry(task.id, 'deleted', task.user_id, timestamp=timestamp))
+
+    # One executemany per flush for audits and one for snapshots
+    connection = session.connection()
+    current_app.extensions['audit_sink'].write_many(entries, connection)
+    if snapshots:
+        connection.execute(TaskSnapshot.__table__.insert(), snapshots)
+
+def _discard_captured(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(CAPTURE_KEY, None)
+
+def audit_inserted_tasks(connection, rows):
+    """
+    Audit tasks inserted with Core statements, which bypass flush events
+
+    Args:
+        connection: connection or session the tasks were inserted with
+        rows: (task_id, values, tag_names) for each inserted task
+    """
+    entries, snapshots = [], []
+    now = datetime.utcnow()
+    for task_id, values, tag_names in rows:
+        entries.append(build_entry(task_id, 'created', values['user_id'], timestamp=now))
+        state = state_from_values(values, tag_names)
+        snapshots.append(snapshot_row(task_id, values['board_id'], 1, now, state))
+    current_app.extensions['audit_sink'].write_many(entries, connection)
+    if snapshots:
+        connection.execute(TaskSnapshot.__table__.insert(), snapshots)
+
+def audit_core_update(connection, task_id, user_id, old_values, new_values, version):
+    """Audit a Core UPDATE given the previous and new values of the columns it set"""
+    changes = {}
+    for field, new in new_values.items():
+        old, new = audit_value(field, old_values.get(field)), audit_value(field, new)
+        if old != new:
+            changes[field] = (old, new)
+    if not changes:
+        return
+    entry = build_entry(task_id, action_for(changes), user_id, changes)
+    current_app.extensions['audit_sink'].write_many([entry], connection)
+    if snapshot_due(version):
+        task = db.session.get(Task, task_id)
+        snapshot = snapshot_row(task_id, task.board_id, version, entry['timestamp'], capture_state(task))
+        connection.execute(TaskSnapshot.__table__.insert(), [snapshot])
+
+def init_audit_capture(app):
+    """Audit every Task insert, update and delete from session flush events"""
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_soft_rollback', _discard_captured)
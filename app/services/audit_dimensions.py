@@ -0,0 +1,189 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from app import db
+from app.models.audit import AuditUserAgent, AuditIpAddress
+from app.utils.sql import insert_ignoring_duplicates
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+PROVISIONAL_KEY = 'provisional_interned_ids'
+
+def _sha1(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+class Interner:
+    """
+    Maps dimension strings to small integer ids with a bounded LRU cache
+
+    Cache misses are resolved with one SELECT for the whole batch plus one
+    insert-or-ignore for strings never seen before. Ids are only added to
+    the shared cache once the transaction that may have created them has
+    committed (see ``remember``), so a rollback can't leave dangling ids.
+    """
+
+    def __init__(self, model, hashed=False, max_size=10000):
+        self.table = model.__table__
+        self.key_column = self.table.c.value_hash if hashed else self.table.c.value
+        self.hashed = hashed
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, value):
+        return _sha1(value) if self.hashed else value
+
+    def cached(self, value):
+        with self._lock:
+            item_id = self._cache.get(value)
+            if item_id is not None:
+                self._cache.move_to_end(value)
+                self.hits += 1
+            return item_id
+
+    def remember(self, mapping):
+        with self._lock:
+            for value, item_id in mapping.items():
+                self._cache[value] = item_id
+                self._cache.move_to_end(value)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def resolve(self, executor, dialect_name, values, provisional=None):
+        """
+        Return ({value: id} for all values, {value: id} for cache misses)
+
+        Args:
+            executor: a Session or Connection inside the caller's transaction
+            dialect_name: backend name used to pick the insert-or-ignore form
+            values: strings to intern (None and empty strings are skipped)
+            provisional: ids resolved earlier in the same uncommitted transaction
+        """
+        resolved, fetched = {}, {}
+        missing = []
+        for value in set(values):
+            if not value:
+                continue
+            item_id = (provisional or {}).get(value) or self.cached(value)
+            if item_id is None:
+                missing.append(value)
+            else:
+                resolved[value] = item_id
+        if not missing:
+            return resolved, fetched
+
+        self.misses += len(missing)
+        keys = {self._key(value): value for value in missing}
+        key_list = list(keys)
+
+        def select_ids():
+            for start in range(0, len(key_list), IN_CHUNK_SIZE):
+                chunk = key_list[start:start + IN_CHUNK_SIZE]
+                rows = executor.execute(
+                    db.select(self.key_column, self.table.c.id).where(self.key_column.in_(chunk))
+                )
+                for key, item_id in rows:
+                    fetched[keys[key]] = item_id
+
+        select_ids()
+        new_values = [value for value in missing if value not in fetched]
+        if new_values:
+            rows = [
+                {'value_hash': _sha1(value), 'value': value} if self.hashed else {'value': value}
+                for value in new_values
+            ]
+            executor.execute(insert_ignoring_duplicates(dialect_name, self.table), rows)
+            select_ids()
+
+        resolved.update(fetched)
+        return resolved, fetched
+
+    def stats(self):
+        with self._lock:
+            size = len(self._cache)
+        return {'cached': size, 'capacity': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+class AuditDimensions:
+    """Replaces user agent and IP strings on audit entries with dimension ids"""
+
+    def __init__(self, dialect_name, intern_ips=True, cache_size=10000):
+        self.dialect_name = dialect_name
+        self.intern_ips = intern_ips
+        self.user_agents = Interner(AuditUserAgent, hashed=True, max_size=cache_size)
+        self.ip_addresses = Interner(AuditIpAddress, max_size=cache_size)
+
+    def apply(self, executor, entries, provisional=None):
+        """
+        Rewrite entries in place and return the newly fetched ids per interner
+
+        Callers pass the returned mapping to ``commit`` after their
+        transaction commits.
+        """
+        provisional = provisional or {}
+        fetched = {}
+        ua_ids, fetched['user_agents'] = self.user_agents.resolve(
+            executor, self.dialect_name,
+            [entry.get('user_agent') for entry in entries],
+            provisional.get('user_agents')
+        )
+        for entry in entries:
+            entry['user_agent_id'] = ua_ids.get(entry.get('user_agent'))
+            entry['user_agent'] = None
+
+        if self.intern_ips:
+            ip_ids, fetched['ip_addresses'] = self.ip_addresses.resolve(
+                executor, self.dialect_name,
+                [entry.get('ip_address') for entry in entries],
+                provisional.get('ip_addresses')
+            )
+            for entry in entries:
+                entry['ip_address_id'] = ip_ids.get(entry.get('ip_address'))
+                entry['ip_address'] = None
+        return fetched
+
+    def commit(self, fetched):
+        self.user_agents.remember(fetched.get('user_agents', {}))
+        self.ip_addresses.remember(fetched.get('ip_addresses', {}))
+
+    def apply_in_session(self, entries, executor=None):
+        """Intern inside the request transaction; ids are cached once it commits"""
+        provisional = db.session.info.setdefault(PROVISIONAL_KEY, {})
+        fetched = self.apply(executor if executor is not None else db.session, entries, provisional)
+        for name, mapping in fetched.items():
+            provisional.setdefault(name, {}).update(mapping)
+
+    def stats(self):
+        return {
+            'user_agents': self.user_agents.stats(),
+            'ip_addresses': self.ip_addresses.stats() if self.intern_ips else None
+        }
+
+def _promote_provisional(session):
+    provisional = session.info.pop(PROVISIONAL_KEY, None)
+    if provisional and has_app_context():
+        dimensions = current_app.extensions.get('audit_dimensions')
+        if dimensions:
+            dimensions.commit(provisional)
+
+def _drop_provisional(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PROVISIONAL_KEY, None)
+
+def init_audit_dimensions(app):
+    with app.app_context():
+        dialect_name = db.engine.dialect.name
+    dimensions = AuditDimensions(
+        dialect_name,
+        intern_ips=app.config.get('AUDIT_INTERN_IPS', True),
+        cache_size=app.config.get('AUDIT_DIMENSION_CACHE_SIZE', 10000)
+    )
+    if not event.contains(db.session, 'after_commit', _promote_provisional):
+        event.listen(db.session, 'after_commit', _promote_provisional)
+        event.listen(db.session, 'after_soft_rollback', _drop_provisional)
+    app.extensions['audit_dimensions'] = dimensions
+    return dimensions
@@ -0,0 +1,237 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.models.audit import TaskAudit
+from app.services.audit_dimensions import init_audit_dimensions
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'pending_audit_entries'
+
+class SyncAuditSink:
+    """Writes audit rows inside the caller's transaction (durable with the change itself)"""
+
+    mode = 'sync'
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+        self.written = 0
+
+    def write(self, entry):
+        self.dimensions.apply_in_session([entry])
+        db.session.add(TaskAudit(**entry))
+        self.written += 1
+
+    def write_many(self, entries, executor=None):
+        """
+        Insert entries with one executemany in the session transaction
+
+        Args:
+            entries: task_audits rows as dicts
+            executor: the session's connection when called during a flush
+        """
+        if not entries:
+            return
+        executor = executor if executor is not None else db.session
+        self.dimensions.apply_in_session(entries, executor)
+        executor.execute(TaskAudit.__table__.insert(), entries)
+        self.written += len(entries)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'written': self.written,
+            'queue_depth': 0,
+            'dimensions': self.dimensions.stats()
+        }
+
+class BufferedAuditSink:
+    """
+    Queues audit rows and inserts them from a background thread
+
+    Entries are staged on the session and only queued once the request
+    transaction commits, so rolled-back changes leave no audit trail. The
+    writer thread flushes with executemany when ``batch_size`` entries are
+    waiting or ``flush_interval`` seconds have passed, and whatever is still
+    queued is flushed on shutdown. Entries queued when the process dies
+    abruptly are lost, which is the durability traded for shorter commits.
+
+    The writer thread is started by the first enqueue in each process, so
+    workers forked from a preloaded master get their own. When the queue is
+    full the overflow is inserted on the committing thread instead of
+    blocking it on the queue; ``overflowed`` counts those entries.
+    """
+
+    mode = 'buffered'
+
+    def __init__(self, engine, dimensions, batch_size=200, flush_interval=1.0, max_queue=10000):
+        self.engine = engine
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'written': 0,
+            'batches': 0,
+            'failed': 0,
+            'overflowed': 0,
+            'max_queue_depth': 0,
+            'last_flush_at': None,
+            'last_flush_ms': None
+        }
+
+    def _ensure_writer(self):
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Forked: entries queued in the parent are the parent's to write
+                self.queue = queue.Queue(maxsize=self.max_queue)
+                self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def write(self, entry):
+        db.session.info.setdefault(PENDING_KEY, []).append(entry)
+
+    def write_many(self, entries, executor=None):
+        db.session.info.setdefault(PENDING_KEY, []).extend(entries)
+
+    def enqueue(self, entries):
+        self._ensure_writer()
+        overflow = []
+        for entry in entries:
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                overflow.append(entry)
+        depth = self.queue.qsize()
+        with self._stats_lock:
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], depth)
+            self._stats['overflowed'] += len(overflow)
+        if overflow:
+            self._insert(overflow)
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, batch):
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            with self.engine.begin() as connection:
+                fetched = self.dimensions.apply(connection, batch)
+                connection.execute(TaskAudit.__table__.insert(), batch)
+            self.dimensions.commit(fetched)
+        except Exception:
+            logger.exception('Dropping %d audit entries after a failed flush', len(batch))
+            with self._stats_lock:
+                self._stats['failed'] += len(batch)
+            return
+        with self._stats_lock:
+            self._stats['written'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['last_flush_at'] = time.time()
+            self._stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stopping.is_set():
+            timeout = max(deadline - time.monotonic(), 0)
+            if self.queue.qsize() < self.batch_size and timeout > 0:
+                self._stopping.wait(min(timeout, 0.05))
+                continue
+            self.flush()
+            deadline = time.monotonic() + self.flush_interval
+
+    def flush(self):
+        """Write everything currently queued, in batches of batch_size"""
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                self._insert(batch)
+
+    def close(self):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+            self.flush()
+
+    def stats(self):
+        with self._stats_lock:
+            result = dict(self._stats)
+        result['mode'] = self.mode
+        result['queue_depth'] = self.queue.qsize()
+        result['queue_capacity'] = self.queue.maxsize
+        result['writer_running'] = self._pid == os.getpid() and self._thread.is_alive()
+        result['dimensions'] = self.dimensions.stats()
+        return result
+
+def _queue_committed_entries(session):
+    entries = session.info.pop(PENDING_KEY, None)
+    if entries:
+        sink = current_app.extensions.get('audit_sink')
+        if isinstance(sink, BufferedAuditSink):
+            sink.enqueue(entries)
+
+def _discard_pending_entries(session, previous_transaction):
+    # Savepoint rollbacks keep the entries staged by the enclosing transaction
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+def init_audit_sink(app):
+    """Create the audit sink selected by AUDIT_SINK ('sync' or 'buffered')"""
+    mode = app.config.get('AUDIT_SINK', 'sync')
+    dimensions = init_audit_dimensions(app)
+    if mode == 'buffered':
+        with app.app_context():
+            engine = db.engine
+        sink = BufferedAuditSink(
+            engine,
+            dimensions,
+            batch_size=app.config.get('AUDIT_BATCH_SIZE', 200),
+            flush_interval=app.config.get('AUDIT_FLUSH_INTERVAL', 1.0),
+            max_queue=app.config.get('AUDIT_QUEUE_MAX', 10000)
+        )
+        if not event.contains(db.session, 'after_commit', _queue_committed_entries):
+            event.listen(db.session, 'after_commit', _queue_committed_entries)
+            event.listen(db.session, 'after_soft_rollback', _discard_pending_entries)
+        atexit.register(sink.close)
+    elif mode == 'sync':
+        sink = SyncAuditSink(dimensions)
+    else:
+        raise ValueError(f'Unknown AUDIT_SINK {mode!r}')
+
+    app.extensions['audit_sink'] = sink
+    return sink
+
+def get_audit_sink():
+    return current_app.extensions['audit_sink']
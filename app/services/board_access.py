@@ -0,0 +1,97 @@
+from datetime import datetime
+from blinker import Namespace
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from app import db
+from app.models.board import BoardAccess
+from app.services.cache_versions import ACL_CACHE_VERSION, bump_cache_version
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+CHANGED_KEY = 'board_access_changes'
+
+_signals = Namespace()
+
+# Sent once per board after a commit that changed who can access it, with
+# board_id and user_ids (the users whose access was granted, revoked or
+# altered). Receivers use it to drop cached permissions for just those users.
+board_access_changed = _signals.signal('board-access-changed')
+
+def note_access_changed(board_id, user_ids):
+    """
+    Record users whose access to a board changed in the current transaction
+
+    The shared ACL stamp is bumped in the same transaction, so caches in
+    other processes, which never get the signal, drop their maps too.
+    """
+    user_ids = {int(user_id) for user_id in user_ids if user_id is not None}
+    if user_ids:
+        db.session.info.setdefault(CHANGED_KEY, {}).setdefault(board_id, set()).update(user_ids)
+        bump_cache_version(db.session(), ACL_CACHE_VERSION)
+
+def sync_board_access(board_id, owner_id, user_ids, granted_by_id, can_edit=True, can_delete=False):
+    """
+    Make a board's grants match user_ids, touching only the rows that differ
+
+    Existing grants keep their permissions and granted_at. New grants are
+    inserted with one executemany and revoked ones removed with set-based
+    DELETEs, all in the caller's transaction.
+
+    Args:
+        board_id: board to update
+        owner_id: board owner, who never needs a grant
+        user_ids: users who should have access
+        granted_by_id: user recorded on new grants
+        can_edit, can_delete: permissions for new grants
+
+    Returns:
+        (added, removed) sets of user ids
+    """
+    desired = {int(user_id) for user_id in user_ids} - {owner_id}
+    existing = {
+        user_id for (user_id,) in
+        db.session.query(BoardAccess.user_id).filter(BoardAccess.board_id == board_id)
+    }
+    added = desired - existing
+    removed = existing - desired
+
+    table = BoardAccess.__table__
+    if added:
+        now = datetime.utcnow()
+        db.session.execute(table.insert(), [
+            {
+                'board_id': board_id,
+                'user_id': user_id,
+                'can_edit': can_edit,
+                'can_delete': can_delete,
+                'granted_at': now,
+                'granted_by_id': granted_by_id
+            }
+            for user_id in sorted(added)
+        ])
+    removed_ids = sorted(removed)
+    for start in range(0, len(removed_ids), IN_CHUNK_SIZE):
+        chunk = removed_ids[start:start + IN_CHUNK_SIZE]
+        db.session.execute(table.delete().where(table.c.board_id == board_id, table.c.user_id.in_(chunk)))
+
+    note_access_changed(board_id, added | removed)
+    return added, removed
+
+def _send_committed_changes(session):
+    changes = session.info.pop(CHANGED_KEY, None)
+    if not changes or not has_app_context():
+        return
+    app = current_app._get_current_object()
+    for board_id, user_ids in changes.items():
+        board_access_changed.send(app, board_id=board_id, user_ids=frozenset(user_ids))
+
+def _discard_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(CHANGED_KEY, None)
+
+def init_board_access(app):
+    """Send board_access_changed after each commit that changed board access"""
+    if not event.contains(db.session, 'after_commit', _send_committed_changes):
+        event.listen(db.session, 'after_commit', _send_committed_changes)
+        event.listen(db.session, 'after_soft_rollback', _discard_changes)
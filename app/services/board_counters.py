@@ -0,0 +1,249 @@
+import logging
+import threading
+import time
+import click
+from sqlalchemy import event, func, inspect
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.board import Board
+from app.models.counter import Counter
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+OLD_STATE_KEY = 'board_counter_old_state'
+NEW_TASKS_KEY = 'board_counter_new_tasks'
+
+# Counters row holding the unix time of the last reconciliation pass
+RECONCILED_AT = 'board_counts_reconciled_at'
+
+OPEN_STATUSES = ('pending', 'in_progress')
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+_UNKNOWN = object()
+
+def _bucket(status):
+    """(task, completed, open) contribution of one task with this status"""
+    status = status or 'pending'
+    return (1, 1 if status == 'completed' else 0, 1 if status in OPEN_STATUSES else 0)
+
+def add_task_delta(deltas, board_id, status, sign):
+    """Count one task with status on board_id into deltas, sign +1 for added or -1 for removed"""
+    if board_id is None:
+        return
+    totals = deltas.setdefault(board_id, [0, 0, 0])
+    for index, amount in enumerate(_bucket(status)):
+        totals[index] += sign * amount
+
+def adjust_board_counts(executor, deltas):
+    """
+    Apply {board_id: [tasks, completed, open]} deltas to the board counter columns
+
+    Runs one executemany UPDATE in the caller's transaction. ORM writes are
+    counted by the flush listeners; Core statements that bypass them (bulk
+    inserts, PATCH, purges) call this directly.
+    """
+    params = [
+        {'board_key': board_id, 'tasks': tasks, 'completed': completed, 'open': open_}
+        for board_id, (tasks, completed, open_) in sorted(deltas.items())
+        if tasks or completed or open_
+    ]
+    if not params:
+        return
+    table = Board.__table__
+    executor.execute(
+        table.update().where(table.c.id == db.bindparam('board_key')).values(
+            task_count=table.c.task_count + db.bindparam('tasks'),
+            completed_count=table.c.completed_count + db.bindparam('completed'),
+            open_count=table.c.open_count + db.bindparam('open')
+        ),
+        params
+    )
+
+def _old_value(obj, attribute):
+    history = inspect(obj).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if not history.added:
+        # Unchanged, so the current value (loaded now if expired) is the stored one
+        return getattr(obj, attribute)
+    # Overwritten before it was ever loaded
+    return _UNKNOWN
+
+def _before_flush(session, flush_context, instances):
+    old_state = session.info.setdefault(OLD_STATE_KEY, {})
+    new_tasks = session.info.setdefault(NEW_TASKS_KEY, [])
+    unknown = []
+    for obj in session.new:
+        if isinstance(obj, Task):
+            new_tasks.append(obj)
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Task) or obj in old_state:
+            continue
+        state = inspect(obj)
+        deleted = obj in session.deleted
+        if not deleted and not any(state.attrs[name].history.has_changes() for name in ('status', 'board_id', 'board')):
+            continue
+        old = (_old_value(obj, 'board_id'), _old_value(obj, 'status'))
+        old_state[obj] = old
+        if _UNKNOWN in old:
+            unknown.append(obj)
+
+    if unknown:
+        # The database still holds the pre-flush values
+        rows = dict(
+            (row.id, (row.board_id, row.status)) for row in
+            session.query(Task.id, Task.board_id, Task.status).filter(Task.id.in_([obj.id for obj in unknown]))
+        )
+        for obj in unknown:
+            old_state[obj] = rows.get(obj.id, (None, None))
+
+def _after_flush(session, flush_context):
+    old_state = session.info.pop(OLD_STATE_KEY, None) or {}
+    new_tasks = session.info.pop(NEW_TASKS_KEY, None) or []
+    deltas = {}
+    for obj in new_tasks:
+        add_task_delta(deltas, obj.board_id, obj.status, 1)
+    for obj, (board_id, status) in old_state.items():
+        add_task_delta(deltas, board_id, status, -1)
+        if obj not in session.deleted:
+            add_task_delta(deltas, obj.board_id, obj.status, 1)
+    adjust_board_counts(session.connection(), deltas)
+
+def _discard_state(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(OLD_STATE_KEY, None)
+        session.info.pop(NEW_TASKS_KEY, None)
+
+def _count_tasks(*criteria):
+    # Correlated with the boards row being updated
+    return db.select(func.count(Task.id)).where(Task.board_id == Board.__table__.c.id, *criteria)\
+        .scalar_subquery()
+
+def recount_boards(executor, first_id, last_id):
+    """
+    Set the counters of boards with ids in [first_id, last_id] from their tasks
+
+    One UPDATE with correlated counts, touching only boards that drifted, so
+    it can't race a concurrent counter delta between a read and a write.
+
+    Returns:
+        number of boards whose counters were corrected
+    """
+    table = Board.__table__
+    counts = {
+        'task_count': _count_tasks(),
+        'completed_count': _count_tasks(Task.status == 'completed'),
+        'open_count': _count_tasks(Task.status.in_(OPEN_STATUSES))
+    }
+    return executor.execute(
+        table.update()
+        .where(table.c.id.between(first_id, last_id),
+               db.or_(*(table.c[column] != count for column, count in counts.items())))
+        # A repair isn't an edit, so updated_at is left alone
+        .values(updated_at=table.c.updated_at, **counts)
+    ).rowcount
+
+def reconcile_board_counts(chunk_size=IN_CHUNK_SIZE):
+    """
+    Recount tasks per board and repair counter columns that drifted
+
+    Boards are walked in primary-key ranges of chunk_size, each fixed with
+    one set-based UPDATE and committed.
+
+    Returns:
+        number of boards whose counters were corrected
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = db.session.execute(
+            db.select(Board.id).where(Board.id > last_id).order_by(Board.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return fixed
+        fixed += recount_boards(db.session, ids[0], ids[-1])
+        last_id = ids[-1]
+        db.session.commit()
+
+def claim_reconcile_run(interval):
+    """
+    True when this process should run the next reconciliation pass
+
+    Every worker's reconciler asks, and one conditional UPDATE of a
+    timestamp in the counters table lets a single one through per interval.
+    """
+    now = int(time.time())
+    table = Counter.__table__
+    # Half an interval of slack, so a worker waking slightly early doesn't skip a round
+    claimed = db.session.execute(
+        table.update().where(table.c.name == RECONCILED_AT, table.c.value <= now - interval // 2)
+        .values(value=now)
+    ).rowcount
+    if not claimed and db.session.get(Counter, RECONCILED_AT) is None:
+        try:
+            db.session.execute(table.insert().values(name=RECONCILED_AT, value=now))
+            claimed = 1
+        except IntegrityError:
+            # Another worker seeded it first and has this round
+            db.session.rollback()
+            return False
+    db.session.commit()
+    return bool(claimed)
+
+class BoardCountReconciler:
+    """Runs reconcile_board_counts every ``interval`` seconds on a daemon thread"""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='board-count-reconciler', daemon=True)
+        self.last_fixed = None
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    if not claim_reconcile_run(self.interval):
+                        continue
+                    self.last_fixed = reconcile_board_counts()
+                    if self.last_fixed:
+                        logger.warning('Corrected task counters on %s boards', self.last_fixed)
+                except Exception:
+                    logger.exception('Board counter reconciliation failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def stop(self):
+        self._stopped.set()
+
+def init_board_counters(app):
+    """
+    Keep boards.task_count, completed_count and open_count current from flush events
+
+    BOARD_COUNTS_RECONCILE_INTERVAL (seconds) starts a background reconciler
+    in each worker, of which one runs per interval; `flask
+    reconcile-board-counts` runs one pass on demand.
+    """
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_soft_rollback', _discard_state)
+
+    @app.cli.command('reconcile-board-counts')
+    def reconcile_board_counts_command():
+        """Recount tasks per board and fix drifted counters."""
+        click.echo(f'Corrected {reconcile_board_counts()} boards')
+
+    interval = app.config.get('BOARD_COUNTS_RECONCILE_INTERVAL')
+    if interval:
+        reconciler = BoardCountReconciler(app, interval)
+        reconciler.start()
+        app.extensions['board_count_reconciler'] = reconciler
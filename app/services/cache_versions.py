@@ -0,0 +1,50 @@
+from sqlalchemy import event
+from app import db
+from app.models.counter import Counter
+from app.utils.sql import insert_ignoring_duplicates
+
+BUMPED_KEY = 'bumped_cache_versions'
+
+# Rows in the counters table, one per cache shared by every worker process
+USER_CACHE_VERSION = 'user_cache_version'
+ACL_CACHE_VERSION = 'acl_cache_version'
+
+def read_cache_version(name):
+    """The committed stamp of a cache, 0 until it is first bumped; one primary-key read"""
+    return db.session.query(Counter.value).filter(Counter.name == name).scalar() or 0
+
+def bump_cache_version(session, name, executor=None):
+    """
+    Advance a cache's stamp in the session's current transaction
+
+    Caches remember the stamp each entry was loaded under and reload it
+    once the stored stamp has moved on, so a change committed in one
+    worker process reaches every other one on their next read. The stamp
+    moves once per transaction however many rows changed.
+
+    Args:
+        session: session whose transaction makes the change
+        name: USER_CACHE_VERSION or ACL_CACHE_VERSION
+        executor: connection to run on; flush events pass theirs, otherwise the session
+    """
+    bumped = session.info.setdefault(BUMPED_KEY, set())
+    if name in bumped:
+        return
+    executor = executor if executor is not None else session
+    table = Counter.__table__
+    bump = table.update().where(table.c.name == name).values(value=table.c.value + 1)
+    if not executor.execute(bump).rowcount:
+        # First bump ever; racing seeders both end up incrementing the one row
+        executor.execute(insert_ignoring_duplicates(db.engine.dialect.name, table), {'name': name, 'value': 0})
+        executor.execute(bump)
+    bumped.add(name)
+
+def _forget_bumps(session, *args):
+    session.info.pop(BUMPED_KEY, None)
+
+def init_cache_versions(app):
+    """Track which stamps the open transaction already advanced"""
+    if not event.contains(db.session, 'after_commit', _forget_bumps):
+        event.listen(db.session, 'after_commit', _forget_bumps)
+        # Savepoint rollbacks too: a bump made inside one is undone with it
+        event.listen(db.session, 'after_soft_rollback', _forget_bumps)
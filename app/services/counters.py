@@ -0,0 +1,133 @@
+import click
+from sqlalchemy import event, inspect
+from app import db
+from app.models.board import Board
+from app.models.counter import Counter
+from app.models.task import Task
+from app.models.user import User
+from app.utils.sql import insert_ignoring_duplicates
+
+DELTAS_KEY = 'pending_counter_deltas'
+
+COUNTER_NAMES = ('users', 'non_admin_users', 'active_boards', 'tasks')
+
+def _definitions():
+    """Counter name -> query counting it from scratch"""
+    return {
+        'users': db.session.query(db.func.count(User.id)),
+        'non_admin_users': db.session.query(db.func.count(User.id)).filter(User.is_admin.is_(False)),
+        'active_boards': db.session.query(db.func.count(Board.id)).filter(Board.is_active.is_(True)),
+        'tasks': db.session.query(db.func.count(Task.id))
+    }
+
+def _add(deltas, name, amount):
+    if amount:
+        deltas[name] = deltas.get(name, 0) + amount
+
+def _flag_change(obj, attribute):
+    """+1 or -1 when a boolean attribute flipped to True or False in this flush, else 0"""
+    state = inspect(obj)
+    history = state.attrs[attribute].history
+    if not history.added:
+        return 0
+    if history.deleted:
+        old = history.deleted[0]
+    elif state.has_identity:
+        # Overwritten before it was loaded; the database still holds the stored value
+        model = type(obj)
+        old = state.session.query(getattr(model, attribute)).filter(model.id == obj.id).scalar()
+    else:
+        return 0
+    old, new = bool(old), bool(history.added[0])
+    if old == new:
+        return 0
+    return 1 if new else -1
+
+def _object_deltas(obj, sign, deltas):
+    if isinstance(obj, User):
+        _add(deltas, 'users', sign)
+        if not obj.is_admin:
+            _add(deltas, 'non_admin_users', sign)
+    elif isinstance(obj, Board):
+        if obj.is_active is not False:  # unset is_active defaults to True on insert
+            _add(deltas, 'active_boards', sign)
+    elif isinstance(obj, Task):
+        _add(deltas, 'tasks', sign)
+
+def _before_flush(session, flush_context, instances):
+    deltas = session.info.setdefault(DELTAS_KEY, {})
+    for obj in session.new:
+        _object_deltas(obj, 1, deltas)
+    for obj in session.deleted:
+        _object_deltas(obj, -1, deltas)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            _add(deltas, 'non_admin_users', -_flag_change(obj, 'is_admin'))
+        elif isinstance(obj, Board):
+            _add(deltas, 'active_boards', _flag_change(obj, 'is_active'))
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop(DELTAS_KEY, None)
+    if deltas:
+        adjust_counters(session.connection(), deltas)
+
+def _discard_deltas(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(DELTAS_KEY, None)
+
+def adjust_counters(executor, deltas):
+    """
+    Add deltas to counters in the caller's transaction
+
+    ORM inserts and deletes are counted by the flush listeners; Core
+    statements that bypass them (bulk imports, purges) call this directly.
+    """
+    deltas = {name: amount for name, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    table = Counter.__table__
+    executor.execute(
+        table.update().where(table.c.name == db.bindparam('counter_name'))
+        .values(value=table.c.value + db.bindparam('amount')),
+        [{'counter_name': name, 'amount': amount} for name, amount in sorted(deltas.items())]
+    )
+
+def recount_counters():
+    """
+    Recompute every counter with full counts; used to seed or repair the table
+
+    Missing rows are inserted with insert-or-ignore before the values are
+    set, so workers seeding the table at the same time both succeed.
+    """
+    values = {name: query.scalar() or 0 for name, query in _definitions().items()}
+    table = Counter.__table__
+    db.session.execute(
+        insert_ignoring_duplicates(db.engine.dialect.name, table),
+        [{'name': name, 'value': 0} for name in values]
+    )
+    db.session.execute(
+        table.update().where(table.c.name == db.bindparam('counter_name'))
+        .values(value=db.bindparam('counter_value')),
+        [{'counter_name': name, 'counter_value': value} for name, value in values.items()]
+    )
+    db.session.commit()
+    return values
+
+def read_counters():
+    """All counters with one primary-key read, seeding them on first use"""
+    values = dict(db.session.query(Counter.name, Counter.value).filter(Counter.name.in_(COUNTER_NAMES)))
+    if len(values) < len(COUNTER_NAMES):
+        values = recount_counters()
+    return values
+
+def init_counters(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_soft_rollback', _discard_deltas)
+
+    @app.cli.command('recount-counters')
+    def recount_counters_command():
+        """Recompute the dashboard counters from the tables."""
+        for name, value in recount_counters().items():
+            click.echo(f'{name}: {value}')
@@ -1,17 +1,185 @@
+import logging
 import os
+import random
+import re
+import threading
+import time
 import requests
-import json
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta'
+
+# Worth another attempt: rate limiting and transient upstream failures
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+SAFETY_SETTINGS = [
+    {'category': category, 'threshold': 'BLOCK_MEDIUM_AND_ABOVE'}
+    for category in (
+        'HARM_CATEGORY_HARASSMENT',
+        'HARM_CATEGORY_HATE_SPEECH',
+        'HARM_CATEGORY_SEXUALLY_EXPLICIT',
+        'HARM_CATEGORY_DANGEROUS_CONTENT'
+    )
+]
+
+# requests and urllib3 put the request URL in their exception messages
+_URL_PATTERN = re.compile(r'https?://\S+|(?<=url: )\S+')
+
+def _describe_error(error):
+    """Exception class and message with any URL in it replaced, safe to log and expose in stats"""
+    return f'{error.__class__.__name__}: {_URL_PATTERN.sub("<url>", str(error))}'
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
 class GeminiAI:
+    """
+    Gemini client over one pooled keep-alive requests.Session
+
+    Connections are reused across calls, so only the first request to the
+    API pays for DNS, TCP and TLS. The pool holds at most GEMINI_POOL_SIZE
+    connections, and callers beyond that wait for a free one. Connect and read
+    timeouts are separate (GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT).
+    Connection errors and RETRYABLE_STATUSES are retried up to
+    GEMINI_MAX_RETRIES times with full-jitter exponential backoff, honouring
+    Retry-After. GEMINI_API_BASE_URL points the client at another server,
+    such as a local stub.
+    """
+
     def __init__(self):
         self.api_key = os.environ.get('GEMINI_API_KEY')
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
+        self.base_url = os.environ.get('GEMINI_API_BASE_URL', DEFAULT_BASE_URL).rstrip('/') + \
+            '/models/gemini-pro:generateContent'
+        self.pool_size = _env_int('GEMINI_POOL_SIZE', 10)
+        self.timeout = (_env_float('GEMINI_CONNECT_TIMEOUT', 3.05), _env_float('GEMINI_READ_TIMEOUT', 10))
+        self.max_retries = _env_int('GEMINI_MAX_RETRIES', 2)
+        self.backoff = _env_float('GEMINI_RETRY_BACKOFF', 0.5)
+        self.max_backoff = _env_float('GEMINI_RETRY_MAX_BACKOFF', 8)
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'retries': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'last_ms': None,
+            'last_error': None
+        }
 
     def is_configured(self) -> bool:
         """Check if Gemini AI is properly configured"""
         return bool(self.api_key)
 
+    def _get_session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                # Retries are done in _post so they can be jittered and counted
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({'Content-Type': 'application/json'})
+                self._session = session
+            return self._session
+
+    def _retry_delay(self, attempt, response=None):
+        """Full-jitter backoff, or the server's Retry-After when it gives one in seconds"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _post(self, payload) -> Optional[dict]:
+        """POST payload to generateContent, retrying transient failures; None when every attempt failed"""
+        session = self._get_session()
+        started = time.perf_counter()
+        result = None
+        error = None
+        retries = 0
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                # Sent as a header so the key stays out of URLs, access logs and exception messages
+                response = session.post(
+                    self.base_url,
+                    headers={'x-goog-api-key': self.api_key},
+                    json=payload,
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = _describe_error(e)
+            except requests.RequestException as e:
+                error = _describe_error(e)
+                break
+            else:
+                if response.status_code == 200:
+                    try:
+                        result = response.json()
+                    except ValueError:
+                        error = 'invalid JSON in response'
+                    break
+                error = f'HTTP {response.status_code}'
+                if response.status_code not in RETRYABLE_STATUSES:
+                    break
+            if attempt < self.max_retries:
+                retries += 1
+                time.sleep(self._retry_delay(attempt, response))
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats['calls'] += 1
+            self._stats['retries'] += retries
+            self._stats['total_ms'] += elapsed_ms
+            self._stats['max_ms'] = max(self._stats['max_ms'], elapsed_ms)
+            self._stats['last_ms'] = round(elapsed_ms, 2)
+            if result is not None:
+                self._stats['succeeded'] += 1
+            else:
+                self._stats['failed'] += 1
+                self._stats['last_error'] = error
+        if result is None:
+            logger.warning('Gemini request failed after %s attempts: %s', retries + 1, error)
+        return result
+
+    def _generate(self, prompt, safety_settings=None) -> Optional[str]:
+        data = {
+            'contents': [{
+                'parts': [{
+                    'text': prompt
+                }]
+            }],
+            'generationConfig': {
+                'temperature': 0.7,
+                'topK': 1,
+                'topP': 1,
+                'maxOutputTokens': 2048,
+            }
+        }
+        if safety_settings:
+            data['safetySettings'] = safety_settings
+
+        result = self._post(data)
+        try:
+            return result['candidates'][0]['content']['parts'][0]['text'].strip()
+        except (TypeError, KeyError, IndexError, AttributeError):
+            return None
+
     def generate_task_description(self, title: str, context: Optional[str] = None) -> Optional[str]:
         """
         Generate a task description using Gemini AI
@@ -42,62 +210,7 @@ Please provide a detailed description that includes:
 
 Keep the description professional, actionable, and under 200 words."""
 
-        try:
-            headers = {
-                'Content-Type': 'application/json',
-            }
-
-            data = {
-                'contents': [{
-                    'parts': [{
-                        'text': prompt
-                    }]
-                }],
-                'generationConfig': {
-                    'temperature': 0.7,
-                    'topK': 1,
-                    'topP': 1,
-                    'maxOutputTokens': 2048,
-                },
-                'safetySettings': [
-                    {
-                        'category': 'HARM_CATEGORY_HARASSMENT',
-                        'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                    },
-                    {
-                        'category': 'HARM_CATEGORY_HATE_SPEECH',
-                        'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                    },
-                    {
-                        'category': 'HARM_CATEGORY_SEXUALLY_EXPLICIT',
-                        'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                    },
-                    {
-                        'category': 'HARM_CATEGORY_DANGEROUS_CONTENT',
-                        'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                    }
-                ]
-            }
-
-            response = requests.post(
-                f"{self.base_url}?key={self.api_key}",
-                headers=headers,
-                json=data,
-                timeout=10
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    candidate = result['candidates'][0]
-                    if 'content' in candidate and 'parts' in candidate['content']:
-                        return candidate['content']['parts'][0]['text'].strip()
-
-            return None
-
-        except Exception as e:
-            print(f"Error generating task description: {str(e)}")
-            return None
+        return self._generate(prompt, SAFETY_SETTINGS)
 
     def improve_task_description(self, title: str, current_description: str) -> Optional[str]:
         """
@@ -126,44 +239,28 @@ Please improve this description by:
 
 Provide only the improved description, nothing else."""
 
-        try:
-            headers = {
-                'Content-Type': 'application/json',
-            }
-
-            data = {
-                'contents': [{
-                    'parts': [{
-                        'text': prompt
-                    }]
-                }],
-                'generationConfig': {
-                    'temperature': 0.7,
-                    'topK': 1,
-                    'topP': 1,
-                    'maxOutputTokens': 2048,
-                }
-            }
+        return self._generate(prompt)
 
-            response = requests.post(
-                f"{self.base_url}?key={self.api_key}",
-                headers=headers,
-                json=data,
-                timeout=10
-            )
+    def stats(self) -> dict:
+        with self._stats_lock:
+            result = dict(self._stats)
+        result['avg_ms'] = round(result['total_ms'] / result['calls'], 2) if result['calls'] else None
+        result['total_ms'] = round(result['total_ms'], 2)
+        result['max_ms'] = round(result['max_ms'], 2)
+        result.update(
+            configured=self.is_configured(),
+            pool_size=self.pool_size,
+            connect_timeout=self.timeout[0],
+            read_timeout=self.timeout[1],
+            max_retries=self.max_retries
+        )
+        return result
 
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    candidate = result['candidates'][0]
-                    if 'content' in candidate and 'parts' in candidate['content']:
-                        return candidate['content']['parts'][0]['text'].strip()
-
-            return None
-
-        except Exception as e:
-            print(f"Error improving task description: {str(e)}")
-            return None
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
 
 # Create a singleton instance
-gemini_ai = GeminiAI()
\ No newline at end of file
+gemini_ai = GeminiAI()
@@ -0,0 +1,48 @@
+import logging
+import queue
+import threading
+from app import db
+
+logger = logging.getLogger(__name__)
+
+class JobWorker:
+    """
+    Runs queued job ids one at a time on a background thread
+
+    Subclasses set ``thread_name`` and implement ``run_job``. The thread is
+    started on the first submit and every job gets its own app context and
+    session.
+    """
+    thread_name = 'job-worker'
+
+    def __init__(self, app):
+        self.app = app
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        self.queue.put(job_id)
+
+    def run_job(self, job_id):
+        raise NotImplementedError
+
+    def _run(self):
+        while True:
+            job_id = self.queue.get()
+            if job_id is None:
+                return
+            with self.app.app_context():
+                try:
+                    self.run_job(job_id)
+                except Exception:
+                    logger.exception('Job %s on %s crashed', job_id, self.thread_name)
+                finally:
+                    db.session.remove()
+
+    def close(self):
+        self.queue.put(None)
@@ -0,0 +1,231 @@
+from datetime import datetime
+import click
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.schema import CreateColumn, CreateTable
+from app import db
+
+# Names of the migrations applied to this database
+schema_migrations = db.Table('schema_migrations',
+    db.Column('name', db.String(100), primary_key=True),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+# (name, step) in the order they must run; steps take a connection inside a transaction
+MIGRATIONS = []
+
+def migration(name):
+    """Register the decorated function as the next migration step"""
+    def register(step):
+        MIGRATIONS.append((name, step))
+        return step
+    return register
+
+def add_column(connection, column):
+    """ALTER TABLE ... ADD COLUMN for a mapped column the table lacks"""
+    table = column.table
+    existing = {info['name'] for info in inspect(connection).get_columns(table.name)}
+    if column.name in existing:
+        return
+    ddl = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {ddl}')
+
+def create_table(connection, table):
+    """Create a mapped table with its indexes unless it exists"""
+    table.create(connection, checkfirst=True)
+
+def create_index(connection, index):
+    """Create a mapped index unless its table already has one by that name"""
+    existing = {info['name'] for info in inspect(connection).get_indexes(index.table.name)}
+    if index.name not in existing:
+        index.create(connection)
+
+def rebuild_sqlite_table(connection, table, min_sequence=0):
+    """
+    Recreate a SQLite table from its model, keeping the rows
+
+    SQLite can't alter a table's AUTOINCREMENT flag or drop constraints in
+    place, so the model's table is created under a temporary name, the
+    shared columns are copied, and it replaces the old one. The id
+    sequence starts above both the copied ids and min_sequence.
+    """
+    existing = [info['name'] for info in inspect(connection).get_columns(table.name)]
+    shared = ', '.join(column.name for column in table.columns if column.name in existing)
+    metadata = MetaData()
+    # Foreign keys compile against their target tables, so those come along
+    for key in table.foreign_keys:
+        if key.column.table.name not in metadata.tables:
+            key.column.table.to_metadata(metadata)
+    temporary = table.to_metadata(metadata, name=f'_new_{table.name}')
+    connection.execute(CreateTable(temporary))
+    connection.exec_driver_sql(
+        f'INSERT INTO {temporary.name} ({shared}) SELECT {shared} FROM {table.name}'
+    )
+    connection.exec_driver_sql(f'DROP TABLE {table.name}')
+    connection.exec_driver_sql(f'ALTER TABLE {temporary.name} RENAME TO {table.name}')
+    for index in table.indexes:
+        create_index(connection, index)
+    if table.dialect_options['sqlite'].get('autoincrement'):
+        updated = connection.exec_driver_sql(
+            'UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (min_sequence, table.name)
+        )
+        if not updated.rowcount:
+            connection.exec_driver_sql(
+                'INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table.name, min_sequence)
+            )
+
+def table_index(table, name):
+    return next(index for index in table.indexes if index.name == name)
+
+def pending_migrations():
+    with db.engine.connect() as connection:
+        if not inspect(connection).has_table(schema_migrations.name):
+            return [name for name, _ in MIGRATIONS]
+        applied = set(connection.execute(db.select(schema_migrations.c.name)).scalars())
+    return [name for name, _ in MIGRATIONS if name not in applied]
+
+def upgrade():
+    """
+    Bring the database schema up to the models
+
+    A database without a users table is created from the models and every
+    step is marked applied. Otherwise each pending step runs in its own
+    transaction and is recorded with it, so a failed step can be re-run
+    once fixed.
+
+    Returns:
+        names of the steps applied
+    """
+    engine = db.engine
+    with engine.begin() as connection:
+        if not inspect(connection).has_table('users'):
+            db.metadata.create_all(connection)
+            now = datetime.utcnow()
+            connection.execute(schema_migrations.insert(), [
+                {'name': name, 'applied_at': now} for name, _ in MIGRATIONS
+            ])
+            return []
+        schema_migrations.create(connection, checkfirst=True)
+
+    applied = []
+    steps = dict(MIGRATIONS)
+    for name in pending_migrations():
+        with engine.begin() as connection:
+            steps[name](connection)
+            connection.execute(schema_migrations.insert().values(name=name, applied_at=datetime.utcnow()))
+        applied.append(name)
+    return applied
+
+@migration('0001_tasks_version')
+def _tasks_version(connection):
+    from app.models.task import Task
+    add_column(connection, Task.__table__.c.version)
+
+@migration('0002_task_audits_autoincrement')
+def _task_audits_autoincrement(connection):
+    # Archiving deletes the newest-id rows too, and SQLite would hand those ids out again
+    if connection.dialect.name != 'sqlite':
+        return
+    from app.models.audit import TaskAudit
+    from app.services.audit_archive import max_archived_audit_id
+    rebuild_sqlite_table(connection, TaskAudit.__table__, min_sequence=max_archived_audit_id())
+
+@migration('0003_task_audits_changes')
+def _task_audits_changes(connection):
+    from app.models.audit import TaskAudit
+    add_column(connection, TaskAudit.__table__.c.changes)
+
+@migration('0004_audit_dimensions')
+def _audit_dimensions(connection):
+    # Rows written before this keep their strings in ip_address and user_agent
+    from app.models.audit import TaskAudit, AuditUserAgent, AuditIpAddress
+    create_table(connection, AuditUserAgent.__table__)
+    create_table(connection, AuditIpAddress.__table__)
+    add_column(connection, TaskAudit.__table__.c.ip_address_id)
+    add_column(connection, TaskAudit.__table__.c.user_agent_id)
+
+@migration('0005_task_audits_timeline_indexes')
+def _task_audits_timeline_indexes(connection):
+    from app.models.audit import TaskAudit
+    for name in ('ix_task_audits_task_timeline', 'ix_task_audits_timeline',
+                 'ix_task_audits_user_timeline', 'ix_task_audits_action_timeline'):
+        create_index(connection, table_index(TaskAudit.__table__, name))
+
+@migration('0006_task_snapshots')
+def _task_snapshots(connection):
+    # Tasks without a snapshot are rebuilt by walking back from their current row
+    from app.models.audit import TaskSnapshot
+    create_table(connection, TaskSnapshot.__table__)
+
+@migration('0007_task_audits_drop_task_fk')
+def _task_audits_drop_task_fk(connection):
+    # The audit trail outlives deleted tasks. SQLite lost this key in the 0002 rebuild
+    if connection.dialect.name == 'sqlite':
+        return
+    for key in inspect(connection).get_foreign_keys('task_audits'):
+        if key['referred_table'] == 'tasks' and key['name']:
+            connection.exec_driver_sql(f'ALTER TABLE task_audits DROP CONSTRAINT {key["name"]}')
+
+@migration('0008_users_created_timeline')
+def _users_created_timeline(connection):
+    from app.models.user import User
+    create_index(connection, table_index(User.__table__, 'ix_users_created_timeline'))
+
+@migration('0009_tasks_board_status')
+def _tasks_board_status(connection):
+    from app.models.task import Task
+    create_index(connection, table_index(Task.__table__, 'ix_tasks_board_status'))
+
+@migration('0010_pending_delete')
+def _pending_delete(connection):
+    from app.models.board import Board
+    from app.models.purge import PurgeJob
+    from app.models.user import User
+    add_column(connection, User.__table__.c.pending_delete)
+    add_column(connection, Board.__table__.c.pending_delete)
+    create_table(connection, PurgeJob.__table__)
+
+@migration('0011_counters')
+def _counters(connection):
+    # Rows are seeded from full counts by the first read_counters()
+    from app.models.board import Board
+    from app.models.counter import Counter
+    create_table(connection, Counter.__table__)
+    create_index(connection, table_index(Board.__table__, 'ix_boards_created_timeline'))
+
+@migration('0012_board_task_counts')
+def _board_task_counts(connection):
+    from app.models.board import Board
+    from app.services.board_counters import recount_boards
+    for name in ('task_count', 'completed_count', 'open_count'):
+        add_column(connection, Board.__table__.c[name])
+    first, last = connection.execute(db.select(db.func.min(Board.id), db.func.max(Board.id))).one()
+    if first is not None:
+        recount_boards(connection, first, last)
+
+@migration('0013_tasks_archive')
+def _tasks_archive(connection):
+    from app.models.task import Task, TaskArchive, task_tags_archive
+    create_table(connection, TaskArchive.__table__)
+    create_table(connection, task_tags_archive)
+    if connection.dialect.name == 'sqlite':
+        # Restoring puts a task back under its id, so SQLite must not hand out
+        # ids of archived tasks again; the rebuild also adds archived_at and its index
+        archived = connection.execute(db.select(db.func.max(TaskArchive.id))).scalar() or 0
+        rebuild_sqlite_table(connection, Task.__table__, min_sequence=archived)
+        return
+    add_column(connection, Task.__table__.c.archived_at)
+    create_index(connection, table_index(Task.__table__, 'ix_tasks_status_archived'))
+
+@migration('0014_user_import_jobs')
+def _user_import_jobs(connection):
+    from app.models.user_import import UserImportJob
+    create_table(connection, UserImportJob.__table__)
+
+def init_migrations(app):
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """Create missing tables and apply pending schema migrations."""
+        applied = upgrade()
+        for name in applied:
+            click.echo(f'Applied {name}')
+        click.echo('Database is up to date.' if not applied else f'Applied {len(applied)} migrations.')
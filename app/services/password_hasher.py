@@ -0,0 +1,189 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+def _mp_context(start_method=None):
+    """
+    The multiprocessing context for worker processes
+
+    Defaults to forkserver where the platform has it, else spawn: forking
+    a threaded server copies whatever locks other threads held at that
+    moment into the child.
+    """
+    if start_method is None:
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(start_method)
+
+class PasswordHasher:
+    """
+    Runs Werkzeug password hashing in a bounded worker pool
+
+    Hashing is CPU-bound, so a login burst on the request threads stalls
+    every other request. Here at most ``max_pending`` hashes are submitted
+    at once, the rest wait for a slot, and ``workers`` processes do the
+    work. Where processes can't be started (some serverless runtimes lack
+    the shared memory multiprocessing needs) a thread pool is used instead;
+    hashlib releases the GIL while hashing, so that still keeps the CPU
+    work off the interpreter lock.
+
+    Workers receive Werkzeug's own functions, which pickle by reference to
+    an importable module, so spawned workers never import this file.
+    """
+
+    def __init__(self, method='pbkdf2', workers=None, max_pending=None, start_method=None):
+        self.method = method
+        self.start_method = start_method
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        # The parameter prefix Werkzeug writes for this method, e.g. 'pbkdf2:sha256:600000'
+        self.current_params = generate_password_hash('', method=method).split('$', 1)[0]
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._pool_kind = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'hashed': 0,
+            'verified': 0,
+            'rehashed': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'waiting': 0,
+            'max_waiting': 0,
+            'total_wait_ms': 0.0,
+            'total_run_ms': 0.0
+        }
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                try:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=_mp_context(self.start_method)
+                    )
+                    self._pool_kind = 'process'
+                except (OSError, NotImplementedError, ImportError) as e:
+                    logger.warning('Process pool unavailable (%s), hashing passwords in threads', e)
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                    self._pool_kind = 'thread'
+            return self._pool
+
+    def _run(self, fn, *args):
+        queued = time.perf_counter()
+        with self._stats_lock:
+            self._stats['waiting'] += 1
+            self._stats['max_waiting'] = max(self._stats['max_waiting'], self._stats['waiting'])
+        self._slots.acquire()
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._stats['waiting'] -= 1
+            self._stats['in_flight'] += 1
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats['in_flight'])
+            self._stats['total_wait_ms'] += (started - queued) * 1000
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            with self._stats_lock:
+                self._stats['in_flight'] -= 1
+                self._stats['total_run_ms'] += (time.perf_counter() - started) * 1000
+
+    def hash(self, password):
+        result = self._run(generate_password_hash, password, self.method)
+        with self._stats_lock:
+            self._stats['hashed'] += 1
+        return result
+
+    def verify(self, pwhash, password):
+        result = self._run(check_password_hash, pwhash, password)
+        with self._stats_lock:
+            self._stats['verified'] += 1
+        return result
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch of passwords in parallel, in input order
+
+        A batch never holds more than half of the pool slots, so logins keep
+        being served while a large import is hashing.
+        """
+        batch_slots = threading.BoundedSemaphore(max(1, self.max_pending // 2))
+
+        def release(_):
+            self._slots.release()
+            batch_slots.release()
+
+        executor = self._executor()
+        futures = []
+        for password in passwords:
+            batch_slots.acquire()
+            self._slots.acquire()
+            try:
+                future = executor.submit(generate_password_hash, password, self.method)
+            except Exception:
+                release(None)
+                raise
+            future.add_done_callback(release)
+            futures.append(future)
+        results = [future.result() for future in futures]
+        with self._stats_lock:
+            self._stats['hashed'] += len(results)
+        return results
+
+    def needs_rehash(self, pwhash):
+        """True when pwhash was made with different cost parameters than the configured ones"""
+        return pwhash.split('$', 1)[0] != self.current_params
+
+    def count_rehash(self):
+        with self._stats_lock:
+            self._stats['rehashed'] += 1
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def stats(self):
+        with self._stats_lock:
+            result = dict(self._stats)
+        calls = result['hashed'] + result['verified']
+        result['avg_wait_ms'] = round(result['total_wait_ms'] / calls, 2) if calls else None
+        result['avg_run_ms'] = round(result['total_run_ms'] / calls, 2) if calls else None
+        result['total_wait_ms'] = round(result['total_wait_ms'], 2)
+        result['total_run_ms'] = round(result['total_run_ms'], 2)
+        result.update(
+            pool=self._pool_kind,
+            workers=self.workers,
+            max_pending=self.max_pending,
+            params=self.current_params
+        )
+        return result
+
+def init_password_hasher(app):
+    """
+    Create the hashing pool
+
+    Configured by PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING and PASSWORD_HASH_START_METHOD.
+    """
+    hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2'),
+        workers=app.config.get('PASSWORD_HASH_WORKERS'),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING'),
+        start_method=app.config.get('PASSWORD_HASH_START_METHOD')
+    )
+    atexit.register(hasher.close)
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+def get_password_hasher():
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,225 @@
+import atexit
+import logging
+from datetime import datetime
+import click
+from flask import current_app
+from app import db
+from app.models.audit import TaskAudit, TaskSnapshot
+from app.models.board import Board, BoardAccess
+from app.models.purge import PurgeJob
+from app.models.task import Task, TaskArchive, task_tags, task_tags_archive
+from app.models.user import User
+from app.services.board_access import note_access_changed
+from app.services.board_counters import add_task_delta, adjust_board_counts
+from app.services.counters import adjust_counters
+from app.services.job_worker import JobWorker
+
+logger = logging.getLogger(__name__)
+
+def _delete_by_ids(table, condition, chunk_size):
+    """
+    Delete rows matching condition in primary-key chunks, committing each
+
+    Returns:
+        number of rows deleted
+    """
+    deleted = 0
+    while True:
+        ids = db.session.execute(
+            db.select(table.c.id).where(condition).order_by(table.c.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+        db.session.execute(table.delete().where(table.c.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+def _purge_tasks(job, condition, chunk_size):
+    """Remove tasks matching condition with their tag links, audits and snapshots"""
+    tasks = Task.__table__
+    audits = TaskAudit.__table__
+    snapshots = TaskSnapshot.__table__
+    while True:
+        rows = db.session.execute(
+            db.select(tasks.c.id, tasks.c.board_id, tasks.c.status)
+            .where(condition).order_by(tasks.c.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        ids = [row.id for row in rows]
+        # A task can have a long history, so its audits are removed in chunks of their own
+        job.deleted_audits += _delete_by_ids(audits, audits.c.task_id.in_(ids), chunk_size)
+        _delete_by_ids(snapshots, snapshots.c.task_id.in_(ids), chunk_size)
+        db.session.execute(task_tags.delete().where(task_tags.c.task_id.in_(ids)))
+        db.session.execute(tasks.delete().where(tasks.c.id.in_(ids)))
+        adjust_counters(db.session, {'tasks': -len(ids)})
+        board_deltas = {}
+        for row in rows:
+            add_task_delta(board_deltas, row.board_id, row.status, -1)
+        adjust_board_counts(db.session, board_deltas)
+        job.deleted_tasks += len(ids)
+        db.session.commit()
+
+def _purge_archived_tasks(job, condition, chunk_size):
+    """Remove tasks_archive rows matching condition with their tag links, audits and snapshots"""
+    archive = TaskArchive.__table__
+    audits = TaskAudit.__table__
+    snapshots = TaskSnapshot.__table__
+    while True:
+        ids = db.session.execute(
+            db.select(archive.c.id).where(condition).order_by(archive.c.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return
+        job.deleted_audits += _delete_by_ids(audits, audits.c.task_id.in_(ids), chunk_size)
+        _delete_by_ids(snapshots, snapshots.c.task_id.in_(ids), chunk_size)
+        db.session.execute(task_tags_archive.delete().where(task_tags_archive.c.task_id.in_(ids)))
+        db.session.execute(archive.delete().where(archive.c.id.in_(ids)))
+        job.deleted_tasks += len(ids)
+        db.session.commit()
+
+def _purge_board(job, board_id, chunk_size):
+    _purge_tasks(job, Task.__table__.c.board_id == board_id, chunk_size)
+    _purge_archived_tasks(job, TaskArchive.__table__.c.board_id == board_id, chunk_size)
+
+    access = BoardAccess.__table__
+    members = db.session.execute(
+        db.select(access.c.user_id).where(access.c.board_id == board_id)
+    ).scalars().all()
+    board = db.session.execute(
+        db.select(Board.owner_id, Board.is_active).where(Board.id == board_id)
+    ).first()
+    if board is None:
+        return
+    note_access_changed(board_id, list(members) + [board.owner_id])
+    db.session.execute(access.delete().where(access.c.board_id == board_id))
+    db.session.execute(Board.__table__.delete().where(Board.__table__.c.id == board_id))
+    adjust_counters(db.session, {'active_boards': -1 if board.is_active else 0})
+    job.deleted_boards += 1
+    db.session.commit()
+
+def _purge_user(job, user_id, chunk_size):
+    board_ids = db.session.execute(db.select(Board.id).where(Board.owner_id == user_id)).scalars().all()
+    for board_id in board_ids:
+        _purge_board(job, board_id, chunk_size)
+
+    # Tasks the user created on other people's boards
+    _purge_tasks(job, Task.__table__.c.user_id == user_id, chunk_size)
+    _purge_archived_tasks(job, TaskArchive.__table__.c.user_id == user_id, chunk_size)
+    audits = TaskAudit.__table__
+    job.deleted_audits += _delete_by_ids(audits, audits.c.user_id == user_id, chunk_size)
+
+    access = BoardAccess.__table__
+    for board_id in db.session.execute(
+        db.select(access.c.board_id).where(access.c.user_id == user_id)
+    ).scalars():
+        note_access_changed(board_id, [user_id])
+    db.session.execute(access.delete().where(access.c.user_id == user_id))
+    db.session.execute(access.update().where(access.c.granted_by_id == user_id).values(granted_by_id=None))
+    is_admin = db.session.execute(db.select(User.is_admin).where(User.id == user_id)).scalar()
+    if is_admin is not None:
+        db.session.execute(User.__table__.delete().where(User.__table__.c.id == user_id))
+        adjust_counters(db.session, {'users': -1, 'non_admin_users': 0 if is_admin else -1})
+    db.session.commit()
+
+def _count_tasks(job):
+    total = 0
+    for model in (Task, TaskArchive):
+        if job.entity_type == 'board':
+            condition = model.board_id == job.entity_id
+        else:
+            owned = db.select(Board.id).where(Board.owner_id == job.entity_id)
+            condition = db.or_(model.user_id == job.entity_id, model.board_id.in_(owned))
+        total += db.session.query(db.func.count(model.id)).filter(condition).scalar() or 0
+    return total
+
+def run_purge_job(job_id, chunk_size=None):
+    """
+    Carry out a purge job; safe to re-run after an interruption
+
+    Every chunk commits on its own and progress is saved with it, so a job
+    that dies part-way is resumed by running it again.
+    """
+    if chunk_size is None:
+        chunk_size = current_app.config.get('PURGE_CHUNK_SIZE', 500)
+    job = db.session.get(PurgeJob, job_id)
+    if job is None or job.status == 'done':
+        return job
+
+    job.status = 'running'
+    job.started_at = job.started_at or datetime.utcnow()
+    job.total_tasks = max(job.total_tasks, job.deleted_tasks + _count_tasks(job))
+    job.error = None
+    db.session.commit()
+
+    try:
+        if job.entity_type == 'board':
+            _purge_board(job, job.entity_id, chunk_size)
+        elif job.entity_type == 'user':
+            _purge_user(job, job.entity_id, chunk_size)
+        else:
+            raise ValueError(f'Unknown purge entity {job.entity_type!r}')
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        logger.exception('Purge job %s failed', job_id)
+        db.session.rollback()
+        job = db.session.get(PurgeJob, job_id)
+        job.status = 'failed'
+        job.error = f'{e.__class__.__name__}: {e}'
+        db.session.commit()
+    return job
+
+def request_purge(entity, requested_by_id=None):
+    """
+    Mark a user or board pending-delete and create the job that removes it
+
+    A user's own boards are marked too, so they turn read-only in the same
+    transaction rather than whenever the job reaches them. The change is
+    only staged; the caller commits and then passes the job to
+    ``get_purge_worker().submit``.
+    """
+    if isinstance(entity, Board):
+        entity_type, name = 'board', entity.name
+        entity.is_active = False
+    else:
+        entity_type, name = 'user', entity.username
+        for board in Board.query.filter_by(owner_id=entity.id, pending_delete=False):
+            board.pending_delete = True
+            board.is_active = False
+    entity.pending_delete = True
+    job = PurgeJob(
+        entity_type=entity_type,
+        entity_id=entity.id,
+        entity_name=name,
+        requested_by_id=requested_by_id
+    )
+    db.session.add(job)
+    return job
+
+class PurgeWorker(JobWorker):
+    """Runs purge jobs one at a time on a background thread"""
+    thread_name = 'purge-worker'
+
+    def run_job(self, job_id):
+        run_purge_job(job_id)
+
+def init_purge_worker(app):
+    worker = PurgeWorker(app)
+    atexit.register(worker.close)
+    app.extensions['purge_worker'] = worker
+
+    @app.cli.command('run-purges')
+    def run_purges_command():
+        """Run pending, interrupted and failed purge jobs to completion."""
+        jobs = PurgeJob.query.filter(PurgeJob.status != 'done').order_by(PurgeJob.id).all()
+        for job_id in [job.id for job in jobs]:
+            job = run_purge_job(job_id)
+            click.echo(f'{job.entity_type} {job.entity_id}: {job.status} '
+                       f'({job.deleted_tasks} tasks, {job.deleted_audits} audits)')
+
+    return worker
+
+def get_purge_worker():
+    return current_app.extensions['purge_worker']
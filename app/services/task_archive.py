@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.models.task import Task, TaskArchive, task_tags, task_tags_archive
+from app.services.board_counters import add_task_delta, adjust_board_counts
+from app.services.counters import adjust_counters
+
+# Columns tasks and tasks_archive share, in the order both INSERT ... SELECTs use
+MOVED_COLUMNS = tuple(column.name for column in Task.__table__.columns)
+
+def _stamp_archived_at(target, value, oldvalue, initiator):
+    if value == 'archived':
+        if oldvalue != 'archived':
+            target.archived_at = datetime.utcnow()
+    elif oldvalue == 'archived':
+        target.archived_at = None
+
+def _eligible(cutoff):
+    """Hot tasks archived before cutoff; rows archived before archived_at existed fall back to updated_at"""
+    return db.and_(
+        Task.status == 'archived',
+        db.or_(
+            Task.archived_at < cutoff,
+            db.and_(Task.archived_at.is_(None), Task.updated_at < cutoff)
+        )
+    )
+
+def move_archived_tasks(older_than_days=None, chunk_size=None):
+    """
+    Move tasks archived longer than TASK_ARCHIVE_AFTER_DAYS into tasks_archive
+
+    Each chunk copies tasks and their tag links with INSERT ... SELECT,
+    deletes them from the hot tables and adjusts the counters in one
+    transaction, so a chunk is either fully moved or not at all.
+
+    Returns:
+        number of tasks moved
+    """
+    if older_than_days is None:
+        older_than_days = current_app.config.get('TASK_ARCHIVE_AFTER_DAYS', 30)
+    if chunk_size is None:
+        chunk_size = current_app.config.get('TASK_ARCHIVE_CHUNK_SIZE', 500)
+
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    hot = Task.__table__
+    cold = TaskArchive.__table__
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            db.select(hot.c.id, hot.c.board_id, hot.c.status)
+            .where(_eligible(cutoff)).order_by(hot.c.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            return moved
+        ids = [row.id for row in rows]
+        now = datetime.utcnow()
+
+        db.session.execute(cold.insert().from_select(
+            MOVED_COLUMNS + ('moved_at',),
+            db.select(*[hot.c[name] for name in MOVED_COLUMNS], db.literal(now, db.DateTime))
+            .where(hot.c.id.in_(ids))
+        ))
+        db.session.execute(task_tags_archive.insert().from_select(
+            ('task_id', 'tag_id'),
+            db.select(task_tags.c.task_id, task_tags.c.tag_id).where(task_tags.c.task_id.in_(ids))
+        ))
+        db.session.execute(task_tags.delete().where(task_tags.c.task_id.in_(ids)))
+        db.session.execute(hot.delete().where(hot.c.id.in_(ids)))
+
+        # The counters describe the hot table, which these rows just left
+        deltas = {}
+        for row in rows:
+            add_task_delta(deltas, row.board_id, row.status, -1)
+        adjust_board_counts(db.session, deltas)
+        adjust_counters(db.session, {'tasks': -len(ids)})
+        db.session.commit()
+        moved += len(ids)
+
+def restore_archived_task(task_id):
+    """
+    Move one task back from tasks_archive into tasks; the caller commits
+
+    The task keeps status archived with a fresh archived_at, so it stays
+    hot for a full retention period after being restored.
+
+    Returns:
+        True when the task was found in the archive
+
+    Raises:
+        ValueError: a hot task already has the id, which only happens on a
+            database whose tasks ids were handed out again before
+            migration 0013
+    """
+    hot = Task.__table__
+    cold = TaskArchive.__table__
+    row = db.session.execute(db.select(cold.c.board_id, cold.c.status).where(cold.c.id == task_id)).first()
+    if row is None:
+        return False
+    if db.session.execute(db.select(hot.c.id).where(hot.c.id == task_id)).first() is not None:
+        raise ValueError(f'Task id {task_id} is in use by another task')
+
+    db.session.execute(hot.insert().from_select(
+        MOVED_COLUMNS,
+        db.select(*[
+            db.literal(datetime.utcnow(), db.DateTime).label('archived_at') if name == 'archived_at' else cold.c[name]
+            for name in MOVED_COLUMNS
+        ]).where(cold.c.id == task_id)
+    ))
+    db.session.execute(task_tags.insert().from_select(
+        ('task_id', 'tag_id'),
+        db.select(task_tags_archive.c.task_id, task_tags_archive.c.tag_id)
+        .where(task_tags_archive.c.task_id == task_id)
+    ))
+    db.session.execute(task_tags_archive.delete().where(task_tags_archive.c.task_id == task_id))
+    db.session.execute(cold.delete().where(cold.c.id == task_id))
+
+    deltas = {}
+    add_task_delta(deltas, row.board_id, row.status, 1)
+    adjust_board_counts(db.session, deltas)
+    adjust_counters(db.session, {'tasks': 1})
+    return True
+
+def init_task_archive(app):
+    """Stamp Task.archived_at on status changes and add `flask archive-tasks`"""
+    if not event.contains(Task.status, 'set', _stamp_archived_at):
+        event.listen(Task.status, 'set', _stamp_archived_at)
+
+    @app.cli.command('archive-tasks')
+    @click.option('--days', type=int, default=None, help='Move tasks archived longer than this many days.')
+    @click.option('--chunk-size', type=int, default=None, help='Tasks moved per transaction.')
+    def archive_tasks_command(days, chunk_size):
+        """Move long-archived tasks from tasks into tasks_archive."""
+        count = move_archived_tasks(older_than_days=days, chunk_size=chunk_size)
+        click.echo(f'Moved {count} tasks to the archive.')
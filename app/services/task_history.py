@@ -0,0 +1,251 @@
+import json
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models.audit import TaskAudit, TaskSnapshot
+from app.models.task import Task, TaskArchive, Tag, task_tags, task_tags_archive
+from app.services.audit_archive import archived_through, archived_audits_between
+from app.utils.audit_diff import decode_changes, apply_change_forward, expand_changes
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+# Task fields captured in snapshots, in the string form audit rows record them
+STATE_FIELDS = ['title', 'description', 'due_date', 'priority', 'status']
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def state_from_values(values, tag_names):
+    """Snapshot-ready dict built from column values and tag names"""
+    state = {}
+    for field in STATE_FIELDS:
+        value = values.get(field)
+        if field == 'due_date':
+            value = value.isoformat() if value else None
+        state[field] = str(value) if value is not None else None
+    state['board_id'] = values.get('board_id')
+    state['tags'] = sorted(tag_names)
+    completed_at = values.get('completed_at')
+    state['completed_at'] = completed_at.isoformat() if completed_at else None
+    return state
+
+def capture_state(task):
+    """Snapshot-ready dict of a task's current values"""
+    values = {field: getattr(task, field) for field in STATE_FIELDS + ['board_id', 'completed_at']}
+    return state_from_values(values, [tag.name for tag in task.tags])
+
+def snapshot_due(version):
+    """True when a task reaching ``version`` lands on a snapshot boundary"""
+    interval = current_app.config.get('AUDIT_SNAPSHOT_INTERVAL', 20)
+    return (version or 0) % interval == 0
+
+def _set_field(state, field, value):
+    # Audit rows record tags as a comma-separated string; states keep a list
+    if field == 'tags':
+        value = [name for name in (value or '').split(', ') if name]
+    state[field] = value
+
+def _replay(state, audit):
+    """Apply one audit row, oldest first, to a reconstructed state"""
+    changes = decode_changes(audit.changes)
+    status = state.get('status')
+    if audit.field_name:
+        _set_field(state, audit.field_name, audit.new_value)
+    for field, change in changes.items():
+        current = state.get(field)
+        if field == 'tags' and current is not None:
+            current = ', '.join(current)
+        value = apply_change_forward(current, change)
+        if value is None and not isinstance(change, list):
+            state['complete'] = False
+        _set_field(state, field, value)
+    if audit.action in ('completed', 'archived') and not changes:
+        # Rows written before capture moved to flush events carry no diff
+        state['status'] = audit.action
+    elif audit.action == 'deleted':
+        state['deleted'] = True
+    if state.get('status') != status:
+        # Every writer stamps completed_at as the status changes and clears it otherwise
+        state['completed_at'] = audit.timestamp.isoformat() if state.get('status') == 'completed' else None
+
+def _with_archived(task_id, audits, after, until, archived_until):
+    """
+    Merge a task's archived rows inside (after, until] into its live ones, oldest first
+
+    Rows left live by an interrupted archive run are in both, so ids decide.
+    """
+    if archived_until is None or (after is not None and after >= archived_until):
+        return audits
+    live_ids = {audit.id for audit in audits}
+    merged = audits + [
+        audit for audit in archived_audits_between(task_id, after, until) if audit.id not in live_ids
+    ]
+    merged.sort(key=lambda audit: (audit.timestamp, audit.id))
+    return merged
+
+def _current_states(task_ids):
+    """Snapshot-style states of tasks as they stand now, hot or moved to tasks_archive"""
+    states = {}
+    for model, links in ((Task, task_tags), (TaskArchive, task_tags_archive)):
+        for chunk in _chunks(task_id for task_id in task_ids if task_id not in states):
+            rows = db.session.query(
+                *[getattr(model, field) for field in STATE_FIELDS + ['id', 'board_id', 'completed_at', 'created_at']]
+            ).filter(model.id.in_(chunk)).all()
+            if not rows:
+                continue
+            tag_names = defaultdict(list)
+            tag_rows = db.session.query(links.c.task_id, Tag.name)\
+                .join(Tag, Tag.id == links.c.tag_id).filter(links.c.task_id.in_(chunk))
+            for task_id, name in tag_rows:
+                tag_names[task_id].append(name)
+            for row in rows:
+                state = state_from_values(row._asdict(), tag_names[row.id])
+                states[row.id] = (state, row.created_at)
+    return states
+
+def _unwind_from_current(task_ids, at, archived_until):
+    """
+    Reconstruct tasks that have no snapshot at or before ``at``
+
+    These predate snapshots, so history is walked backwards from the
+    current row, in tasks or tasks_archive. Tasks created after ``at`` are
+    left out.
+    """
+    states = {}
+    current_states = _current_states(task_ids)
+    if not current_states:
+        return states
+
+    newer = defaultdict(list)
+    for chunk in _chunks(current_states):
+        audits = TaskAudit.query.filter(TaskAudit.task_id.in_(chunk), TaskAudit.timestamp > at)\
+            .order_by(TaskAudit.timestamp, TaskAudit.id)
+        for audit in audits:
+            newer[audit.task_id].append(audit)
+
+    for task_id, (state, created_at) in current_states.items():
+        audits = _with_archived(task_id, newer.get(task_id, []), at, None, archived_until)
+        audits.reverse()
+        if any(audit.action == 'created' for audit in audits):
+            continue
+        if not audits and created_at and created_at > at:
+            continue
+        state['complete'] = True
+        current = {field: state[field] for field in STATE_FIELDS}
+        current['board_id'] = str(state['board_id'])
+        current['tags'] = ', '.join(state['tags'])
+        for audit, fields in expand_changes(audits, current):
+            if audit.action in ('completed', 'archived') and not audit.changes:
+                # Older status-only rows never recorded the previous status
+                state['complete'] = False
+            for field, old, new, change in fields:
+                if isinstance(change, dict) and old is None and new is None:
+                    state['complete'] = False
+                _set_field(state, field, old)
+                if field == 'status' and old != new:
+                    # The earlier completion time isn't on the rows being walked
+                    state['completed_at'] = None
+                    if old == 'completed':
+                        state['complete'] = False
+        states[task_id] = state
+    return states
+
+def reconstruct_tasks(task_ids, at):
+    """
+    Rebuild task state as of ``at`` for many tasks with batched queries
+
+    Each task starts from its newest snapshot at or before ``at`` and replays
+    only the audit rows written since, so the work per task is bounded by
+    AUDIT_SNAPSHOT_INTERVAL rather than by its full history. Audit rows
+    moved to the archive files are read when the window reaches them.
+
+    Returns:
+        {task_id: state} for tasks that existed at ``at``; a state has
+        complete=False when part of it could not be recovered
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    archived_until = archived_through()
+    snapshots = {}
+    states = {}
+    for chunk in _chunks(task_ids):
+        latest = db.session.query(
+            TaskSnapshot.task_id, func.max(TaskSnapshot.taken_at).label('taken_at')
+        ).filter(TaskSnapshot.task_id.in_(chunk), TaskSnapshot.taken_at <= at)\
+            .group_by(TaskSnapshot.task_id).subquery()
+        rows = TaskSnapshot.query.join(
+            latest,
+            db.and_(TaskSnapshot.task_id == latest.c.task_id, TaskSnapshot.taken_at == latest.c.taken_at)
+        ).order_by(TaskSnapshot.id).all()
+        if not rows:
+            continue
+        for snapshot in rows:
+            snapshots[snapshot.task_id] = snapshot
+
+        # Each task replays only the rows after its own snapshot
+        since = defaultdict(list)
+        audits = TaskAudit.query\
+            .join(latest, TaskAudit.task_id == latest.c.task_id)\
+            .filter(TaskAudit.timestamp > latest.c.taken_at, TaskAudit.timestamp <= at)\
+            .order_by(TaskAudit.task_id, TaskAudit.timestamp, TaskAudit.id)
+        for audit in audits:
+            since[audit.task_id].append(audit)
+
+        for task_id in chunk:
+            snapshot = snapshots.get(task_id)
+            if snapshot is None:
+                continue
+            state = json.loads(snapshot.state)
+            state['complete'] = True
+            for audit in _with_archived(task_id, since[task_id], snapshot.taken_at, at, archived_until):
+                _replay(state, audit)
+            states[task_id] = state
+
+    missing = [task_id for task_id in task_ids if task_id not in snapshots]
+    if missing:
+        states.update(_unwind_from_current(missing, at, archived_until))
+
+    result = {}
+    for task_id, state in states.items():
+        if state.pop('deleted', False):
+            continue
+        if state.get('board_id') is not None:
+            state['board_id'] = int(state['board_id'])
+        state['id'] = task_id
+        result[task_id] = state
+    return result
+
+def reconstruct_task(task_id, at):
+    return reconstruct_tasks([task_id], at).get(task_id)
+
+def _moved_through(board_id):
+    """Ids of tasks whose recorded board_id changes name the board on either side"""
+    value = json.dumps(str(board_id))
+    moves = db.or_(
+        db.and_(TaskAudit.field_name == 'board_id',
+                db.or_(TaskAudit.old_value == str(board_id), TaskAudit.new_value == str(board_id))),
+        TaskAudit.changes.like(f'%"board_id":[{value},%'),
+        TaskAudit.changes.like(f'%"board_id":[%,{value}]%')
+    )
+    return db.session.query(TaskAudit.task_id).filter(TaskAudit.action == 'updated', moves).distinct()
+
+def reconstruct_board(board_id, at):
+    """States as of ``at`` of every task that was on the board at that time"""
+    candidates = {task_id for (task_id,) in db.session.query(Task.id).filter(Task.board_id == board_id)}
+    candidates.update(
+        task_id for (task_id,) in db.session.query(TaskArchive.id).filter(TaskArchive.board_id == board_id)
+    )
+    candidates.update(
+        task_id for (task_id,) in db.session.query(TaskSnapshot.task_id)
+        .filter(TaskSnapshot.board_id == board_id, TaskSnapshot.taken_at <= at).distinct()
+    )
+    # Tasks moved onto the board after their last snapshot, or off it since
+    candidates.update(task_id for (task_id,) in _moved_through(board_id))
+    states = reconstruct_tasks(candidates, at)
+    return sorted(
+        (state for state in states.values() if state.get('board_id') == board_id),
+        key=lambda state: state['id']
+    )
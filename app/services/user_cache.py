@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from app import db
+from app.models.user import User
+from app.services.cache_versions import USER_CACHE_VERSION, bump_cache_version, read_cache_version
+
+INVALIDATED_KEY = 'invalidated_user_ids'
+
+# The only fields most requests read from current_user
+CACHED_FIELDS = ('id', 'username', 'is_admin')
+
+# Changes to these make a cached identity stale in every process
+STAMPED_FIELDS = ('username', 'is_admin', 'pending_delete')
+
+class CachedUser(UserMixin):
+    """
+    current_user rebuilt from the identity cache
+
+    id, username, is_admin and is_active are served from the cache. Reading
+    or setting anything else loads the real User once per request and
+    forwards to it, so profile pages and password changes work unchanged.
+    """
+
+    def __init__(self, id, username, is_admin, is_active):
+        self.__dict__.update(id=id, username=username, is_admin=is_admin, _is_active=is_active, _user=None)
+
+    @property
+    def is_active(self):
+        # Overrides UserMixin's, which is always True
+        return self._is_active
+
+    def _load(self):
+        if self._user is None:
+            self.__dict__['_user'] = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+        if name in CACHED_FIELDS:
+            self.__dict__[name] = value
+
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+class UserIdentityCache:
+    """
+    Bounded LRU of user identities with a TTL
+
+    Entries are dropped as soon as a flush touches the user and again when
+    that transaction commits, so this process never serves a stale identity
+    after an edit. The same transaction bumps the shared user cache stamp
+    (see app.services.cache_versions), and entries loaded under an older
+    stamp are reloaded, so other worker processes stop serving a demoted or
+    deactivated user on their next request rather than after the TTL.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """Return a CachedUser, or None when the user is gone or being deleted"""
+        now = time.monotonic()
+        # Read before any load, so a row loaded after a bump is never stored under the newer stamp
+        version = read_cache_version(USER_CACHE_VERSION)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now and entry[1] == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return CachedUser(*entry[2])
+            self.misses += 1
+
+        row = db.session.query(User.id, User.username, User.is_admin, User.pending_delete)\
+            .filter(User.id == user_id).first()
+        if row is None or row.pending_delete:
+            self.invalidate([user_id])
+            return None
+        fields = (row.id, row.username, row.is_admin, not row.pending_delete)
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, version, fields)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return CachedUser(*fields)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {'cached': size, 'capacity': self.max_size, 'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
+def _current_cache():
+    # Listeners are registered once per process and serve whichever app is active
+    return current_app.extensions.get('user_cache') if has_app_context() else None
+
+def _evict(connection, target, stale):
+    cache = _current_cache()
+    if cache is not None:
+        cache.invalidate([target.id])
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(INVALIDATED_KEY, set()).add(target.id)
+        if stale:
+            bump_cache_version(session, USER_CACHE_VERSION, connection)
+
+def _user_changed(mapper, connection, target):
+    state = inspect(target)
+    _evict(connection, target, any(state.attrs[name].history.has_changes() for name in STAMPED_FIELDS))
+
+def _user_deleted(mapper, connection, target):
+    _evict(connection, target, True)
+
+def _invalidate_committed(session):
+    # A request that cached the old row between flush and commit is evicted here
+    user_ids = session.info.pop(INVALIDATED_KEY, None)
+    cache = _current_cache()
+    if user_ids and cache is not None:
+        cache.invalidate(user_ids)
+
+def _forget_invalidated(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(INVALIDATED_KEY, None)
+
+def init_user_cache(app):
+    """Create the identity cache the login manager's user_loader reads from"""
+    cache = UserIdentityCache(
+        ttl=app.config.get('USER_CACHE_TTL', 60),
+        max_size=app.config.get('USER_CACHE_SIZE', 10000)
+    )
+    if not event.contains(User, 'after_update', _user_changed):
+        event.listen(User, 'after_update', _user_changed)
+        event.listen(User, 'after_delete', _user_deleted)
+    if not event.contains(db.session, 'after_commit', _invalidate_committed):
+        event.listen(db.session, 'after_commit', _invalidate_committed)
+    if not event.contains(db.session, 'after_soft_rollback', _forget_invalidated):
+        event.listen(db.session, 'after_soft_rollback', _forget_invalidated)
+    app.extensions['user_cache'] = cache
+    return cache
@@ -0,0 +1,303 @@
+import atexit
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models.board import Board, BoardAccess
+from app.models.user import User
+from app.models.user_import import UserImportJob
+from app.services.board_access import IN_CHUNK_SIZE, note_access_changed
+from app.services.counters import adjust_counters
+from app.services.job_worker import JobWorker
+from app.services.password_hasher import get_password_hasher
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLUMNS = ('username', 'email', 'password', 'is_admin', 'boards')
+REPORT_COLUMNS = ('line', 'username', 'email', 'status', 'user_id', 'board_id', 'message')
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def read_import_rows(stream):
+    """Read CSV rows from a binary upload stream"""
+    return list(csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig')))
+
+def _parse_row(raw):
+    """Validate one CSV row, returning its values or raising ValueError"""
+    username = (raw.get('username') or '').strip()
+    email = (raw.get('email') or '').strip()
+    password = raw.get('password') or ''
+    if not username:
+        raise ValueError('username is required')
+    if len(username) > 80:
+        raise ValueError('username must be at most 80 characters')
+    if not email or '@' not in email:
+        raise ValueError('a valid email is required')
+    if len(email) > 120:
+        raise ValueError('email must be at most 120 characters')
+    if not password:
+        raise ValueError('password is required')
+
+    board_ids = set()
+    for value in (raw.get('boards') or '').replace(';', ' ').split():
+        try:
+            board_ids.add(int(value))
+        except ValueError:
+            raise ValueError(f'invalid board id {value!r}')
+
+    return {
+        'username': username,
+        'email': email,
+        'password': password,
+        'is_admin': (raw.get('is_admin') or '').strip().lower() in TRUE_VALUES,
+        'board_ids': board_ids
+    }
+
+def _existing(column, values, *criteria):
+    """Subset of values already present in column, checked with chunked IN queries"""
+    values = sorted(values)
+    found = set()
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[start:start + IN_CHUNK_SIZE]
+        found.update(db.session.execute(db.select(column).where(column.in_(chunk), *criteria)).scalars())
+    return found
+
+def _result(line, row, status, message='', user_id=None, board_id=None):
+    return {
+        'line': line,
+        'username': row.get('username'),
+        'email': row.get('email'),
+        'status': status,
+        'user_id': user_id,
+        'board_id': board_id,
+        'message': message
+    }
+
+def _insert_chunk(chunk, granted_by_id):
+    """Insert one chunk of users with their personal boards and grants; the caller commits"""
+    hashes = get_password_hasher().hash_many([row['password'] for _, row in chunk])
+    users = User.__table__
+    user_ids = db.session.execute(
+        users.insert().returning(users.c.id, sort_by_parameter_order=True),
+        [
+            {'username': row['username'], 'email': row['email'], 'password_hash': pwhash, 'is_admin': row['is_admin']}
+            for (_, row), pwhash in zip(chunk, hashes)
+        ]
+    ).scalars().all()
+
+    boards = Board.__table__
+    board_ids = db.session.execute(
+        boards.insert().returning(boards.c.id, sort_by_parameter_order=True),
+        [
+            {'name': f"{row['username']}'s Personal Board", 'description': 'Personal task board', 'owner_id': user_id}
+            for (_, row), user_id in zip(chunk, user_ids)
+        ]
+    ).scalars().all()
+
+    grants = {}
+    for (_, row), user_id in zip(chunk, user_ids):
+        for board_id in row['board_ids']:
+            grants.setdefault(board_id, []).append(user_id)
+    if grants:
+        db.session.execute(BoardAccess.__table__.insert(), [
+            {'board_id': board_id, 'user_id': user_id, 'can_edit': True, 'can_delete': False, 'granted_by_id': granted_by_id}
+            for board_id, members in sorted(grants.items())
+            for user_id in members
+        ])
+        for board_id, members in grants.items():
+            note_access_changed(board_id, members)
+
+    # Core inserts bypass the flush listeners, so the dashboard counters are adjusted here
+    adjust_counters(db.session, {
+        'users': len(user_ids),
+        'non_admin_users': sum(1 for _, row in chunk if not row['is_admin']),
+        'active_boards': len(board_ids)
+    })
+    return user_ids, board_ids
+
+def import_users(raw_rows, granted_by_id=None, chunk_size=None, progress=None):
+    """
+    Provision users from CSV rows
+
+    Usernames, emails and board ids are checked against the database with
+    set queries, rows that fail are skipped, and the rest are inserted with
+    their personal boards and grants in chunks. Each chunk is committed on
+    its own, so a failing chunk doesn't undo the ones before it.
+
+    Args:
+        raw_rows: dicts keyed by IMPORT_COLUMNS; ``boards`` lists board ids
+            separated by spaces or semicolons to grant edit access to
+        granted_by_id: user recorded on the grants
+        chunk_size: rows per transaction (USER_IMPORT_CHUNK_SIZE)
+        progress: called with (rows settled, users created) after the
+            checks and after each chunk, before the commit that saves it
+
+    Returns:
+        one report dict per row, keyed by REPORT_COLUMNS, in file order
+    """
+    if chunk_size is None:
+        chunk_size = current_app.config.get('USER_IMPORT_CHUNK_SIZE', 500)
+
+    report = []
+    parsed = []
+    seen_usernames = set()
+    seen_emails = set()
+    # Line 1 is the header
+    for line, raw in enumerate(raw_rows, start=2):
+        try:
+            row = _parse_row(raw)
+        except ValueError as e:
+            report.append(_result(line, raw, 'skipped', str(e)))
+            continue
+        if row['username'] in seen_usernames:
+            report.append(_result(line, row, 'skipped', 'username repeated in file'))
+        elif row['email'] in seen_emails:
+            report.append(_result(line, row, 'skipped', 'email repeated in file'))
+        else:
+            seen_usernames.add(row['username'])
+            seen_emails.add(row['email'])
+            parsed.append((line, row))
+
+    taken_usernames = _existing(User.username, seen_usernames)
+    taken_emails = _existing(User.email, seen_emails)
+    known_boards = _existing(
+        Board.id, {board_id for _, row in parsed for board_id in row['board_ids']},
+        Board.pending_delete.is_(False)
+    )
+
+    accepted = []
+    for line, row in parsed:
+        missing = sorted(row['board_ids'] - known_boards)
+        if row['username'] in taken_usernames:
+            report.append(_result(line, row, 'skipped', 'username already exists'))
+        elif row['email'] in taken_emails:
+            report.append(_result(line, row, 'skipped', 'email already exists'))
+        elif missing:
+            report.append(_result(line, row, 'skipped', f'unknown boards {", ".join(map(str, missing))}'))
+        else:
+            accepted.append((line, row))
+
+    created = 0
+    if progress is not None:
+        progress(len(report), created)
+        db.session.commit()
+    for start in range(0, len(accepted), chunk_size):
+        chunk = accepted[start:start + chunk_size]
+        try:
+            user_ids, board_ids = _insert_chunk(chunk, granted_by_id)
+            if progress is not None:
+                progress(len(report) + len(chunk), created + len(user_ids))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            report.extend(
+                _result(line, row, 'failed', f'insert failed: {e.__class__.__name__}')
+                for line, row in chunk
+            )
+            if progress is not None:
+                progress(len(report), created)
+                db.session.commit()
+            continue
+        created += len(user_ids)
+        report.extend(
+            _result(line, row, 'created', user_id=user_id, board_id=board_id)
+            for (line, row), user_id, board_id in zip(chunk, user_ids, board_ids)
+        )
+
+    report.sort(key=lambda result: result['line'])
+    return report
+
+def request_import(raw_rows, filename=None, requested_by_id=None):
+    """
+    Create the job that imports raw_rows in the background
+
+    The job is only staged; the caller commits and then passes it to
+    ``get_user_import_worker().submit``.
+    """
+    rows = [{column: raw.get(column) for column in IMPORT_COLUMNS} for raw in raw_rows]
+    job = UserImportJob(
+        filename=filename,
+        requested_by_id=requested_by_id,
+        total_rows=len(rows),
+        rows=json.dumps(rows)
+    )
+    db.session.add(job)
+    return job
+
+def run_import_job(job_id, chunk_size=None):
+    """
+    Carry out an import job, saving its progress with every chunk
+
+    A job only ever starts once: running it again would report the users it
+    already created as existing. The uploaded rows are cleared when it
+    ends, done or failed, since they carry plaintext passwords.
+    """
+    job = db.session.get(UserImportJob, job_id)
+    if job is None or job.status != 'pending':
+        return job
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    def progress(processed, created):
+        job.processed_rows = processed
+        job.created_users = created
+
+    try:
+        report = import_users(
+            json.loads(job.rows), granted_by_id=job.requested_by_id, chunk_size=chunk_size, progress=progress
+        )
+        job.report = json.dumps(report)
+        job.status = 'done'
+    except Exception as e:
+        logger.exception('User import job %s failed', job_id)
+        db.session.rollback()
+        job = db.session.get(UserImportJob, job_id)
+        job.status = 'failed'
+        job.error = f'{e.__class__.__name__}: {e}'
+    job.rows = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+def job_report(job):
+    """The per-row report of a finished job, or None while it is still running"""
+    return json.loads(job.report) if job.report else None
+
+class UserImportWorker(JobWorker):
+    """Runs user import jobs one at a time on a background thread"""
+    thread_name = 'user-import-worker'
+
+    def run_job(self, job_id):
+        run_import_job(job_id)
+
+def init_user_import_worker(app):
+    worker = UserImportWorker(app)
+    atexit.register(worker.close)
+    app.extensions['user_import_worker'] = worker
+    return worker
+
+def get_user_import_worker():
+    return current_app.extensions['user_import_worker']
+
+def _cell(value):
+    # Uploaded usernames and emails are echoed back, so they're quoted as text
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def report_csv(report):
+    """Render an import report as CSV text that spreadsheets open without evaluating formulas"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    writer.writerows({column: _cell(value) for column, value in result.items()} for result in report)
+    return output.getvalue()
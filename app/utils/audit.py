@@ -1,73 +1,118 @@
-from flask import request
-from flask_login import current_user
+from itertools import takewhile
+from sqlalchemy import tuple_
 from app import db
 from app.models.audit import TaskAudit
+from app.models.user import User
+from app.services.audit_archive import iter_archived_audits
+from app.services.audit_capture import TRACKED_FIELDS, audit_value
+from app.utils.audit_diff import expand_changes, describe_fields
 
-def log_task_action(task, action, field_name=None, old_value=None, new_value=None):
+def describe_task_history(task, audits):
     """
-    Log a task action to the audit trail
+    Describe a task's audit rows with text deltas expanded
 
     Args:
-        task: Task instance
-        action: string describing the action (created, updated, completed, archived, deleted)
-        field_name: name of the field that was changed (for updates)
-        old_value: previous value (for updates)
-        new_value: new value (for updates)
+        audits: the task's rows newest first, unbroken from its newest row,
+            since each delta is undone from the value after it
+
+    Returns:
+        {audit id: (description, {field: [old, new] or the stored delta})};
+        a delta stays as stored when it no longer matches the known text
     """
-    audit_entry = TaskAudit(
-        task_id=task.id,
-        user_id=current_user.id,
-        action=action,
-        field_name=field_name,
-        old_value=str(old_value) if old_value is not None else None,
-        new_value=str(new_value) if new_value is not None else None,
-        ip_address=request.environ.get('REMOTE_ADDR'),
-        user_agent=request.environ.get('HTTP_USER_AGENT')
-    )
+    current = {field: getattr(task, field) for field in TRACKED_FIELDS}
+    current['tags'] = [tag.name for tag in current['tags']]
+    current = {field: audit_value(field, value) for field, value in current.items()}
+    described = {}
+    for audit, fields in expand_changes(audits, current):
+        values = {
+            field: change if isinstance(change, dict) and old is None and new is None else [old, new]
+            for field, old, new, change in fields
+        }
+        described[audit.id] = ('; '.join(describe_fields(audit, fields)), values)
+    return described
 
-    db.session.add(audit_entry)
-    # Note: Don't commit here, let the calling function handle the transaction
+def history_down_to(task, oldest, archived=False):
+    """
+    Every audit row of a task from its newest down to ``oldest``, newest first
 
-def log_task_creation(task):
-    """Log task creation"""
-    log_task_action(task, 'created')
+    Archived rows are read too when ``oldest`` came from the archive.
+    """
+    bound = (oldest.timestamp, oldest.id)
+    audits = TaskAudit.query\
+        .filter(TaskAudit.task_id == task.id, tuple_(TaskAudit.timestamp, TaskAudit.id) >= bound)\
+        .order_by(TaskAudit.timestamp.desc(), TaskAudit.id.desc())\
+        .all()
+    if archived:
+        # Rows left live by an interrupted archive run are also in the archive
+        live_ids = {audit.id for audit in audits}
+        audits.extend(
+            audit for audit in takewhile(lambda audit: (audit.timestamp, audit.id) >= bound,
+                                         iter_archived_audits(task.id))
+            if audit.id not in live_ids
+        )
+    return audits
 
-def log_task_update(task, field_name, old_value, new_value):
-    """Log task field update"""
-    if old_value != new_value:
-        log_task_action(task, 'updated', field_name, old_value, new_value)
+def expand_history_items(task, audits, items, archived=False):
+    """
+    Replace text deltas in serialized history items with the full old and new text
 
-def log_task_completion(task):
-    """Log task completion"""
-    log_task_action(task, 'completed')
+    Args:
+        audits: a page of the task's rows, newest first
+        items: their serialized form, updated in place
+        archived: whether the page reaches into the archive
+    """
+    if not any(isinstance(change, dict) for audit in audits for change in audit.get_changes().values()):
+        return
+    described = describe_task_history(task, history_down_to(task, audits[-1], archived))
+    for audit, item in zip(audits, items):
+        if audit.id in described:
+            item['description'], item['changes'] = described[audit.id]
 
-def log_task_archive(task):
-    """Log task archival"""
-    log_task_action(task, 'archived')
+def is_filterable_field(field):
+    """True for an empty field filter or one naming a tracked field"""
+    return not field or field in TRACKED_FIELDS
 
-def log_task_deletion(task):
-    """Log task deletion"""
-    log_task_action(task, 'deleted')
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
 
-def compare_task_changes(old_task_data, new_task_data, task):
+def filter_audits(query, action=None, user_id=None, field=None):
     """
-    Compare old and new task data and log all changes
+    Apply the history filters shared by the task timeline and the admin browser
 
-    Args:
-        old_task_data: dict with old values
-        new_task_data: dict with new values
-        task: Task instance
+    field must pass is_filterable_field; callers reject anything else. Its
+    JSON-key match is a residual filter on rows the timeline index already
+    narrowed, never the access path.
     """
-    fields_to_track = ['title', 'description', 'due_date', 'priority', 'status']
+    if action:
+        query = query.filter(TaskAudit.action == action)
+    if user_id:
+        query = query.filter(TaskAudit.user_id == user_id)
+    if field:
+        if not is_filterable_field(field):
+            raise ValueError(f'unknown field {field!r}')
+        # Per-field rows name the field; compact rows list it as a key of the JSON diff
+        query = query.filter(db.or_(
+            TaskAudit.field_name == field,
+            TaskAudit.changes.like(f'%"{_escape_like(field)}":%', escape='\\')
+        ))
+    return query
 
-    for field in fields_to_track:
-        old_value = old_task_data.get(field)
-        new_value = new_task_data.get(field)
+def audit_matches(audit, action=None, user_id=None, field=None):
+    """In-memory equivalent of filter_audits for archived rows"""
+    if action and audit.action != action:
+        return False
+    if user_id and audit.user_id != user_id:
+        return False
+    if field and audit.field_name != field and field not in audit.get_changes():
+        return False
+    return True
 
-        # Special handling for due_date
-        if field == 'due_date':
-            old_value = old_value.isoformat() if old_value else None
-            new_value = new_value.isoformat() if new_value else None
+def audit_timeline_query():
+    """Audit rows paired with the acting username"""
+    return db.session.query(TaskAudit, User.username).outerjoin(User, User.id == TaskAudit.user_id)
 
-        if old_value != new_value:
-            log_task_update(task, field, old_value, new_value)
\ No newline at end of file
+def audit_timeline_item(audit, username):
+    item = audit.to_dict()
+    item['username'] = username
+    item['description'] = audit.get_description()
+    return item
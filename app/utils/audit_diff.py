@@ -0,0 +1,156 @@
+import json
+import zlib
+from difflib import SequenceMatcher
+
+# Text values longer than this are stored as a delta instead of two full copies
+LONG_TEXT_THRESHOLD = 200
+
+def _checksum(text):
+    return zlib.crc32((text or '').encode('utf-8'))
+
+def make_text_delta(old, new):
+    """
+    Encode the edit from old to new as a list of ops
+
+    An int keeps that many characters, ['-', text] drops text from old and
+    ['+', text] adds text to new, so the delta can be applied in either
+    direction.
+    """
+    ops = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if tag in ('delete', 'replace'):
+            ops.append(['-', old[i1:i2]])
+        if tag in ('insert', 'replace'):
+            ops.append(['+', new[j1:j2]])
+    return ops
+
+def apply_delta_forward(old, ops):
+    """Rebuild the new text from the old text and a delta"""
+    parts, position = [], 0
+    for op in ops:
+        if isinstance(op, int):
+            parts.append(old[position:position + op])
+            position += op
+        elif op[0] == '-':
+            position += len(op[1])
+        else:
+            parts.append(op[1])
+    return ''.join(parts)
+
+def apply_delta_backward(new, ops):
+    """Rebuild the old text from the new text and a delta"""
+    parts, position = [], 0
+    for op in ops:
+        if isinstance(op, int):
+            parts.append(new[position:position + op])
+            position += op
+        elif op[0] == '+':
+            position += len(op[1])
+        else:
+            parts.append(op[1])
+    return ''.join(parts)
+
+def _stringify(value):
+    # Matches how per-field audit rows always stored their values
+    return str(value) if value is not None else None
+
+def encode_changes(changes):
+    """
+    Serialize {field: (old, new)} into the compact JSON stored on one audit row
+
+    Short values are kept as [old, new]; when either side of a text change is
+    long only a delta and a checksum of the new value are stored.
+    """
+    encoded = {}
+    for field, (old, new) in changes.items():
+        old, new = _stringify(old), _stringify(new)
+        if old is not None and new is not None and max(len(old), len(new)) > LONG_TEXT_THRESHOLD:
+            encoded[field] = {'d': make_text_delta(old, new), 'h': _checksum(new)}
+        else:
+            encoded[field] = [old, new]
+    return json.dumps(encoded, separators=(',', ':'))
+
+def decode_changes(raw):
+    """Parse a stored changes column, or return {} when there is none"""
+    return json.loads(raw) if raw else {}
+
+def apply_change_forward(current, change):
+    """
+    Return the value a stored field change produced, given the value before it
+
+    Returns None for a delta that does not match ``current``.
+    """
+    if isinstance(change, list):
+        return change[1]
+    if current is None:
+        return None
+    new = apply_delta_forward(current, change['d'])
+    return new if _checksum(new) == change['h'] else None
+
+def describe_change(field, old, new):
+    """The sentence per-field audit rows have always rendered"""
+    return f"Changed {field.replace('_', ' ')} from '{old}' to '{new}'"
+
+def describe_delta(field, change):
+    added = sum(len(op[1]) for op in change['d'] if isinstance(op, list) and op[0] == '+')
+    removed = sum(len(op[1]) for op in change['d'] if isinstance(op, list) and op[0] == '-')
+    return f"Changed {field.replace('_', ' ')} ({added} characters added, {removed} removed)"
+
+def expand_changes(audits, current_values):
+    """
+    Resolve deltas into full values by walking history back from the current task
+
+    Args:
+        audits: a task's audit rows ordered newest first
+        current_values: {field: value} as the task stands now
+
+    Returns:
+        list of (audit, [(field, old, new, change), ...]) in the same order;
+        old and new are None when a delta no longer matches the known value,
+        and change is the stored entry so callers can still summarize it
+    """
+    state = {field: _stringify(value) for field, value in current_values.items()}
+    expanded = []
+    for audit in audits:
+        fields = []
+        if audit.field_name:
+            fields.append((audit.field_name, audit.old_value, audit.new_value, None))
+            state[audit.field_name] = audit.old_value
+        for field, change in decode_changes(getattr(audit, 'changes', None)).items():
+            if isinstance(change, list):
+                old, new = change
+            else:
+                new = state.get(field)
+                if new is not None and _checksum(new) == change['h']:
+                    old = apply_delta_backward(new, change['d'])
+                else:
+                    new = old = None
+            fields.append((field, old, new, change))
+            state[field] = old
+        expanded.append((audit, fields))
+    return expanded
+
+def describe_fields(audit, fields):
+    """
+    Descriptions for one audit row's expanded fields
+
+    Each changed field renders exactly as the old one-row-per-field format
+    did, so compact rows read the same as the rows they replace.
+    """
+    if audit.action != 'updated' or not fields:
+        return [audit.get_description()]
+    descriptions = []
+    for field, old, new, change in fields:
+        if isinstance(change, dict) and old is None and new is None:
+            descriptions.append(describe_delta(field, change))
+        else:
+            descriptions.append(describe_change(field, old, new))
+    return descriptions
+
+def render_history(audits, current_values):
+    """Descriptions for a task's audit rows (newest first) with deltas expanded"""
+    return [(audit, describe_fields(audit, fields)) for audit, fields in expand_changes(audits, current_values)]
@@ -0,0 +1,198 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+DEFAULT_MIMETYPES = frozenset([
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/csv',
+    'text/javascript', 'application/javascript', 'application/json',
+    'application/xml', 'image/svg+xml'
+])
+
+# Statuses that never carry a body worth compressing
+SKIP_STATUSES = frozenset([204, 206, 304])
+
+def parse_accept_encoding(header):
+    """Return {coding: q} for an Accept-Encoding header"""
+    codings = {}
+    for part in (header or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+def choose_encoding(header, allow_brotli=True):
+    """Pick 'br' or 'gzip' for the client, or None to send the body as-is"""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0.0)
+    candidates = ['br', 'gzip'] if (allow_brotli and brotli is not None) else ['gzip']
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31 produces a gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+class CompressionMiddleware:
+    """
+    WSGI middleware that gzip/brotli-encodes responses above a size threshold
+
+    Streaming responses are buffered only until ``min_size`` bytes have been
+    produced, then compressed and flushed chunk by chunk, so generator
+    responses keep streaming. Responses that already declare a
+    Content-Encoding, partial content and non-text types pass through.
+    """
+
+    def __init__(self, app, min_size=500, level=6, brotli_quality=4, mimetypes=None):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes) if mimetypes else DEFAULT_MIMETYPES
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = {}
+        legacy_writes = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return legacy_writes.append
+
+        app_iter = self.app(environ, capture_start_response)
+        return self._iter_response(app_iter, captured, legacy_writes, start_response, encoding)
+
+    def _is_compressible(self, status, headers):
+        if int(status.split(' ', 1)[0]) in SKIP_STATUSES:
+            return False
+        header_map = {name.lower(): value for name, value in headers}
+        if 'content-encoding' in header_map:
+            return False
+        if 'no-transform' in header_map.get('cache-control', '').lower():
+            return False
+        mimetype = header_map.get('content-type', '').split(';', 1)[0].strip().lower()
+        if mimetype not in self.mimetypes:
+            return False
+        content_length = header_map.get('content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) < self.min_size:
+            return False
+        return True
+
+    def _make_stream(self, encoding):
+        if encoding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.level)
+
+    def _compressed_headers(self, headers, encoding):
+        result = []
+        vary = None
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == 'content-length':
+                continue
+            if lowered == 'vary':
+                vary = value
+                continue
+            if lowered == 'etag' and not value.startswith('W/'):
+                # The encoded body is no longer byte-identical to the strong validator
+                value = 'W/' + value
+            result.append((name, value))
+        if vary and 'accept-encoding' not in vary.lower():
+            vary = f'{vary}, Accept-Encoding'
+        result.append(('Vary', vary or 'Accept-Encoding'))
+        result.append(('Content-Encoding', encoding))
+        return result
+
+    def _iter_response(self, app_iter, captured, legacy_writes, start_response, encoding):
+        iterator = iter(app_iter)
+        try:
+            status, headers = captured.get('status'), captured.get('headers')
+            if status is None:
+                # start_response may be deferred until the first chunk is produced
+                first = next(iterator, None)
+                status, headers = captured['status'], captured['headers']
+                pending = [first] if first else []
+            else:
+                pending = []
+            pending = legacy_writes + pending
+
+            if not self._is_compressible(status, headers):
+                start_response(status, headers, captured.get('exc_info'))
+                yield from pending
+                yield from iterator
+                return
+
+            buffered = sum(len(chunk) for chunk in pending)
+            exhausted = False
+            while buffered < self.min_size:
+                chunk = next(iterator, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending.append(chunk)
+                buffered += len(chunk)
+
+            if exhausted and buffered < self.min_size:
+                start_response(status, headers, captured.get('exc_info'))
+                yield from pending
+                return
+
+            start_response(status, self._compressed_headers(headers, encoding), captured.get('exc_info'))
+            stream = self._make_stream(encoding)
+            yield stream.compress(b''.join(pending))
+            for chunk in iterator:
+                if chunk:
+                    yield stream.compress(chunk)
+            yield stream.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+def init_compression(app):
+    """Wrap the Flask app's WSGI callable using the COMPRESS_* config values"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config.get('COMPRESS_MIN_SIZE', 500),
+        level=app.config.get('COMPRESS_LEVEL', 6),
+        brotli_quality=app.config.get('COMPRESS_BROTLI_QUALITY', 4),
+        mimetypes=app.config.get('COMPRESS_MIMETYPES')
+    )
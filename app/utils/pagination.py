@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values):
+    """Pack the sort key of the last row on a page into an opaque URL-safe token"""
+    payload = [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Unpack a token from encode_cursor, or return None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in payload
+        ]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+def page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+def keyset_page(query, columns, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True, key=None):
+    """
+    Fetch one page ordered by ``columns`` starting after ``cursor``
+
+    The row-value comparison lets the database seek straight into a matching
+    composite index instead of skipping OFFSET rows.
+
+    Args:
+        query: SQLAlchemy query to page through
+        columns: sort columns, the last one unique (normally the primary key)
+        cursor: token from a previous page's next_cursor
+        limit: page size
+        descending: newest/highest first when True
+        key: function returning a row's sort values, defaults to reading
+             attributes named after the columns
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+    """
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(columns):
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if key is None:
+            key = lambda row: [getattr(row, column.key) for column in columns]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return rows, next_cursor
@@ -0,0 +1,231 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import func, inspect
+from app import db
+from app.models.task import Task, TaskArchive, Tag, task_tags, task_tags_archive
+from app.models.board import Board, BoardAccess
+from app.models.user import User
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.due_date, Task.priority,
+    Task.status, Task.board_id, Task.created_at, Task.updated_at,
+    Task.completed_at, Task.ai_generated_description, Task.version
+)
+
+# tasks_archive has the same columns, plus when the task was archived
+ARCHIVED_TASK_COLUMNS = tuple(getattr(TaskArchive, column.key) for column in TASK_COLUMNS) + (
+    TaskArchive.archived_at,
+)
+
+BOARD_COLUMNS = (
+    Board.id, Board.name, Board.description, Board.owner_id, Board.is_active,
+    Board.created_at, Board.updated_at, Board.task_count, Board.completed_count,
+    Board.open_count
+)
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _instance_id(item):
+    # Read the identity key so expired instances are not refreshed just for their id
+    identity = inspect(item).identity
+    return identity[0] if identity else item.id
+
+def _unique_ids(items):
+    """Accept ids or model instances and return ids in first-seen order"""
+    seen = {}
+    for item in items:
+        item_id = item if isinstance(item, int) else _instance_id(item)
+        if item_id is not None:
+            seen.setdefault(item_id, None)
+    return list(seen)
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def _is_overdue(due_date, status, now):
+    # Mirrors Task.is_overdue without needing a mapped instance
+    if due_date and status not in ['completed', 'archived']:
+        if due_date.tzinfo is not None:
+            return now.replace(tzinfo=timezone.utc) > due_date
+        return now > due_date
+    return False
+
+def _fetch_rows(columns, id_column, ids):
+    rows = {}
+    for chunk in _chunks(ids):
+        for row in db.session.query(*columns).filter(id_column.in_(chunk)):
+            rows[row.id] = row
+    return rows
+
+def _fetch_pairs(query_factory, ids):
+    pairs = {}
+    for chunk in _chunks(ids):
+        pairs.update(query_factory(chunk).all())
+    return pairs
+
+def _task_items(task_ids, columns, id_column, links):
+    """(row, dict) per existing task id, in input order, from tasks or tasks_archive"""
+    rows = _fetch_rows(columns, id_column, task_ids)
+
+    board_names = _fetch_pairs(
+        lambda chunk: db.session.query(Board.id, Board.name).filter(Board.id.in_(chunk)),
+        {row.board_id for row in rows.values() if row.board_id is not None}
+    )
+
+    tag_names = defaultdict(list)
+    for chunk in _chunks(rows):
+        tag_rows = db.session.query(links.c.task_id, Tag.name)\
+            .join(Tag, Tag.id == links.c.tag_id)\
+            .filter(links.c.task_id.in_(chunk))\
+            .order_by(links.c.task_id, Tag.id)
+        for task_id, name in tag_rows:
+            tag_names[task_id].append(name)
+
+    now = datetime.utcnow()
+    for task_id in task_ids:
+        row = rows.get(task_id)
+        if row is None:
+            continue
+        yield row, {
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'due_date': _isoformat(row.due_date),
+            'priority': row.priority,
+            'status': row.status,
+            'is_overdue': _is_overdue(row.due_date, row.status, now),
+            'board_id': row.board_id,
+            'board_name': board_names.get(row.board_id),
+            'created_at': _isoformat(row.created_at),
+            'updated_at': _isoformat(row.updated_at),
+            'completed_at': _isoformat(row.completed_at),
+            'ai_generated_description': row.ai_generated_description,
+            'version': row.version,
+            'tags': tag_names.get(row.id, [])
+        }
+
+def serialize_tasks(tasks):
+    """
+    Serialize many tasks with a fixed number of batched queries
+
+    Args:
+        tasks: iterable of task ids or Task instances
+
+    Returns:
+        list of dicts in input order; ids that no longer exist are skipped
+    """
+    task_ids = _unique_ids(tasks)
+    if not task_ids:
+        return []
+    return [item for _, item in _task_items(task_ids, TASK_COLUMNS, Task.id, task_tags)]
+
+def serialize_archived_tasks(task_ids):
+    """
+    Serialize tasks_archive rows like serialize_tasks, plus archived_at and ``cold: True``
+
+    Args:
+        task_ids: iterable of tasks_archive ids
+
+    Returns:
+        list of dicts in input order; ids no longer in the archive are skipped
+    """
+    task_ids = _unique_ids(task_ids)
+    if not task_ids:
+        return []
+    items = []
+    for row, item in _task_items(task_ids, ARCHIVED_TASK_COLUMNS, TaskArchive.id, task_tags_archive):
+        item.update(archived_at=_isoformat(row.archived_at), cold=True)
+        items.append(item)
+    return items
+
+def serialize_task(task):
+    """Serialize a single task id or Task instance, or None if it does not exist"""
+    result = serialize_tasks([task])
+    return result[0] if result else None
+
+def serialize_boards(boards):
+    """
+    Serialize many boards with owners and member counts prefetched in batches
+
+    Args:
+        boards: iterable of board ids or Board instances
+
+    Returns:
+        list of dicts in input order; ids that no longer exist are skipped
+    """
+    board_ids = _unique_ids(boards)
+    if not board_ids:
+        return []
+
+    rows = _fetch_rows(BOARD_COLUMNS, Board.id, board_ids)
+
+    owner_names = _fetch_pairs(
+        lambda chunk: db.session.query(User.id, User.username).filter(User.id.in_(chunk)),
+        {row.owner_id for row in rows.values()}
+    )
+
+    # Grants only; the owner is added below
+    member_counts = _fetch_pairs(
+        lambda chunk: db.session.query(BoardAccess.board_id, func.count(BoardAccess.id))
+            .filter(BoardAccess.board_id.in_(chunk))
+            .group_by(BoardAccess.board_id),
+        rows
+    )
+
+    result = []
+    for board_id in board_ids:
+        row = rows.get(board_id)
+        if row is None:
+            continue
+        result.append({
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'owner_id': row.owner_id,
+            'owner_username': owner_names.get(row.owner_id),
+            'is_active': row.is_active,
+            'created_at': _isoformat(row.created_at),
+            'updated_at': _isoformat(row.updated_at),
+            'task_count': row.task_count,
+            'completed_count': row.completed_count,
+            'open_count': row.open_count,
+            'member_count': member_counts.get(row.id, 0) + 1
+        })
+    return result
+
+def board_counts(boards):
+    """
+    Task, completed, open and member counts per board
+
+    Task counts are read from the boards' counter columns; members come
+    from one grouped query per chunk.
+
+    Args:
+        boards: iterable of board ids or Board instances
+
+    Returns:
+        {board_id: {'tasks': n, 'completed': n, 'open': n, 'members': n}} for every input board
+    """
+    board_ids = _unique_ids(boards)
+    counts = {board_id: {'tasks': 0, 'completed': 0, 'open': 0, 'members': 0} for board_id in board_ids}
+    for chunk in _chunks(board_ids):
+        task_rows = db.session.query(Board.id, Board.task_count, Board.completed_count, Board.open_count)\
+            .filter(Board.id.in_(chunk))
+        for board_id, total, done, open_ in task_rows:
+            counts[board_id].update(tasks=total, completed=done, open=open_)
+        member_rows = db.session.query(BoardAccess.board_id, func.count(BoardAccess.id))\
+            .filter(BoardAccess.board_id.in_(chunk)).group_by(BoardAccess.board_id)
+        for board_id, members in member_rows:
+            counts[board_id]['members'] = members
+    return counts
+
+def serialize_board(board):
+    """Serialize a single board id or Board instance, or None if it does not exist"""
+    result = serialize_boards([board])
+    return result[0] if result else None
@@ -0,0 +1,56 @@
+from app import db
+from app.models.task import Tag
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+def normalize_tag_names(names):
+    """Strip, drop empties and dedupe tag names while keeping their order"""
+    if isinstance(names, str):
+        names = names.split(',')
+    seen = {}
+    for name in names or []:
+        name = str(name).strip()
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+def resolve_tag_ids(names):
+    """
+    Map tag names to ids, creating any missing tags with one executemany
+
+    Args:
+        names: iterable of tag names (duplicates are ignored)
+
+    Returns:
+        dict of {name: tag_id}
+    """
+    names = normalize_tag_names(names)
+    tag_ids = {}
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        tag_ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(chunk)).all())
+
+    missing = [name for name in names if name not in tag_ids]
+    if missing:
+        db.session.execute(Tag.__table__.insert(), [{'name': name} for name in missing])
+        for start in range(0, len(missing), IN_CHUNK_SIZE):
+            chunk = missing[start:start + IN_CHUNK_SIZE]
+            tag_ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(chunk)).all())
+    return tag_ids
+
+def get_or_create_tags(names):
+    """
+    Tag objects for the given names, in order, creating any missing ones
+
+    Resolve tags before modifying the task they are for: the lookups
+    autoflush, and a flush in the middle of an edit would split its audit row.
+    """
+    names = normalize_tag_names(names)
+    tag_ids = resolve_tag_ids(names)
+    ids = list(tag_ids.values())
+    tags = {}
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start:start + IN_CHUNK_SIZE]
+        tags.update((tag.id, tag) for tag in Tag.query.filter(Tag.id.in_(chunk)))
+    return [tags[tag_ids[name]] for name in names]
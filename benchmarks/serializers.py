@@ -0,0 +1,73 @@
+"""
+Per-object to_dict() against the batched serializers at 1k and 10k objects
+
+    python -m benchmarks.serializers [sizes ...]
+
+Builds a throwaway SQLite database, then reports wall time and SQL
+statement count for serializing every task and board both ways.
+"""
+import sys
+import tempfile
+import time
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Board, Task, Tag
+from app.utils.serializers import serialize_tasks, serialize_boards
+
+BOARDS_PER_1K_TASKS = 50
+TAGS = 20
+
+class Settings:
+    SECRET_KEY = 'benchmark'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 1
+
+def _seed(size):
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    tags = [Tag(name=f'tag-{n}') for n in range(TAGS)]
+    boards = [Board(name=f'Board {n}', owner_id=user.id) for n in range(max(1, size * BOARDS_PER_1K_TASKS // 1000))]
+    db.session.add_all(tags + boards)
+    db.session.flush()
+    db.session.add_all(
+        Task(title=f'Task {n}', user_id=user.id, board_id=boards[n % len(boards)].id, tags=[tags[n % TAGS]])
+        for n in range(size)
+    )
+    db.session.commit()
+
+def _measure(label, fn):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.session.expire_all()
+    event.listen(db.engine, 'before_cursor_execute', count)
+    started = time.perf_counter()
+    try:
+        items = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(db.engine, 'before_cursor_execute', count)
+    print(f'  {label:<28} {len(items):>6} items {elapsed * 1000:>10.1f} ms {len(statements):>7} queries')
+
+def run(size):
+    with tempfile.TemporaryDirectory() as directory:
+        settings = type('Settings', (Settings,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{directory}/bench.db'})
+        app = create_app(settings)
+        with app.app_context():
+            db.create_all()
+            _seed(size)
+            print(f'{size} tasks:')
+            _measure('Task.to_dict per object', lambda: [task.to_dict() for task in Task.query.all()])
+            _measure('serialize_tasks', lambda: serialize_tasks([task_id for (task_id,) in db.session.query(Task.id)]))
+            _measure('Board.to_dict per object', lambda: [board.to_dict() for board in Board.query.all()])
+            _measure('serialize_boards', lambda: serialize_boards([board_id for (board_id,) in db.session.query(Board.id)]))
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [1000, 10000]:
+        run(size)
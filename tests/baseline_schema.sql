@@ -0,0 +1,83 @@
+-- Schema of databases created before schema migrations existed
+CREATE TABLE users (
+	id INTEGER NOT NULL, 
+	username VARCHAR(80) NOT NULL, 
+	email VARCHAR(120) NOT NULL, 
+	password_hash VARCHAR(255) NOT NULL, 
+	is_admin BOOLEAN NOT NULL, 
+	created_at DATETIME, 
+	PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE UNIQUE INDEX ix_users_username ON users (username);
+CREATE TABLE tags (
+	id INTEGER NOT NULL, 
+	name VARCHAR(50) NOT NULL, 
+	color VARCHAR(7), 
+	PRIMARY KEY (id), 
+	UNIQUE (name)
+);
+CREATE TABLE boards (
+	id INTEGER NOT NULL, 
+	name VARCHAR(100) NOT NULL, 
+	description TEXT, 
+	owner_id INTEGER NOT NULL, 
+	is_active BOOLEAN NOT NULL, 
+	created_at DATETIME, 
+	updated_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(owner_id) REFERENCES users (id)
+);
+CREATE TABLE tasks (
+	id INTEGER NOT NULL, 
+	title VARCHAR(200) NOT NULL, 
+	description TEXT, 
+	due_date DATETIME, 
+	priority VARCHAR(20), 
+	status VARCHAR(20), 
+	user_id INTEGER NOT NULL, 
+	board_id INTEGER NOT NULL, 
+	created_at DATETIME, 
+	updated_at DATETIME, 
+	completed_at DATETIME, 
+	ai_generated_description BOOLEAN, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(board_id) REFERENCES boards (id)
+);
+CREATE TABLE board_access (
+	id INTEGER NOT NULL, 
+	board_id INTEGER NOT NULL, 
+	user_id INTEGER NOT NULL, 
+	can_edit BOOLEAN NOT NULL, 
+	can_delete BOOLEAN NOT NULL, 
+	granted_at DATETIME, 
+	granted_by_id INTEGER, 
+	PRIMARY KEY (id), 
+	UNIQUE (board_id, user_id), 
+	FOREIGN KEY(board_id) REFERENCES boards (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(granted_by_id) REFERENCES users (id)
+);
+CREATE TABLE task_tags (
+	task_id INTEGER NOT NULL, 
+	tag_id INTEGER NOT NULL, 
+	PRIMARY KEY (task_id, tag_id), 
+	FOREIGN KEY(task_id) REFERENCES tasks (id), 
+	FOREIGN KEY(tag_id) REFERENCES tags (id)
+);
+CREATE TABLE task_audits (
+	id INTEGER NOT NULL, 
+	task_id INTEGER NOT NULL, 
+	user_id INTEGER NOT NULL, 
+	action VARCHAR(50) NOT NULL, 
+	field_name VARCHAR(50), 
+	old_value TEXT, 
+	new_value TEXT, 
+	timestamp DATETIME, 
+	ip_address VARCHAR(45), 
+	user_agent TEXT, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(task_id) REFERENCES tasks (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
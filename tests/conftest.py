@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Board, Task
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = 'test-secret-key'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    # Cheap hashes in threads keep the suite fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 2
+
+@pytest.fixture
+def config(tmp_path):
+    """Per-test config overrides; a file database so background threads share it"""
+    return {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'AUDIT_ARCHIVE_DIR': str(tmp_path / 'audit-archive')
+    }
+
+@pytest.fixture
+def app(config):
+    settings = type('Settings', (TestConfig,), config)
+    app = create_app(settings)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    def make_user(username='alice', is_admin=False, password='secret'):
+        user = User(username=username, email=f'{username}@example.com', is_admin=is_admin)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+@pytest.fixture
+def make_board(app):
+    def make_board(owner, name='Board'):
+        board = Board(name=name, owner_id=owner.id)
+        db.session.add(board)
+        db.session.commit()
+        return board
+    return make_board
+
+@pytest.fixture
+def make_task(app):
+    def make_task(user, board, title='Task', **values):
+        task = Task(title=title, user_id=user.id, board_id=board.id, **values)
+        db.session.add(task)
+        db.session.commit()
+        return task
+    return make_task
+
+@pytest.fixture
+def login(client):
+    def login(user):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        return client
+    return login
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager factory counting SQL statements sent to the engine"""
+    from contextlib import contextmanager
+
+    @contextmanager
+    def count_queries():
+        counter = QueryCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', counter)
+    return count_queries
@@ -0,0 +1,135 @@
+from flask import current_app
+from app import db
+from app.models import Board, BoardAccess
+from app.services import acl
+from app.services.acl import FULL_ACCESS, NO_ACCESS, BoardPermissions, load_acl
+from app.services.board_access import note_access_changed
+
+def _cached(user_id):
+    cache = current_app.extensions['acl_cache']
+    with current_app.test_request_context():
+        return cache.get(user_id)
+
+def test_acl_is_built_with_one_query_and_reused(app, make_user, make_board, count_queries):
+    alice, bob = make_user('alice'), make_user('bob')
+    owned, shared = make_board(alice, name='Owned'), make_board(bob, name='Shared')
+    db.session.add(BoardAccess(board_id=shared.id, user_id=alice.id, can_edit=False))
+    db.session.commit()
+    alice_id, owned_id, shared_id = alice.id, owned.id, shared.id
+
+    with count_queries() as counter:
+        assert _cached(alice_id) == {owned_id: FULL_ACCESS, shared_id: BoardPermissions(True, False, False)}
+        assert _cached(alice_id)[shared_id].can_view
+    # The shared stamp on each read, and the map once
+    assert counter.count == 3
+
+def test_orm_grants_and_revocations_apply_on_commit(app, make_user, make_board):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    assert board.id not in _cached(bob.id)
+
+    access = BoardAccess(board_id=board.id, user_id=bob.id, can_edit=True)
+    db.session.add(access)
+    db.session.flush()
+    # The writing transaction sees its grant, but nothing is cached until it commits
+    assert _cached(bob.id)[board.id].can_edit
+    assert current_app.extensions['acl_cache']._entries[bob.id][2] == {}
+    db.session.commit()
+    assert _cached(bob.id)[board.id].can_edit
+
+    db.session.delete(access)
+    db.session.commit()
+    assert board.id not in _cached(bob.id)
+
+def test_ownership_transfer_evicts_both_owners(app, make_user, make_board):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    assert _cached(alice.id)[board.id] == FULL_ACCESS
+    assert board.id not in _cached(bob.id)
+
+    # Overwritten unloaded, as after a commit, so the old owner isn't in the attribute history
+    db.session.expire(board, ['owner_id'])
+    board.owner_id = bob.id
+    db.session.commit()
+    assert board.id not in _cached(alice.id)
+    assert _cached(bob.id)[board.id] == FULL_ACCESS
+
+def test_rolled_back_changes_evict_nothing(app, make_user, make_board, monkeypatch):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    _cached(bob.id)
+    evicted = []
+    monkeypatch.setattr(current_app.extensions['acl_cache'], 'invalidate', evicted.append)
+
+    db.session.add(BoardAccess(board_id=board.id, user_id=bob.id))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert evicted == []
+    assert board.id not in _cached(bob.id)
+
+def test_core_writes_evict_through_the_signal(app, make_user, make_board):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    assert board.id not in _cached(bob.id)
+
+    db.session.execute(BoardAccess.__table__.insert().values(board_id=board.id, user_id=bob.id, can_edit=True))
+    note_access_changed(board.id, [bob.id])
+    db.session.commit()
+    assert _cached(bob.id)[board.id].can_edit
+
+def test_load_racing_an_invalidation_is_not_stored(app, make_user, make_board, monkeypatch):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    cache = current_app.extensions['acl_cache']
+
+    def load_then_grant(user_id):
+        stale = load_acl(user_id)
+        db.session.add(BoardAccess(board_id=board.id, user_id=bob.id))
+        db.session.commit()
+        return stale
+
+    monkeypatch.setattr(acl, 'load_acl', load_then_grant)
+    with app.test_request_context():
+        assert cache.get(bob.id) == {}
+    monkeypatch.undo()
+    assert _cached(bob.id)[board.id].can_view
+
+def test_board_permissions_memoizes_per_request(app, make_user, make_board, count_queries):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    db.session.refresh(bob)
+    db.session.refresh(board)
+    with app.test_request_context():
+        with count_queries() as counter:
+            for _ in range(3):
+                assert board.permissions_for(bob) == NO_ACCESS
+                assert not board.has_access(bob)
+        # The shared stamp and the map, once for the request
+        assert counter.count == 2
+
+def test_other_processes_drop_maps_a_commit_made_stale(app, make_user, make_board):
+    alice, bob = make_user('alice'), make_user('bob')
+    board = make_board(alice)
+    # Another worker's cache, which neither the commit hooks nor the signal reach
+    other = acl.AclCache(ttl=3600)
+
+    def other_cached(user_id):
+        with app.test_request_context():
+            return other.get(user_id)
+
+    assert board.id not in other_cached(bob.id)
+    access = BoardAccess(board_id=board.id, user_id=bob.id, can_edit=True)
+    db.session.add(access)
+    db.session.commit()
+    assert other_cached(bob.id)[board.id].can_edit
+
+    db.session.execute(BoardAccess.__table__.delete().where(BoardAccess.board_id == board.id))
+    note_access_changed(board.id, [bob.id])
+    db.session.commit()
+    assert board.id not in other_cached(bob.id)
+
+    assert other_cached(alice.id)[board.id] == FULL_ACCESS
+    board.pending_delete = True
+    db.session.commit()
+    assert other_cached(alice.id)[board.id] == acl.READ_ONLY
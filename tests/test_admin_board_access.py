@@ -0,0 +1,45 @@
+import re
+from html import unescape
+from app import db
+from app.models import BoardAccess
+
+def _page(client, board, **args):
+    html = client.get(f'/admin/boards/{board.id}/access', query_string=args).get_data(as_text=True)
+    # Owner first, then this page's members
+    names = re.findall(r'<h6 class="mb-0">(\w+)</h6>', html)
+    match = re.search(r'href="[^"]*cursor=([^"&]+)[^"]*">Next</a>', html)
+    return html, names[1:], unescape(match.group(1)) if match else None
+
+def _grant(board, *users):
+    db.session.add_all(BoardAccess(board_id=board.id, user_id=user.id) for user in users)
+    db.session.commit()
+
+def test_members_page_by_username_across_the_cursor(make_user, make_board, login):
+    admin, owner = make_user('admin', is_admin=True), make_user('owner')
+    board = make_board(owner)
+    _grant(board, *(make_user(name) for name in ('erin', 'bob', 'dave', 'carol', 'frank')))
+    client = login(admin)
+
+    _, first, cursor = _page(client, board, per_page=2)
+    assert first == ['bob', 'carol']
+    # A grant sorting behind the cursor doesn't shift later pages; one ahead of it shows up
+    _grant(board, make_user('amy'), make_user('zoe'))
+    _, second, cursor = _page(client, board, per_page=2, cursor=cursor)
+    _, third, cursor = _page(client, board, per_page=2, cursor=cursor)
+    assert (second, third, cursor) == (['dave', 'erin'], ['frank', 'zoe'], None)
+
+    _, filtered, cursor = _page(client, board, per_page=1, member='d')
+    assert (filtered, cursor) == (['dave'], None)
+
+def test_picker_leaves_out_the_owner_and_members(make_user, make_board, login):
+    admin, owner = make_user('admin', is_admin=True), make_user('sam')
+    board = make_board(owner)
+    _grant(board, make_user('sal'))
+    make_user('sue')
+    client = login(admin)
+
+    html, _, _ = _page(client, board)
+    source = unescape(re.search(r'data-source="([^"]+)"', html).group(1))
+    assert source == f'/admin/users/search?exclude_board={board.id}'
+    found = client.get(f'{source}&q=s').get_json()['users']
+    assert [user['username'] for user in found] == ['sue']
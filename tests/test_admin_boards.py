@@ -0,0 +1,62 @@
+import re
+from app import db
+from app.models import Board, BoardAccess
+
+def _card(html, label):
+    return int(re.search(rf'{label}\s*</div>\s*<div[^>]*>\s*(\d+)', html).group(1))
+
+def test_total_tasks_covers_every_board_not_just_the_page(make_user, make_board, make_task, login):
+    admin = make_user('admin', is_admin=True)
+    first, second = make_board(admin, name='First'), make_board(admin, name='Second')
+    make_task(admin, first)
+    make_task(admin, second)
+    make_task(admin, second)
+
+    html = login(admin).get('/admin/boards', query_string={'search': 'First'}).get_data(as_text=True)
+    assert _card(html, 'Total Tasks') == 3
+    assert _card(html, 'Active Boards') == 2
+
+def test_status_totals_leave_out_boards_being_purged(make_user, make_board, login):
+    admin = make_user('admin', is_admin=True)
+    make_board(admin, name='Kept')
+    archived = make_board(admin, name='Archived')
+    archived.is_active = False
+    for name in ('Active', 'Inactive'):
+        board = make_board(admin, name=f'Purging {name}')
+        board.pending_delete = True
+        board.is_active = name == 'Active'
+    db.session.commit()
+
+    html = login(admin).get('/admin/boards').get_data(as_text=True)
+    assert (_card(html, 'Active Boards'), _card(html, 'Archived Boards')) == (1, 1)
+
+def test_board_status_can_be_toggled(make_user, make_board, login):
+    admin = make_user('admin', is_admin=True)
+    board = make_board(admin)
+    client = login(admin)
+
+    client.post(f'/admin/boards/{board.id}/status', data={'is_archived': 'true'})
+    assert db.session.get(Board, board.id).is_active is False
+    client.post(f'/admin/boards/{board.id}/status', data={'is_archived': 'false'})
+    assert db.session.get(Board, board.id).is_active is True
+
+def test_saving_the_edit_form_keeps_existing_grants(make_user, make_board, login):
+    admin, member = make_user('admin', is_admin=True), make_user('bob')
+    board = make_board(admin)
+    db.session.add(BoardAccess(board_id=board.id, user_id=member.id, granted_by_id=admin.id))
+    db.session.commit()
+    grant = db.session.query(BoardAccess.id, BoardAccess.granted_at).filter_by(board_id=board.id).one()
+
+    # The member picker posts its selection as "members"
+    login(admin).post(f'/admin/boards/{board.id}/edit', data={
+        'name': board.name, 'description': '', 'owner_id': admin.id, 'members': [str(member.id)]
+    })
+    assert db.session.query(BoardAccess.id, BoardAccess.granted_at).filter_by(board_id=board.id).all() == [grant]
+
+def test_creating_a_board_grants_the_picked_members(make_user, login):
+    admin, member = make_user('admin', is_admin=True), make_user('bob')
+    login(admin).post('/admin/boards/create', data={
+        'name': 'Shared', 'description': '', 'owner_id': admin.id, 'members': [str(member.id)]
+    })
+    board = Board.query.filter_by(name='Shared').one()
+    assert [access.user_id for access in BoardAccess.query.filter_by(board_id=board.id)] == [member.id]
@@ -0,0 +1,40 @@
+import re
+from datetime import datetime, timedelta
+from html import unescape
+from app import db
+from app.models import Board, TaskAudit, User
+
+def _activity(html):
+    return [
+        unescape(text.strip())
+        for text in re.findall(r'color: var\(--text-primary\); margin-bottom: 0\.25rem;">(.*?)</p>', html, re.S)
+    ]
+
+def test_dashboard_merges_the_newest_activity_of_every_source(make_user, make_board, make_task, login):
+    admin = make_user('admin', is_admin=True)
+    start = datetime(2026, 1, 1)
+    events = []
+
+    def stamp(model, row_id, column, minutes, description):
+        table = model.__table__
+        db.session.execute(
+            table.update().where(table.c.id == row_id).values({column: start + timedelta(minutes=minutes)})
+        )
+        events.append((minutes, description))
+
+    stamp(User, admin.id, 'created_at', 0, 'New user admin joined')
+    # Interleaved so no source's events are contiguous in the merged timeline
+    for number in range(4):
+        user = make_user(f'user{number}')
+        board = make_board(user, name=f'Board {number}')
+        task = make_task(user, board)
+        audit_id = db.session.query(TaskAudit.id).filter_by(task_id=task.id).scalar()
+        stamp(User, user.id, 'created_at', 10 * number + 1, f'New user user{number} joined')
+        stamp(Board, board.id, 'created_at', 10 * number + 5, f'Board "Board {number}" created')
+        stamp(TaskAudit, audit_id, 'timestamp', 10 * number + 3, f'user{number}: Task created')
+    db.session.commit()
+
+    response = login(admin).get('/admin/dashboard')
+    assert response.status_code == 200
+    expected = [description for _, description in sorted(events, reverse=True)[:10]]
+    assert _activity(response.get_data(as_text=True)) == expected
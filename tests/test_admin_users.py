@@ -0,0 +1,77 @@
+import re
+from html import unescape
+from app import db
+from app.models import BoardAccess
+
+def _listed(html):
+    return re.findall(r'<h6 class="mb-0">(\w+)</h6>', html)
+
+def _next_cursor(html):
+    match = re.search(r'href="[^"]*cursor=([^"&]+)', html)
+    return unescape(match.group(1)) if match else None
+
+def test_user_directory_pages_with_a_cursor(make_user, login):
+    admin = make_user('admin', is_admin=True)
+    for name in ('carol', 'dave', 'erin', 'frank'):
+        make_user(name)
+    client = login(admin)
+
+    seen, cursor = [], None
+    while True:
+        response = client.get('/admin/users', query_string={'per_page': 2, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        seen.append(_listed(html))
+        cursor = _next_cursor(html)
+        if cursor is None:
+            break
+    # Newest first, two per page, nobody repeated or skipped
+    assert seen == [['frank', 'erin'], ['dave', 'carol'], ['admin']]
+
+def test_user_directory_search_matches_prefixes(make_user, login):
+    admin = make_user('admin', is_admin=True)
+    for name in ('bob', 'bobby', 'abbot'):
+        make_user(name)
+
+    html = login(admin).get('/admin/users', query_string={'search': 'bob'}).get_data(as_text=True)
+    assert _listed(html) == ['bob', 'bobby']
+
+def _search(client, **args):
+    return [user['username'] for user in client.get('/admin/users/search', query_string=args).get_json()['users']]
+
+def test_search_can_leave_out_board_members(make_user, make_board, login):
+    admin = make_user('admin', is_admin=True)
+    owner, member, outsider = make_user('bea'), make_user('ben'), make_user('bill')
+    board = make_board(owner)
+    db.session.add(BoardAccess(board_id=board.id, user_id=member.id))
+    db.session.commit()
+    client = login(admin)
+
+    assert _search(client, q='b') == ['bea', 'ben', 'bill']
+    assert _search(client, q='b', exclude_board=board.id) == ['bill']
+    assert _search(client, q='b', limit=2) == ['bea', 'ben']
+    assert _search(client, q='') == []
+    assert client.get('/admin/users/search', query_string={'q': 'b', 'exclude_board': 999}).status_code == 404
+
+def test_board_pages_wire_the_user_pickers(make_user, make_board, login):
+    admin, member = make_user('admin', is_admin=True), make_user('bob')
+    make_user('carol')
+    board = make_board(admin)
+    db.session.add(BoardAccess(board_id=board.id, user_id=member.id))
+    db.session.commit()
+    client = login(admin)
+
+    pages = [client.get('/admin/boards/create'), client.get(f'/admin/boards/{board.id}/edit')]
+    for response in pages:
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        for target in ('owner_id', 'members'):
+            assert f'data-user-typeahead="{target}"' in html and f'id="{target}"' in html
+        assert '"/admin/users/search"' in html
+
+    create, edit = (response.get_data(as_text=True) for response in pages)
+    # Creating starts with empty pickers; editing preloads only the owner and members
+    assert re.findall(r'<option value="(\d+)"', create.split('id="owner_id"')[1].split('</select>')[0]) == []
+    members = edit.split('id="members"')[1].split('</select>')[0]
+    assert re.findall(r'<option value="(\d+)"', members) == [str(admin.id), str(member.id)]
+    assert 'carol' not in members
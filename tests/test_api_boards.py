@@ -0,0 +1,97 @@
+from app import db
+from app.models import BoardAccess
+
+def _share(board, *users, can_edit=True):
+    db.session.add_all(BoardAccess(board_id=board.id, user_id=user.id, can_edit=can_edit) for user in users)
+    db.session.commit()
+
+def _walk(client, limit):
+    pages, cursor = [], None
+    while True:
+        body = client.get('/api/boards', query_string={'limit': limit, 'cursor': cursor or ''}).get_json()
+        pages.append([item['name'] for item in body['items']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+def test_list_costs_the_same_queries_for_more_boards(make_user, make_board, login, count_queries):
+    viewer = make_user('viewer')
+    client = login(viewer)
+
+    def add_boards(start, count):
+        for n in range(start, start + count):
+            # Each board has its own owner and members, so per-board lookups would show up
+            owner = make_user(f'owner{n}')
+            board = make_board(owner, name=f'Board {n}')
+            _share(board, viewer, make_user(f'member{n}'))
+
+    def queries():
+        # Warm the caches the new grants evicted; their loads don't depend on the page size
+        client.get('/api/boards')
+        with count_queries() as counter:
+            response = client.get('/api/boards')
+        assert response.status_code == 200
+        return counter.count, len(response.get_json()['items'])
+
+    add_boards(0, 2)
+    few, listed = queries()
+    assert listed == 2
+    add_boards(2, 6)
+    assert queries() == (few, 8)
+
+def test_unchanged_boards_answer_if_none_match_with_304(make_user, make_board, login):
+    user = make_user()
+    board = make_board(user)
+    client = login(user)
+
+    for url in ('/api/boards', f'/api/boards/{board.id}'):
+        response = client.get(url)
+        etag = response.headers['ETag']
+        assert response.status_code == 200 and etag
+        unchanged = client.get(url, headers={'If-None-Match': etag})
+        assert unchanged.status_code == 304
+        assert unchanged.get_data() == b''
+
+    board.name = 'Renamed'
+    db.session.commit()
+    changed = client.get(f'/api/boards/{board.id}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['name'] == 'Renamed'
+
+def test_cursor_walks_every_board_once_newest_first(make_user, make_board, login):
+    user = make_user()
+    for n in range(5):
+        make_board(user, name=f'Board {n}')
+    client = login(user)
+
+    assert _walk(client, 2) == [['Board 4', 'Board 3'], ['Board 2', 'Board 1'], ['Board 0']]
+    assert _walk(client, 5) == [['Board 4', 'Board 3', 'Board 2', 'Board 1', 'Board 0']]
+
+def test_pending_delete_and_inaccessible_boards_are_left_out(make_user, make_board, login):
+    viewer, other = make_user('viewer'), make_user('other')
+    own = make_board(viewer, name='Own')
+    shared = make_board(other, name='Shared')
+    private = make_board(other, name='Private')
+    doomed = make_board(viewer, name='Doomed')
+    _share(shared, viewer, can_edit=False)
+    doomed.pending_delete = True
+    db.session.commit()
+    client = login(viewer)
+
+    items = client.get('/api/boards').get_json()['items']
+    assert {item['name']: item['capabilities']['can_edit'] for item in items} == {'Own': True, 'Shared': False}
+    assert client.get(f'/api/boards/{own.id}').status_code == 200
+    assert client.get(f'/api/boards/{shared.id}').status_code == 200
+    assert client.get(f'/api/boards/{private.id}').status_code == 404
+    assert client.get(f'/api/boards/{doomed.id}').status_code == 404
+
+def test_admins_see_every_board_except_those_awaiting_a_purge(make_user, make_board, login):
+    owner = make_user('owner')
+    make_board(owner, name='Kept')
+    doomed = make_board(owner, name='Doomed')
+    doomed.pending_delete = True
+    db.session.commit()
+    client = login(make_user('admin', is_admin=True))
+
+    assert [item['name'] for item in client.get('/api/boards').get_json()['items']] == ['Kept']
+    assert client.get(f'/api/boards/{doomed.id}').status_code == 404
@@ -0,0 +1,102 @@
+from app import db
+from app.models import Task, TaskAudit
+
+def _patch(client, task_id, version, **fields):
+    headers = {'If-Match': f'"{version}"'} if version is not None else {}
+    return client.patch(f'/api/tasks/{task_id}', json=fields, headers=headers)
+
+def test_patch_applies_fields_and_bumps_version(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    client = login(user)
+
+    response = _patch(client, task.id, 1, title='Renamed')
+    assert response.status_code == 200
+    assert response.get_json()['title'] == 'Renamed'
+    assert response.get_json()['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+def test_patch_with_stale_version_is_rejected(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    client = login(user)
+
+    assert _patch(client, task.id, 1, title='First').status_code == 200
+    response = _patch(client, task.id, 1, title='Second')
+    assert response.status_code == 412
+    assert response.get_json()['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+    db.session.expire_all()
+    assert db.session.get(Task, task.id).title == 'First'
+
+def test_patch_requires_a_version(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    assert _patch(login(user), task.id, None, title='x').status_code == 428
+
+def test_patch_of_someone_elses_task_is_not_found(make_user, make_board, make_task, login):
+    owner = make_user('owner')
+    task = make_task(owner, make_board(owner))
+    response = _patch(login(make_user('other')), task.id, 1, title='Hijacked')
+    assert response.status_code == 404
+    db.session.expire_all()
+    assert db.session.get(Task, task.id).title == 'Task'
+
+def test_prefer_minimal_returns_no_body(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    response = login(user).patch(
+        f'/api/tasks/{task.id}', json={'priority': 'high'},
+        headers={'If-Match': '"1"', 'Prefer': 'return=minimal'}
+    )
+    assert response.status_code == 204
+    assert response.headers['ETag'] == '"2"'
+
+def test_put_with_tags_writes_one_audit_row(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    client = login(user)
+    client.put(f'/api/tasks/{task.id}', json={'title': 'Tagged', 'tags': ['first']})
+
+    response = client.put(f'/api/tasks/{task.id}', json={'title': 'Retagged', 'tags': ['second']})
+    assert response.status_code == 200
+    audits = TaskAudit.query.filter_by(task_id=task.id, action='updated').order_by(TaskAudit.id).all()
+    assert len(audits) == 2
+    assert set(audits[-1].get_changes()) == {'title', 'tags'}
+
+def test_patch_of_someone_elses_task_leaves_it_unchanged(make_user, make_board, make_task, login):
+    owner, other = make_user(), make_user('bob')
+    task = make_task(owner, make_board(owner))
+
+    assert _patch(login(other), task.id, 1, status='completed').status_code == 404
+    db.session.refresh(task)
+    assert (task.status, task.version) == ('pending', 1)
+    assert TaskAudit.query.filter_by(task_id=task.id, action='updated').count() == 0
+
+def test_patch_rejects_a_non_string_description(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user), description='Kept')
+    client = login(user)
+
+    for description in ({'nested': True}, ['a'], 5):
+        assert _patch(client, task.id, 1, description=description).status_code == 400
+    db.session.expire_all()
+    assert db.session.get(Task, task.id).description == 'Kept'
+
+    response = _patch(client, task.id, 1, description=None)
+    assert (response.status_code, response.get_json()['description']) == (200, None)
+
+def test_history_field_filter_accepts_only_tracked_fields(make_user, make_board, make_task, login):
+    user = make_user(is_admin=True)
+    task = make_task(user, make_board(user))
+    client = login(user)
+    client.put(f'/api/tasks/{task.id}', json={'due_date': '2030-01-01'})
+    client.put(f'/api/tasks/{task.id}', json={'title': 'Renamed'})
+
+    # The underscore is matched literally, not as a LIKE wildcard
+    items = client.get(f'/api/tasks/{task.id}/history', query_string={'field': 'due_date'}).get_json()['items']
+    assert len(items) == 1 and 'due_date' in (items[0]['field_name'] or items[0]['changes'])
+    for field in ('%', 'title"', 'nope'):
+        assert client.get(f'/api/tasks/{task.id}/history', query_string={'field': field}).status_code == 400
+        assert client.get('/admin/audit', query_string={'field': field}).status_code == 400
+    assert len(client.get('/admin/audit', query_string={'field': 'title'}).get_json()['items']) == 1
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import TaskAudit
+from app.services.audit_archive import archive_audits, load_archived_audits, _append_month
+
+def _age_audits(task_id, days):
+    db.session.query(TaskAudit).filter_by(task_id=task_id)\
+        .update({TaskAudit.timestamp: datetime.utcnow() - timedelta(days=days)})
+    db.session.commit()
+
+def _edit(task, count):
+    for n in range(count):
+        task.title = f'Edit {n}'
+        db.session.commit()
+
+def test_archive_indexes_each_task_with_offsets(app, make_user, make_board, make_task):
+    user = make_user()
+    board = make_board(user)
+    first, second = make_task(user, board, title='First'), make_task(user, board, title='Second')
+    _edit(first, 2)
+    _age_audits(first.id, 200)
+    _age_audits(second.id, 200)
+
+    assert archive_audits(older_than_days=90) == 4
+    assert TaskAudit.query.count() == 0
+
+    archive_dir = app.config['AUDIT_ARCHIVE_DIR']
+    [index_name] = [name for name in os.listdir(archive_dir) if name.endswith('.index.json')]
+    with open(os.path.join(archive_dir, index_name)) as f:
+        index = json.load(f)
+    assert set(index) == {str(first.id), str(second.id)}
+    assert index[str(first.id)][0] != index[str(second.id)][0]
+
+    assert [audit.id for audit in load_archived_audits(first.id)] == sorted(
+        audit.id for audit in load_archived_audits(first.id)
+    )
+    assert {audit.task_id for audit in load_archived_audits(first.id)} == {first.id}
+    assert len(load_archived_audits(first.id)) == 3
+
+def test_history_continues_into_archive_by_default(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    _edit(task, 4)
+    _age_audits(task.id, 200)
+    archive_audits(older_than_days=90)
+    _edit(task, 2)
+
+    client = login(user)
+    seen = []
+    cursor = None
+    while True:
+        query = {'limit': 3}
+        if cursor:
+            query['cursor'] = cursor
+        page = client.get(f'/api/tasks/{task.id}/history', query_string=query).get_json()
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+    live_only = client.get(f'/api/tasks/{task.id}/history', query_string={'include_archived': '0'}).get_json()
+    assert len(live_only['items']) == 2
+
+def test_archiving_refuses_to_run_without_an_archive_dir(app, make_user, make_board, make_task):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    _age_audits(task.id, 200)
+    app.config['AUDIT_ARCHIVE_DIR'] = None
+
+    with pytest.raises(RuntimeError):
+        archive_audits(older_than_days=90)
+    assert TaskAudit.query.count() == 1
+    # Readers just find nothing archived
+    assert load_archived_audits(task.id) == []
+    result = app.test_cli_runner().invoke(args=['archive-audits'])
+    assert result.exit_code != 0 and 'AUDIT_ARCHIVE_DIR' in result.output
+
+def test_overlapping_appends_keep_every_member(app):
+    archive_dir = app.config['AUDIT_ARCHIVE_DIR']
+    os.makedirs(archive_dir)
+    stamp = '2024-01-02T03:04:05'
+
+    def append(task_id):
+        with app.app_context():
+            records = [{'id': task_id * 100 + n, 'task_id': task_id, 'user_id': 1, 'action': 'updated',
+                        'timestamp': stamp} for n in range(20)]
+            _append_month(archive_dir, '2024-01', records)
+
+    threads = [threading.Thread(target=append, args=(task_id,)) for task_id in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for task_id in range(1, 9):
+        assert len(load_archived_audits(task_id)) == 20
@@ -0,0 +1,46 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.models import TaskAudit
+from app.services.audit_sink import BufferedAuditSink
+
+@pytest.fixture
+def sink(app):
+    sink = BufferedAuditSink(
+        db.engine, app.extensions['audit_dimensions'], batch_size=100, flush_interval=60, max_queue=2
+    )
+    yield sink
+    sink.close()
+
+def _entries(user, count):
+    return [
+        {'task_id': n, 'user_id': user.id, 'action': 'created', 'field_name': None, 'old_value': None,
+         'new_value': None, 'changes': None, 'timestamp': datetime.utcnow(),
+         'ip_address': '10.0.0.1', 'user_agent': 'pytest'}
+        for n in range(count)
+    ]
+
+def test_writer_starts_on_first_enqueue(sink, make_user):
+    assert sink._thread is None
+    sink.enqueue(_entries(make_user(), 1))
+    assert sink.stats()['writer_running']
+
+def test_full_queue_writes_overflow_without_blocking(sink, make_user):
+    sink.enqueue(_entries(make_user(), 5))
+    stats = sink.stats()
+    assert stats['queue_depth'] == 2
+    assert stats['overflowed'] == 3
+    assert TaskAudit.query.count() == 3
+
+    sink.close()
+    assert TaskAudit.query.count() == 5
+
+def test_forked_process_starts_its_own_writer(sink, make_user):
+    user = make_user()
+    sink.enqueue(_entries(user, 1))
+    parent_thread = sink._thread
+    # As seen from a worker forked after the parent started writing
+    sink._pid = -1
+    sink.enqueue(_entries(user, 1))
+    assert sink._thread is not parent_thread
+    assert sink.stats()['queue_depth'] == 1
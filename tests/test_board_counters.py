@@ -0,0 +1,67 @@
+from datetime import datetime
+from app import db
+from app.models import Board, Task
+from app.services.board_counters import claim_reconcile_run, reconcile_board_counts
+
+def _counts(board_id):
+    return tuple(db.session.query(Board.task_count, Board.completed_count, Board.open_count)
+                 .filter(Board.id == board_id).one())
+
+def test_counts_follow_orm_writes(make_user, make_board, make_task):
+    alice = make_user('alice')
+    first, second = make_board(alice, name='First'), make_board(alice, name='Second')
+    task = make_task(alice, first)
+    make_task(alice, first, status='completed')
+    assert _counts(first.id) == (2, 1, 1)
+
+    # Overwritten after the commit expired it, so the old status comes from the database
+    task.status = 'completed'
+    db.session.commit()
+    assert _counts(first.id) == (2, 2, 0)
+
+    task.board_id = second.id
+    db.session.commit()
+    assert (_counts(first.id), _counts(second.id)) == ((1, 1, 0), (1, 1, 0))
+
+    db.session.delete(task)
+    db.session.commit()
+    assert _counts(second.id) == (0, 0, 0)
+
+def test_counts_follow_api_writes(make_user, make_board, login):
+    alice = make_user('alice')
+    board = make_board(alice)
+    client = login(alice)
+    response = client.post('/api/tasks/bulk', json=[
+        {'title': 'One', 'board_id': board.id}, {'title': 'Two', 'board_id': board.id, 'status': 'completed'}
+    ])
+    assert response.status_code in (200, 201)
+    assert _counts(board.id) == (2, 1, 1)
+
+    task = Task.query.filter_by(title='One').one()
+    response = client.patch(f'/api/tasks/{task.id}', json={'status': 'completed'},
+                            headers={'If-Match': f'"{task.version}"'})
+    assert response.status_code == 200
+    assert _counts(board.id) == (2, 2, 0)
+
+def test_reconcile_repairs_only_drifted_boards(make_user, make_board, make_task):
+    alice = make_user('alice')
+    boards = [make_board(alice, name=f'Board {number}') for number in range(5)]
+    for board in boards:
+        make_task(alice, board)
+    stamp = datetime(2024, 1, 1)
+    table = Board.__table__
+    db.session.execute(table.update().values(updated_at=stamp))
+    db.session.execute(table.update().where(table.c.id.in_([boards[1].id, boards[4].id]))
+                       .values(task_count=9, open_count=0, updated_at=stamp))
+    db.session.commit()
+
+    assert reconcile_board_counts(chunk_size=2) == 2
+    assert all(_counts(board.id) == (1, 0, 1) for board in boards)
+    assert {updated_at for (updated_at,) in db.session.query(Board.updated_at)} == {stamp}
+    assert reconcile_board_counts(chunk_size=2) == 0
+
+def test_one_worker_claims_each_reconcile_run(app):
+    assert claim_reconcile_run(60)
+    assert not claim_reconcile_run(60)
+    # Rounds are claimable again once most of the interval has passed
+    assert claim_reconcile_run(0)
@@ -0,0 +1,92 @@
+import io
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.blueprints import api
+from app.models import Task, TaskAudit, BoardAccess
+
+def test_valid_rows_are_created_and_bad_ones_reported(make_user, make_board, login):
+    alice = make_user('alice')
+    board = make_board(alice)
+    response = login(alice).post('/api/tasks/bulk', json=[
+        {'title': 'First', 'board_id': board.id, 'tags': ['red', 'blue']},
+        {'title': '', 'board_id': board.id},
+        {'title': 'Bad priority', 'board_id': board.id, 'priority': 'someday'},
+        {'title': 'Second', 'board_id': board.id, 'status': 'completed'},
+        'not an object'
+    ])
+    assert response.status_code == 201
+    data = response.get_json()
+    assert (data['created'], data['failed']) == (2, 3)
+    assert [error['row'] for error in data['errors']] == [2, 3, 5]
+    first = db.session.get(Task, data['task_ids'][0])
+    assert sorted(tag.name for tag in first.tags) == ['blue', 'red']
+    assert TaskAudit.query.filter_by(action='created').count() == 2
+
+def test_nothing_created_is_a_400(make_user, make_board, login):
+    alice = make_user('alice')
+    board = make_board(alice)
+    response = login(alice).post('/api/tasks/bulk', json=[{'title': '', 'board_id': board.id}])
+    assert response.status_code == 400
+    assert response.get_json()['created'] == 0
+    assert login(alice).post('/api/tasks/bulk', json={'tasks': 'nope'}).status_code == 400
+
+def test_csv_body_and_multipart_upload_are_read(make_user, make_board, login):
+    alice = make_user('alice')
+    board = make_board(alice)
+    client = login(alice)
+    csv_text = f'title,board_id,tags\nFrom body,{board.id},"a, b"\n'
+
+    response = client.post('/api/tasks/bulk', data=csv_text, content_type='text/csv')
+    assert (response.status_code, response.get_json()['created']) == (201, 1)
+
+    upload = io.BytesIO(f'\ufefftitle,board_id\nFrom upload,{board.id}\n'.encode('utf-8'))
+    response = client.post('/api/tasks/bulk', data={'file': (upload, 'tasks.csv')},
+                           content_type='multipart/form-data')
+    assert (response.status_code, response.get_json()['created']) == (201, 1)
+    assert {task.title for task in Task.query} == {'From body', 'From upload'}
+
+def test_row_cap_rejects_the_whole_load(app, make_user, make_board, login):
+    app.config['BULK_TASK_MAX_ROWS'] = 2
+    alice = make_user('alice')
+    board = make_board(alice)
+    response = login(alice).post('/api/tasks/bulk', json=[{'title': f'T{n}', 'board_id': board.id} for n in range(3)])
+    assert response.status_code == 413
+    assert Task.query.count() == 0
+
+def test_rows_for_boards_the_caller_cannot_write_are_rejected(make_user, make_board, login):
+    alice, bob = make_user('alice'), make_user('bob')
+    own, foreign, read_only = make_board(alice), make_board(bob, name='Foreign'), make_board(bob, name='Read only')
+    db.session.add(BoardAccess(board_id=read_only.id, user_id=alice.id, can_edit=False))
+    db.session.commit()
+
+    response = login(alice).post('/api/tasks/bulk', json=[
+        {'title': 'Mine', 'board_id': own.id},
+        {'title': 'Theirs', 'board_id': foreign.id},
+        {'title': 'Viewer', 'board_id': read_only.id}
+    ])
+    data = response.get_json()
+    assert (response.status_code, data['created']) == (201, 1)
+    assert [error['row'] for error in data['errors']] == [2, 3]
+    assert all('no edit access' in error['error'] for error in data['errors'])
+
+def test_a_failed_chunk_rolls_back_only_itself(app, make_user, make_board, login, monkeypatch):
+    app.config['BULK_TASK_CHUNK_SIZE'] = 2
+    alice = make_user('alice')
+    board = make_board(alice)
+    calls = []
+    audit = api.audit_inserted_tasks
+
+    def fail_second_chunk(session, rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise OperationalError('INSERT', {}, Exception('disk full'))
+        audit(session, rows)
+
+    monkeypatch.setattr(api, 'audit_inserted_tasks', fail_second_chunk)
+    response = login(alice).post('/api/tasks/bulk', json=[{'title': f'T{n}', 'board_id': board.id} for n in range(5)])
+    data = response.get_json()
+    assert (response.status_code, data['created']) == (201, 3)
+    assert [error['row'] for error in data['errors']] == [3, 4]
+    assert sorted(task.title for task in Task.query) == ['T0', 'T1', 'T4']
+    db.session.expire_all()
+    assert board.task_count == 3
@@ -0,0 +1,119 @@
+import gzip
+import importlib.util
+import os
+import pytest
+from app.utils.compression import CompressionMiddleware
+
+BODY = b'x' * 2000
+
+def _run(wsgi_app, accept='gzip'):
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured['status'] = status
+        captured['headers'] = dict(headers)
+
+    middleware = CompressionMiddleware(wsgi_app, min_size=500)
+    body = b''.join(middleware({'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': accept}, start_response))
+    return captured['headers'], body
+
+def test_compresses_and_weakens_strong_etag():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/html'), ('ETag', '"abc"')])
+        return [BODY]
+
+    headers, body = _run(wsgi_app)
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'] == 'W/"abc"'
+    assert gzip.decompress(body) == BODY
+
+def test_no_transform_passes_through():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/html'), ('Cache-Control', 'no-transform')])
+        return [BODY]
+
+    headers, body = _run(wsgi_app)
+    assert 'Content-Encoding' not in headers
+    assert body == BODY
+
+def test_data_passed_to_write_is_kept():
+    def wsgi_app(environ, start_response):
+        write = start_response('200 OK', [('Content-Type', 'text/plain')])
+        write(BODY[:1000])
+        return [BODY[1000:]]
+
+    headers, body = _run(wsgi_app)
+    assert gzip.decompress(body) == BODY
+
+def test_streamed_response_is_compressed_chunk_by_chunk():
+    produced = []
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def generate():
+            for number in range(10):
+                produced.append(number)
+                yield BODY[number * 200:(number + 1) * 200]
+        return generate()
+
+    captured = {}
+    middleware = CompressionMiddleware(wsgi_app, min_size=500)
+    chunks = middleware({'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'},
+                        lambda status, headers, exc_info=None: captured.update(headers=dict(headers)))
+    first = next(chunks)
+    # Only enough of the generator to pass the threshold ran before the first chunk went out
+    assert produced == [0, 1, 2]
+    assert captured['headers']['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(first + b''.join(chunks)) == BODY
+
+def test_body_below_threshold_is_sent_as_is():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return iter([b'{"ok":', b' true}'])
+
+    headers, body = _run(wsgi_app)
+    assert 'Content-Encoding' not in headers and 'Vary' not in headers
+    assert body == b'{"ok": true}'
+
+def test_short_content_length_is_sent_as_is():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/html'), ('Content-Length', '10')])
+        return [b'0123456789']
+
+    headers, body = _run(wsgi_app)
+    assert 'Content-Encoding' not in headers and body == b'0123456789'
+
+def test_already_encoded_response_passes_through():
+    encoded = gzip.compress(BODY)
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/html'), ('Content-Encoding', 'gzip')])
+        return [encoded]
+
+    headers, body = _run(wsgi_app)
+    assert headers['Content-Encoding'] == 'gzip'
+    assert body == encoded
+
+@pytest.mark.parametrize('accept', ['identity', 'gzip;q=0, identity', ''])
+def test_clients_not_accepting_gzip_get_the_plain_body(accept):
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/html')])
+        return [BODY]
+
+    headers, body = _run(wsgi_app, accept=accept)
+    assert 'Content-Encoding' not in headers
+    assert body == BODY
+
+@pytest.fixture
+def serverless_app():
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'api', 'index.py')
+    spec = importlib.util.spec_from_file_location('serverless_index', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_serverless_entry_point_uses_app_middleware(serverless_app):
+    middleware = serverless_app.app.wsgi_app
+    assert type(middleware).__name__ == 'CompressionMiddleware'
+    assert type(middleware).__module__.endswith('app.utils.compression')
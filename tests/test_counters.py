@@ -0,0 +1,74 @@
+from sqlalchemy import event
+from app import db
+from app.models import Task
+from app.models.counter import Counter
+from app.services.counters import COUNTER_NAMES, adjust_counters, read_counters, recount_counters
+
+def test_counters_follow_orm_inserts_and_deletes(make_user, make_board, make_task):
+    assert read_counters() == {'users': 0, 'non_admin_users': 0, 'active_boards': 0, 'tasks': 0}
+    alice, admin = make_user('alice'), make_user('admin', is_admin=True)
+    board = make_board(alice)
+    task = make_task(alice, board)
+    make_task(alice, board)
+    assert read_counters() == {'users': 2, 'non_admin_users': 1, 'active_boards': 1, 'tasks': 2}
+
+    db.session.delete(task)
+    db.session.commit()
+    assert read_counters()['tasks'] == 1
+    assert read_counters() == recount_counters()
+
+def test_flag_flips_move_counters(make_user, make_board):
+    read_counters()
+    alice = make_user('alice')
+    board = make_board(alice)
+
+    alice.is_admin = True
+    board.is_active = False
+    db.session.commit()
+    assert read_counters() == {'users': 1, 'non_admin_users': 0, 'active_boards': 0, 'tasks': 0}
+
+    # Setting a flag to the value it already has changes nothing
+    board.is_active = False
+    db.session.commit()
+    assert read_counters()['active_boards'] == 0
+
+def test_rolled_back_changes_are_not_counted(make_user, make_board):
+    read_counters()
+    alice = make_user('alice')
+    board = make_board(alice)
+    db.session.add(Task(title='Dropped', user_id=alice.id, board_id=board.id))
+    db.session.flush()
+    db.session.rollback()
+    assert read_counters()['tasks'] == 0
+
+def test_core_writes_adjust_counters_directly(make_user, make_board):
+    read_counters()
+    alice = make_user('alice')
+    board = make_board(alice)
+    db.session.execute(Task.__table__.insert(), [
+        {'title': f'Bulk {number}', 'user_id': alice.id, 'board_id': board.id, 'status': 'pending',
+         'priority': 'medium'} for number in range(3)
+    ])
+    adjust_counters(db.session, {'tasks': 3, 'users': 0})
+    db.session.commit()
+    assert read_counters()['tasks'] == 3
+    assert read_counters() == recount_counters()
+
+def test_seeding_tolerates_another_worker_seeding_first(make_user):
+    make_user('alice')
+    raced = []
+
+    def seed_first(conn, cursor, statement, parameters, context, executemany):
+        # Another worker's seed commits just before this one writes its rows
+        if not raced and statement.startswith('INSERT') and 'counters' in statement:
+            raced.append(True)
+            with db.engine.connect() as other:
+                other.execute(Counter.__table__.insert(), [{'name': name, 'value': 0} for name in COUNTER_NAMES])
+                other.commit()
+
+    event.listen(db.engine, 'before_cursor_execute', seed_first)
+    try:
+        assert read_counters()['users'] == 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', seed_first)
+    assert raced and read_counters() == {'users': 1, 'non_admin_users': 1, 'active_boards': 0, 'tasks': 0}
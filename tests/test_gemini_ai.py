@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.services import gemini_ai as gemini_module
+from app.services.gemini_ai import GeminiAI
+
+REPLY = {'candidates': [{'content': {'parts': [{'text': ' A description. '}]}}]}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers generateContent with the server's queued (status, headers) replies, then 200"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append({
+            'path': self.path,
+            'key': self.headers.get('x-goog-api-key'),
+            'connection': self.client_address
+        })
+        status, headers = self.server.replies.pop(0) if self.server.replies else (200, {})
+        body = json.dumps(REPLY if status == 200 else {'error': status}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.requests, server.replies = [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def make_client(monkeypatch):
+    clients = []
+
+    def make_client(base_url, **settings):
+        monkeypatch.setenv('GEMINI_API_KEY', 'secret-key')
+        monkeypatch.setenv('GEMINI_API_BASE_URL', base_url)
+        for name, value in settings.items():
+            monkeypatch.setenv(name, str(value))
+        client = GeminiAI()
+        clients.append(client)
+        return client
+
+    yield make_client
+    for client in clients:
+        client.close()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(gemini_module.time, 'sleep', delays.append)
+    return delays
+
+def _url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/v1beta'
+
+def test_key_is_sent_as_a_header_over_one_pooled_connection(stub_server, make_client):
+    client = make_client(_url(stub_server))
+    assert client.generate_task_description('Write docs') == 'A description.'
+    assert client.improve_task_description('Write docs', 'docs') == 'A description.'
+
+    first, second = stub_server.requests
+    assert first['key'] == 'secret-key' and 'key=' not in first['path']
+    assert first['path'] == '/v1beta/models/gemini-pro:generateContent'
+    # Keep-alive: the second call reused the first call's connection
+    assert first['connection'] == second['connection']
+    assert client.stats()['succeeded'] == 2
+
+def test_retryable_statuses_are_retried_with_jitter(stub_server, make_client, sleeps, monkeypatch):
+    stub_server.replies = [(503, {}), (502, {})]
+    bounds = []
+    monkeypatch.setattr(gemini_module.random, 'uniform', lambda low, high: bounds.append((low, high)) or high / 2)
+    client = make_client(_url(stub_server), GEMINI_MAX_RETRIES=2, GEMINI_RETRY_BACKOFF=0.5)
+
+    assert client.generate_task_description('Retry me') == 'A description.'
+    assert len(stub_server.requests) == 3
+    # Full jitter over an exponentially growing window
+    assert bounds == [(0, 0.5), (0, 1.0)]
+    assert sleeps == [0.25, 0.5]
+    assert client.stats()['retries'] == 2
+
+def test_retry_after_is_honoured_and_capped(stub_server, make_client, sleeps):
+    stub_server.replies = [(429, {'Retry-After': '3'}), (429, {'Retry-After': '60'})]
+    client = make_client(_url(stub_server), GEMINI_MAX_RETRIES=2, GEMINI_RETRY_MAX_BACKOFF=8)
+
+    assert client.generate_task_description('Slow down') == 'A description.'
+    assert sleeps == [3.0, 8.0]
+
+def test_other_errors_are_not_retried(stub_server, make_client, sleeps):
+    stub_server.replies = [(400, {})]
+    client = make_client(_url(stub_server), GEMINI_MAX_RETRIES=2)
+
+    assert client.generate_task_description('Bad request') is None
+    assert len(stub_server.requests) == 1 and sleeps == []
+    stats = client.stats()
+    assert (stats['failed'], stats['last_error']) == (1, 'HTTP 400')
+
+def test_connection_errors_are_reported_without_urls(make_client, sleeps, caplog):
+    # Nothing listens on port 1
+    client = make_client('http://127.0.0.1:1/v1beta', GEMINI_MAX_RETRIES=1)
+    with caplog.at_level(logging.WARNING, logger=gemini_module.__name__):
+        assert client.generate_task_description('Offline') is None
+
+    error = client.stats()['last_error']
+    assert error.startswith('ConnectionError') and '<url>' in error
+    assert 'generateContent' not in error and 'secret-key' not in error
+    assert len(sleeps) == 1
+    assert 'generateContent' not in caplog.text and 'Offline' not in caplog.text
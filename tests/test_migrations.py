@@ -0,0 +1,182 @@
+import os
+from datetime import datetime
+import sqlite3
+import pytest
+from sqlalchemy import inspect
+from app import create_app, db
+from app.models import TaskAudit
+from app.services.migrations import MIGRATIONS, upgrade, pending_migrations
+from tests.conftest import TestConfig
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline_schema.sql')
+
+@pytest.fixture
+def legacy_app(tmp_path):
+    """An app over a database created by the original models, with one task"""
+    path = tmp_path / 'legacy.db'
+    connection = sqlite3.connect(path)
+    with open(BASELINE) as schema:
+        connection.executescript(schema.read())
+    connection.executescript("""
+        INSERT INTO users (id, username, email, password_hash, is_admin) VALUES (1, 'old', 'old@example.com', 'x', 0);
+        INSERT INTO boards (id, name, owner_id, is_active) VALUES (1, 'Old board', 1, 1);
+        INSERT INTO tasks (id, title, status, user_id, board_id) VALUES (1, 'Old task', 'completed', 1, 1);
+        INSERT INTO task_audits (id, task_id, user_id, action, timestamp, ip_address, user_agent)
+            VALUES (1, 1, 1, 'created', '2024-01-02 03:04:05.000000', '10.0.0.1', 'curl/8.0');
+    """)
+    connection.commit()
+    connection.close()
+
+    settings = type('Settings', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    app = create_app(settings)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+def _columns(table):
+    return {column['name'] for column in inspect(db.engine).get_columns(table)}
+
+def test_upgrade_applies_every_step_once(legacy_app):
+    assert upgrade() == [name for name, _ in MIGRATIONS]
+    assert pending_migrations() == []
+    assert upgrade() == []
+
+def test_tasks_gain_version(legacy_app):
+    upgrade()
+    assert 'version' in _columns('tasks')
+    assert db.session.execute(db.text('SELECT version FROM tasks WHERE id = 1')).scalar() == 1
+
+def test_fresh_database_is_created_and_stamped(app):
+    db.drop_all()
+    assert upgrade() == []
+    assert pending_migrations() == []
+    assert 'version' in _columns('tasks')
+
+def _indexes(table):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table)}
+
+def test_task_audits_ids_are_not_reused(legacy_app):
+    upgrade()
+    sql = db.session.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'task_audits'")).scalar()
+    assert 'AUTOINCREMENT' in sql
+    assert 'ix_task_audits_task_timeline' in _indexes('task_audits')
+
+def test_task_audits_gain_changes(legacy_app):
+    upgrade()
+    assert 'changes' in _columns('task_audits')
+
+def test_audit_dimensions_are_added(legacy_app):
+    upgrade()
+    assert {'value_hash', 'value'} <= _columns('audit_user_agents')
+    assert 'value' in _columns('audit_ip_addresses')
+    assert {'ip_address_id', 'user_agent_id', 'ip_address', 'user_agent'} <= _columns('task_audits')
+    audit = db.session.get(TaskAudit, 1)
+    assert (audit.get_ip_address(), audit.get_user_agent()) == ('10.0.0.1', 'curl/8.0')
+
+def test_task_audits_gain_timeline_indexes(legacy_app):
+    upgrade()
+    assert {
+        'ix_task_audits_task_timeline', 'ix_task_audits_timeline',
+        'ix_task_audits_user_timeline', 'ix_task_audits_action_timeline'
+    } <= _indexes('task_audits')
+
+def test_task_snapshots_table_is_created(legacy_app):
+    upgrade()
+    assert {'ix_task_snapshots_task_taken', 'ix_task_snapshots_board_taken'} <= _indexes('task_snapshots')
+
+def test_task_audits_no_longer_reference_tasks(legacy_app):
+    upgrade()
+    keys = inspect(db.engine).get_foreign_keys('task_audits')
+    assert 'tasks' not in {key['referred_table'] for key in keys}
+
+def test_users_gain_created_timeline_index(legacy_app):
+    upgrade()
+    assert 'ix_users_created_timeline' in _indexes('users')
+
+def test_tasks_gain_board_status_index(legacy_app):
+    upgrade()
+    assert 'ix_tasks_board_status' in _indexes('tasks')
+
+def test_pending_delete_columns_and_purge_jobs_are_added(legacy_app):
+    upgrade()
+    assert 'pending_delete' in _columns('users') and 'pending_delete' in _columns('boards')
+    assert 'ix_purge_jobs_status' in _indexes('purge_jobs')
+    assert db.session.execute(db.text('SELECT pending_delete FROM boards WHERE id = 1')).scalar() == 0
+
+def test_counters_table_and_board_timeline_index_are_added(legacy_app):
+    from app.services.counters import read_counters
+    upgrade()
+    assert 'ix_boards_created_timeline' in _indexes('boards')
+    assert read_counters() == {'users': 1, 'non_admin_users': 1, 'active_boards': 1, 'tasks': 1}
+
+def test_board_task_counts_are_added_and_backfilled(legacy_app):
+    upgrade()
+    counts = db.session.execute(db.text('SELECT task_count, completed_count, open_count FROM boards WHERE id = 1')).one()
+    assert tuple(counts) == (1, 1, 0)
+
+def test_tasks_archive_is_added_and_task_ids_stay_unique(legacy_app):
+    from app.models import Task, TaskArchive
+    # create_all on a newer checkout makes tasks_archive without touching tasks
+    TaskArchive.__table__.create(db.engine)
+    with db.engine.begin() as connection:
+        connection.execute(TaskArchive.__table__.insert().values(
+            id=5, title='Moved', user_id=1, board_id=1, status='archived', moved_at=datetime(2024, 1, 1)
+        ))
+    upgrade()
+    assert {'archived_at', 'version'} <= _columns('tasks')
+    assert {'ix_tasks_board_status', 'ix_tasks_status_archived'} <= _indexes('tasks')
+    assert 'task_id' in _columns('task_tags_archive')
+
+    task = Task(title='New', user_id=1, board_id=1)
+    db.session.add(task)
+    db.session.commit()
+    assert task.id == 6
+    assert db.session.get(Task, 1).title == 'Old task'
+
+def _schema():
+    inspector = inspect(db.engine)
+    schema = {}
+    for table in db.metadata.sorted_tables:
+        sql = db.session.execute(
+            db.text('SELECT sql FROM sqlite_master WHERE type = :type AND name = :name'),
+            {'type': 'table', 'name': table.name}
+        ).scalar()
+        schema[table.name] = {
+            'columns': {
+                column['name']: (str(column['type']), column['nullable'])
+                for column in inspector.get_columns(table.name)
+            },
+            'indexes': {
+                index['name']: (tuple(index['column_names']), bool(index['unique']))
+                for index in inspector.get_indexes(table.name)
+            },
+            'foreign_keys': sorted(
+                (tuple(key['constrained_columns']), key['referred_table'])
+                for key in inspector.get_foreign_keys(table.name)
+            ),
+            'autoincrement': 'AUTOINCREMENT' in sql
+        }
+    return schema
+
+def test_upgraded_legacy_database_matches_the_models(legacy_app, tmp_path):
+    upgrade()
+    upgraded = _schema()
+    db.session.remove()
+
+    fresh_path = tmp_path / 'fresh.db'
+    settings = type('Settings', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{fresh_path}'})
+    fresh_app = create_app(settings)
+    with fresh_app.app_context():
+        upgrade()
+        fresh = _schema()
+        db.session.remove()
+        db.engine.dispose()
+
+    assert upgraded.keys() == fresh.keys()
+    for name in fresh:
+        assert upgraded[name] == fresh[name], name
+
+def test_user_import_jobs_table_is_added(legacy_app):
+    upgrade()
+    assert 'ix_user_import_jobs_status' in _indexes('user_import_jobs')
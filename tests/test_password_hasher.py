@@ -0,0 +1,39 @@
+import importlib.util
+import os
+import pytest
+from app.services.password_hasher import PasswordHasher
+
+METHOD = 'pbkdf2:sha256:1000'
+
+@pytest.mark.parametrize('start_method', [None, 'spawn'])
+def test_process_pool_hashes_and_verifies(start_method):
+    hasher = PasswordHasher(method=METHOD, workers=1, start_method=start_method)
+    try:
+        pwhash = hasher.hash('secret')
+        assert hasher.verify(pwhash, 'secret')
+        assert not hasher.verify(pwhash, 'wrong')
+        assert hasher.hash_many(['a', 'b'])[1].startswith(hasher.current_params)
+        assert hasher.stats()['pool'] == 'process'
+    finally:
+        hasher.close()
+
+@pytest.fixture
+def serverless_app(monkeypatch):
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', METHOD)
+    monkeypatch.setenv('PASSWORD_HASH_WORKERS', '1')
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'api', 'index.py')
+    spec = importlib.util.spec_from_file_location('serverless_index', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    module.password_hasher.close()
+
+def test_serverless_entry_point_uses_the_shared_hasher(serverless_app):
+    hasher = serverless_app.password_hasher
+    assert type(hasher).__module__.endswith('app.services.password_hasher')
+    assert hasher.verify(hasher.hash('secret'), 'secret')
+
+def test_health_does_not_expose_hasher_stats(serverless_app):
+    data = serverless_app.app.test_client().get('/health').get_json()
+    assert data['status'] == 'online'
+    assert 'password_hasher' not in data
@@ -0,0 +1,103 @@
+from flask import g
+from app import db
+from app.models import Board, BoardAccess, Task, TaskAudit
+from app.models.purge import PurgeJob
+from app.services.counters import read_counters
+from app.services.purge import request_purge, run_purge_job
+
+def _pending_board(make_user, make_board):
+    owner, member, admin = make_user('owner'), make_user('bob'), make_user('admin', is_admin=True)
+    board = make_board(owner)
+    db.session.add(BoardAccess(board_id=board.id, user_id=member.id, can_edit=True, can_delete=True))
+    db.session.commit()
+    return owner, member, admin, board
+
+def test_pending_board_is_read_only_for_everyone(app, make_user, make_board):
+    owner, member, admin, board = _pending_board(make_user, make_board)
+    with app.test_request_context():
+        # Warm the cached ACLs so the purge request has something to evict
+        assert board.permissions_for(member).can_edit
+        request_purge(board)
+        db.session.commit()
+        for user in (owner, member, admin):
+            permissions = board.permissions_for(user)
+            assert permissions.can_view and not permissions.can_edit and not permissions.can_delete
+        assert 'pending_board_ids' in g
+
+def test_api_refuses_tasks_on_a_pending_board(make_user, make_board, login):
+    owner, _, _, board = _pending_board(make_user, make_board)
+    request_purge(board)
+    db.session.commit()
+
+    response = login(owner).post('/api/tasks', json={'title': 'Late', 'board_id': board.id})
+    assert response.status_code == 403
+    assert Task.query.count() == 0
+
+def test_task_form_offers_no_pending_boards(make_user, make_board, login):
+    owner, member, admin, board = _pending_board(make_user, make_board)
+    kept = make_board(owner, name='Kept')
+    request_purge(board)
+    db.session.commit()
+
+    for user in (owner, member, admin):
+        html = login(user).get('/tasks/create').get_data(as_text=True)
+        assert f'value="{kept.id}"' in html and f'value="{board.id}"' not in html
+
+def test_purge_removes_a_board_in_chunks(make_user, make_board, make_task, count_queries):
+    owner, _, _, board = _pending_board(make_user, make_board)
+    for number in range(5):
+        make_task(owner, board, title=f'Task {number}', status='completed' if number % 2 else 'pending')
+    board_id = board.id
+    job = request_purge(board)
+    db.session.commit()
+
+    with count_queries() as counter:
+        job = run_purge_job(job.id, chunk_size=2)
+    task_deletes = [statement for statement in counter.statements if statement.startswith('DELETE FROM tasks ')]
+    assert len(task_deletes) == 3
+
+    assert (job.status, job.deleted_tasks, job.deleted_boards) == ('done', 5, 1)
+    assert db.session.get(Board, board_id) is None
+    assert Task.query.count() == 0 and TaskAudit.query.count() == 0
+    assert BoardAccess.query.count() == 0
+    assert read_counters()['tasks'] == 0
+
+def test_interrupted_purge_resumes(make_user, make_board, make_task):
+    owner, _, _, board = _pending_board(make_user, make_board)
+    for number in range(3):
+        make_task(owner, board, title=f'Task {number}')
+    job = request_purge(board)
+    db.session.commit()
+    job.status, job.deleted_tasks = 'failed', 1
+    db.session.execute(Task.__table__.delete().where(Task.__table__.c.title == 'Task 0'))
+    db.session.commit()
+
+    job = run_purge_job(job.id, chunk_size=2)
+    assert (job.status, job.deleted_tasks, job.total_tasks) == ('done', 3, 3)
+    assert db.session.get(PurgeJob, job.id).finished_at is not None
+
+def test_tasks_on_a_pending_board_cannot_be_changed(make_user, make_board, make_task, login):
+    owner, _, _, board = _pending_board(make_user, make_board)
+    task = make_task(owner, board)
+    request_purge(board)
+    db.session.commit()
+    client = login(owner)
+
+    assert client.put(f'/api/tasks/{task.id}', json={'title': 'Late'}).status_code == 409
+    response = client.patch(f'/api/tasks/{task.id}', json={'title': 'Late'}, headers={'If-Match': '"1"'})
+    assert response.status_code == 409
+    assert client.delete(f'/api/tasks/{task.id}').status_code == 409
+    db.session.expire_all()
+    assert (db.session.get(Task, task.id).title, db.session.get(Task, task.id).version) == ('Task', 1)
+
+def test_purging_a_user_marks_their_boards_at_once(app, make_user, make_board):
+    owner, member, _, board = _pending_board(make_user, make_board)
+    other = make_board(member, name='Other')
+    with app.test_request_context():
+        assert board.permissions_for(member).can_edit
+        request_purge(owner)
+        db.session.commit()
+        assert not board.permissions_for(member).can_edit
+    assert (board.pending_delete, board.is_active) == (True, False)
+    assert (other.pending_delete, other.is_active) == (False, True)
+    assert read_counters()['active_boards'] == 1
@@ -0,0 +1,66 @@
+from app import db
+from app.models import Task, Tag
+from app.utils.serializers import serialize_tasks, serialize_boards
+
+def _tasks(user, board, count):
+    tag = Tag.query.filter_by(name='urgent').first() or Tag(name='urgent')
+    tasks = [Task(title=f'Task {n}', user_id=user.id, board_id=board.id, tags=[tag]) for n in range(count)]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return [task.id for task in tasks]
+
+def test_serialize_tasks_query_count_does_not_grow(make_user, make_board, count_queries):
+    user = make_user()
+    board = make_board(user)
+    few = _tasks(user, board, 5)
+    many = few + _tasks(user, board, 200)
+
+    db.session.expire_all()
+    with count_queries() as small:
+        serialize_tasks(few)
+    with count_queries() as large:
+        items = serialize_tasks(many)
+
+    assert len(items) == len(many)
+    assert large.count == small.count
+    assert items[0]['tags'] == ['urgent']
+    assert items[0]['board_name'] == board.name
+
+def test_serialize_tasks_keeps_input_order_and_skips_missing(make_user, make_board):
+    user = make_user()
+    board = make_board(user)
+    ids = _tasks(user, board, 3)
+    items = serialize_tasks([ids[2], 999999, ids[0]])
+    assert [item['id'] for item in items] == [ids[2], ids[0]]
+
+def test_task_to_dict_matches_batch_serializer(make_user, make_board, make_task):
+    user = make_user()
+    board = make_board(user)
+    task = make_task(user, board, tags=[Tag(name='home')])
+    assert task.to_dict() == serialize_tasks([task.id])[0]
+
+def test_to_dict_of_transient_objects(make_user, make_board):
+    user = make_user()
+    board = make_board(user)
+    task = Task(title='Draft', user_id=user.id, board_id=board.id)
+    data = task.to_dict()
+    assert data['id'] is None
+    assert data['title'] == 'Draft'
+    assert data['board_id'] == board.id
+    assert data['created_at'] is None
+
+def test_board_to_dict_reads_counter_columns(make_user, make_board, make_task, count_queries):
+    user = make_user()
+    board = make_board(user)
+    make_task(user, board)
+    make_task(user, board, status='completed')
+    db.session.refresh(board)
+    board.owner
+
+    with count_queries() as queries:
+        data = board.to_dict()
+    assert queries.count == 0
+    assert (data['task_count'], data['completed_count'], data['open_count']) == (2, 1, 1)
+    expected = serialize_boards([board.id])[0]
+    expected.pop('member_count')
+    assert data == expected
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import Task, TaskArchive
+from app.services.task_archive import move_archived_tasks, restore_archived_task
+from app.utils.serializers import serialize_archived_tasks, serialize_tasks
+from app.utils.tags import get_or_create_tags
+
+def _archive(user, board, make_task, count, **values):
+    old = datetime.utcnow() - timedelta(days=60)
+    ids = [make_task(user, board, title=f'Old {number}', status='archived', **values).id for number in range(count)]
+    db.session.execute(Task.__table__.update().where(Task.__table__.c.id.in_(ids)).values(archived_at=old))
+    db.session.commit()
+    return ids
+
+def test_archived_tasks_serialize_like_hot_ones(make_user, make_board, make_task):
+    alice = make_user('alice')
+    board = make_board(alice)
+    (task_id,) = _archive(alice, board, make_task, 1)
+    task = db.session.get(Task, task_id)
+    task.tags = get_or_create_tags(['red', 'blue'])
+    db.session.commit()
+    hot = serialize_tasks([task_id])[0]
+
+    assert move_archived_tasks(older_than_days=30) == 1
+    (cold,) = serialize_archived_tasks([task_id])
+    assert cold.pop('cold') is True and cold.pop('archived_at')
+    assert cold == hot
+
+def test_include_archived_pages_through_the_archive(make_user, make_board, make_task, login):
+    alice = make_user('alice')
+    board = make_board(alice)
+    archived_ids = _archive(alice, board, make_task, 5)
+    move_archived_tasks(older_than_days=30)
+    hot = make_task(alice, board, title='Hot')
+    client = login(alice)
+
+    assert [item['id'] for item in client.get('/api/tasks').get_json()] == [hot.id]
+
+    seen, cursor = [], None
+    while True:
+        page = client.get('/api/tasks', query_string={
+            'include_archived': '1', 'limit': 2, **({'cursor': cursor} if cursor else {})
+        }).get_json()
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen[0] == hot.id
+    assert sorted(seen[1:]) == archived_ids and len(seen) == 6
+
+def test_restore_refuses_an_id_taken_by_a_hot_task(make_user, make_board, make_task, login):
+    alice = make_user('alice')
+    board = make_board(alice)
+    (task_id,) = _archive(alice, board, make_task, 1)
+    move_archived_tasks(older_than_days=30)
+    # What a database that reused ids before migration 0013 could hold
+    db.session.execute(Task.__table__.insert().values(
+        id=task_id, title='Reused', user_id=alice.id, board_id=board.id, status='pending', version=1
+    ))
+    db.session.commit()
+
+    response = login(alice).post(f'/api/tasks/{task_id}/restore')
+    assert response.status_code == 409
+    assert db.session.get(TaskArchive, task_id) is not None
+    assert db.session.get(Task, task_id).title == 'Reused'
+
+def test_restored_task_keeps_its_id(make_user, make_board, make_task):
+    alice = make_user('alice')
+    board = make_board(alice)
+    (task_id,) = _archive(alice, board, make_task, 1)
+    move_archived_tasks(older_than_days=30)
+    newer = make_task(alice, board, title='Newer')
+    assert newer.id > task_id
+
+    assert restore_archived_task(task_id)
+    db.session.commit()
+    assert db.session.get(Task, task_id).title == 'Old 0'
+    assert db.session.get(TaskArchive, task_id) is None
@@ -0,0 +1,119 @@
+import json
+from datetime import datetime, timedelta
+from app import db
+from app.models import TaskAudit, TaskSnapshot
+from app.services.audit_archive import archive_audits
+from app.services.task_archive import move_archived_tasks
+from app.services.task_history import capture_state, reconstruct_tasks, reconstruct_task, reconstruct_board
+from app.utils.audit_diff import encode_changes
+
+ORIGINAL = 'Paragraph one. ' * 30
+
+def _edits(count):
+    return [ORIGINAL.replace('one', f'edit {n}', n + 1) + f'Appendix {n}.' for n in range(count)]
+
+def _history(client, task_id, limit):
+    items, cursor = [], None
+    while True:
+        query = {'limit': limit, 'field': 'description'}
+        if cursor:
+            query['cursor'] = cursor
+        page = client.get(f'/api/tasks/{task_id}/history', query_string=query).get_json()
+        items.extend(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return items
+
+def test_long_description_edits_reconstruct_to_current_text(make_user, make_board, make_task, login):
+    user = make_user()
+    task = make_task(user, make_board(user), description=ORIGINAL)
+    client = login(user)
+    edits = _edits(6)
+    for n, text in enumerate(edits):
+        response = client.patch(f'/api/tasks/{task.id}', json={'description': text},
+                                headers={'If-Match': f'"{n + 1}"'})
+        assert response.status_code == 200
+        if n == 2:
+            # The first three edits are read back from the archive
+            db.session.query(TaskAudit).filter_by(task_id=task.id)\
+                .update({TaskAudit.timestamp: datetime.utcnow() - timedelta(days=200)})
+            db.session.commit()
+            archive_audits(older_than_days=90)
+
+    changes = [item['changes']['description'] for item in _history(client, task.id, limit=2)]
+    assert all(isinstance(change, list) for change in changes)
+    db.session.refresh(task)
+    assert changes[0][1] == task.description
+    assert [new for _, new in changes] == list(reversed(edits))
+    assert [old for old, _ in changes] == list(reversed([ORIGINAL] + edits[:-1]))
+
+def _snapshot(task, taken_at, **state):
+    values = capture_state(task)
+    values.update(state)
+    db.session.add(TaskSnapshot(task_id=task.id, board_id=task.board_id, version=task.version,
+                                taken_at=taken_at, state=json.dumps(values)))
+
+def _audit(task, timestamp, **changes):
+    db.session.add(TaskAudit(task_id=task.id, user_id=task.user_id, action='updated', timestamp=timestamp,
+                             changes=encode_changes(changes)))
+
+def _at(days):
+    return datetime.utcnow() - timedelta(days=days)
+
+def test_replay_starts_after_each_tasks_own_snapshot(make_user, make_board, make_task):
+    user = make_user()
+    board = make_board(user)
+    first, second = make_task(user, board, title='First'), make_task(user, board, title='Second')
+    _snapshot(first, _at(10), title='First 0')
+    _audit(second, _at(8), title=('Second 0', 'Second 1'))
+    _snapshot(second, _at(6), title='Second 2')
+    _audit(first, _at(4), title=('First 0', 'First 1'))
+    db.session.commit()
+
+    states = reconstruct_tasks([first.id, second.id], _at(2))
+    assert states[first.id]['title'] == 'First 1'
+    assert states[second.id]['title'] == 'Second 2'
+    assert all(state['complete'] for state in states.values())
+
+def test_replay_tracks_completed_at(make_user, make_board, make_task):
+    user = make_user()
+    task = make_task(user, make_board(user))
+    completed = _at(4)
+    _snapshot(task, _at(10), status='pending', completed_at=None)
+    _audit(task, completed, status=('pending', 'completed'))
+    db.session.commit()
+
+    assert reconstruct_task(task.id, _at(2))['completed_at'] == completed.isoformat()
+    assert reconstruct_task(task.id, _at(6))['completed_at'] is None
+
+def test_unwinding_reads_archived_audits(make_user, make_board, make_task):
+    user = make_user()
+    task = make_task(user, make_board(user), title='Two', created_at=_at(300))
+    db.session.query(TaskAudit).filter_by(task_id=task.id).update({TaskAudit.timestamp: _at(300)})
+    _audit(task, _at(200), title=('One', 'Two'))
+    db.session.commit()
+    assert archive_audits(older_than_days=90) == 2
+
+    state = reconstruct_task(task.id, _at(250))
+    assert state['title'] == 'One'
+    assert state['complete']
+
+def test_board_includes_tasks_moved_off_it_since(make_user, make_board, make_task):
+    user = make_user()
+    old_board, new_board = make_board(user, name='Old'), make_board(user, name='New')
+    task = make_task(user, old_board)
+    before_move = datetime.utcnow()
+    task.board_id = new_board.id
+    db.session.commit()
+
+    assert [state['id'] for state in reconstruct_board(old_board.id, before_move)] == [task.id]
+    assert reconstruct_board(new_board.id, before_move) == []
+
+def test_board_includes_tasks_moved_to_tasks_archive(make_user, make_board, make_task):
+    user = make_user()
+    board = make_board(user)
+    task_id = make_task(user, board, status='archived', archived_at=_at(60)).id
+    assert move_archived_tasks(older_than_days=30) == 1
+
+    [state] = reconstruct_board(board.id, datetime.utcnow())
+    assert (state['id'], state['status']) == (task_id, 'archived')
@@ -0,0 +1,60 @@
+from collections import Counter
+from flask_login import login_user
+from app import create_app, db
+from app.services.cache_versions import USER_CACHE_VERSION, read_cache_version
+from app.services.user_cache import CachedUser, UserIdentityCache
+from tests.conftest import TestConfig
+
+def test_cached_user_carries_is_active(app, make_user):
+    user = make_user()
+    cache = app.extensions['user_cache']
+    assert cache.get(user.id).is_active is True
+    assert CachedUser(user.id, user.username, False, False).is_active is False
+
+    user.pending_delete = True
+    db.session.commit()
+    assert user.is_active is False
+    assert cache.get(user.id) is None
+
+def test_pending_delete_user_cannot_sign_in(app, make_user):
+    user = make_user()
+    user.pending_delete = True
+    db.session.commit()
+    with app.test_request_context():
+        assert login_user(user) is False
+
+def test_commit_listeners_are_registered_once(app, config):
+    create_app(type('Settings', (TestConfig,), config))
+    listeners = Counter(
+        f'{listener.__module__}.{listener.__name__}' for listener in db.session().dispatch.after_commit
+    )
+    assert listeners['app.services.user_cache._invalidate_committed'] == 1
+    assert listeners['app.services.acl._invalidate_committed'] == 1
+
+def test_commit_evicts_the_edited_user(app, make_user):
+    user = make_user()
+    cache = app.extensions['user_cache']
+    cache.get(user.id)
+    user.username = 'renamed'
+    db.session.commit()
+    assert cache.get(user.id).username == 'renamed'
+
+def test_other_processes_drop_identities_a_commit_made_stale(app, make_user):
+    user = make_user(is_admin=True)
+    # Another worker's cache, which this process's commit listeners never reach
+    other = UserIdentityCache(ttl=3600)
+    assert other.get(user.id).is_admin is True
+
+    user.set_password('changed')
+    db.session.commit()
+    assert read_cache_version(USER_CACHE_VERSION) == 0
+    assert other.hits == 0 and other.get(user.id) and other.hits == 1
+
+    user.is_admin = False
+    db.session.commit()
+    assert other.get(user.id).is_admin is False
+
+    user.pending_delete = True
+    db.session.commit()
+    assert other.get(user.id) is None
+    assert read_cache_version(USER_CACHE_VERSION) == 2
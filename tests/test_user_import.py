@@ -0,0 +1,116 @@
+import csv
+import io
+import time
+from urllib.parse import parse_qs, urlparse
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import Board, BoardAccess, User, UserImportJob
+from app.services import user_import
+from app.services.counters import adjust_counters, read_counters
+from app.services.user_import import import_users, report_csv, request_import
+
+def test_report_quotes_cells_spreadsheets_would_evaluate():
+    text = report_csv([{
+        'line': 2, 'username': '=HYPERLINK("http://evil")', 'email': '@SUM(A1)', 'status': 'rejected',
+        'user_id': None, 'board_id': None, 'message': '-1+1'
+    }, {
+        'line': 3, 'username': 'plain', 'email': '+plain@example.com', 'status': 'created',
+        'user_id': 7, 'board_id': 8, 'message': ''
+    }])
+    first, second = csv.DictReader(io.StringIO(text))
+    assert first['username'] == '\'=HYPERLINK("http://evil")'
+    assert first['email'] == "'@SUM(A1)" and first['message'] == "'-1+1"
+    assert (second['username'], second['email'], second['user_id']) == ('plain', "'+plain@example.com", '7')
+
+def _wait_for(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/admin/imports/{job_id}').get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'import {job_id} did not finish')
+
+def test_upload_is_imported_in_the_background(make_user, login):
+    admin = make_user('admin', is_admin=True)
+    client = login(admin)
+    upload = io.BytesIO(b'username,email,password\n=cmd|calc,bad@example.com,secret\nbob,bob@example.com,secret\n')
+    response = client.post('/admin/users/import', data={'file': (upload, 'users.csv')},
+                           content_type='multipart/form-data')
+    job_id = int(parse_qs(urlparse(response.headers['Location']).query)['job'][0])
+
+    job = _wait_for(client, job_id)
+    assert (job['status'], job['total_rows'], job['processed_rows'], job['created_users']) == ('done', 2, 2, 2)
+    assert db.session.get(UserImportJob, job_id).rows is None
+    assert 'Download report' in client.get('/admin/users/import', query_string={'job': job_id}).get_data(as_text=True)
+
+    report = client.get(f'/admin/imports/{job_id}/report')
+    assert report.headers['X-Import-Created'] == '2'
+    first, second = csv.DictReader(io.StringIO(report.get_data(as_text=True)))
+    assert first['username'] == "'=cmd|calc" and second['status'] == 'created'
+
+def test_report_waits_for_the_import_to_finish(make_user, login):
+    admin = make_user('admin', is_admin=True)
+    job = request_import([{'username': 'bob', 'email': 'bob@example.com', 'password': 'secret'}])
+    db.session.commit()
+    assert login(admin).get(f'/admin/imports/{job.id}/report').status_code == 409
+
+def _row(username, email=None, **values):
+    return {'username': username, 'email': email or f'{username}@example.com', 'password': 'secret', **values}
+
+def test_existing_and_repeated_names_are_rejected(make_user):
+    make_user('alice')
+    report = import_users([
+        _row('alice', 'new@example.com'),
+        _row('fresh', 'alice@example.com'),
+        _row('carol'),
+        _row('carol', 'other@example.com'),
+        _row('dave', 'carol@example.com'),
+    ])
+    assert [(result['line'], result['status'], result['message']) for result in report] == [
+        (2, 'skipped', 'username already exists'),
+        (3, 'skipped', 'email already exists'),
+        (4, 'created', ''),
+        (5, 'skipped', 'username repeated in file'),
+        (6, 'skipped', 'email repeated in file'),
+    ]
+    assert User.query.count() == 2
+
+def test_users_get_personal_boards_and_grants(make_user, make_board):
+    owner = make_user('owner')
+    shared, other = make_board(owner, name='Shared'), make_board(owner, name='Other')
+    report = import_users([
+        _row('bob', boards=f'{shared.id};{other.id}'),
+        _row('carol', boards=str(shared.id)),
+        _row('dave', boards='999'),
+    ], granted_by_id=owner.id)
+
+    bob, carol, dave = report
+    assert dave['status'] == 'skipped' and dave['message'] == 'unknown boards 999'
+    for result in (bob, carol):
+        board = db.session.get(Board, result['board_id'])
+        assert (board.owner_id, board.name) == (result['user_id'], f"{result['username']}'s Personal Board")
+    grants = {(access.board_id, access.user_id, access.granted_by_id) for access in BoardAccess.query}
+    assert grants == {
+        (shared.id, bob['user_id'], owner.id), (other.id, bob['user_id'], owner.id), (shared.id, carol['user_id'], owner.id)
+    }
+    assert read_counters()['users'] == 3
+
+def test_a_failed_chunk_rolls_back_only_itself(make_user, monkeypatch):
+    calls = []
+
+    def fail_second_chunk(executor, deltas):
+        calls.append(deltas)
+        if len(calls) == 2:
+            raise OperationalError('UPDATE counters', {}, Exception('locked'))
+        adjust_counters(executor, deltas)
+
+    monkeypatch.setattr(user_import, 'adjust_counters', fail_second_chunk)
+    settled = []
+    report = import_users([_row(f'user{number}') for number in range(5)], chunk_size=2,
+                          progress=lambda processed, created: settled.append((processed, created)))
+
+    assert [result['status'] for result in report] == ['created', 'created', 'failed', 'failed', 'created']
+    assert sorted(username for (username,) in db.session.query(User.username)) == ['user0', 'user1', 'user4']
+    assert Board.query.count() == 3
+    assert settled == [(0, 0), (2, 2), (4, 2), (5, 3)]